@@ -11,6 +11,10 @@ Architecture:
   6. Vision: Gemini 1.5 Flash multimodal
   7. Voice: Edge TTS (400+ voices, unlimited)
   8. Warm Manifest: In-memory corpus index with async revalidation
+  9. Tracing: Per-request spans, ?trace=1 waterfall, slowest-N ring buffer
+ 10. Profiling: On-demand in-process sampling profiler (collapsed stacks)
+ 11. Admission Control: Degrade, then shed, when workers are saturated
+ 12. ASGI Mode: jarvis_asgi.py serves /ask, /chat, /vision from coroutines
 
 Rebuilt: March 2, 2026 — All OneDrive paths eliminated, all bugs fixed.
 """
@@ -18,6 +22,7 @@ Rebuilt: March 2, 2026 — All OneDrive paths eliminated, all bugs fixed.
 from __future__ import annotations
 
 import asyncio
+import atexit
 import hashlib
 import json
 import os
@@ -30,6 +35,7 @@ import threading
 import time
 import uuid
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
@@ -37,6 +43,18 @@ from urllib.parse import urlparse
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
 
+from jarvis_admission import AdmissionController, RecentAnswerCache, degraded, parse_queue_start
+from jarvis_browser_pool import BrowserPool, PoolBusy
+from jarvis_html_text import extract_response, extract_text
+from jarvis_keywords import register as register_keywords, tag_query
+from jarvis_passages import pack_passages, passage_stats
+from jarvis_profiler import ProfilerBusy, SamplingProfiler
+from jarvis_prompt import allocate, estimate_tokens, prompt_stats, trim_to_tokens
+from jarvis_prompt import fit_prompt as fit_prompt_to_window
+from jarvis_ratelimit import RateLimiter, build_store, parse_rules
+from jarvis_tracing import SlowTraceBuffer, propagate, span, trace_request, traced
+from jarvis_url_cache import URLCache
+
 
 def _load_env_file() -> None:
     """Lightweight .env loader (no extra dependency required)."""
@@ -79,7 +97,7 @@ EDGE_TTS_AVAILABLE = _probe(lambda: __import__("edge_tts"))
 PLAYWRIGHT_AVAILABLE = _probe(lambda: __import__("playwright"))
 DDGS_AVAILABLE = _probe(lambda: __import__("duckduckgo_search"))
 REDIS_AVAILABLE = _probe(lambda: __import__("redis"))
-SCRAPING_AVAILABLE = _probe(lambda: __import__("bs4")) and _probe(lambda: __import__("requests"))
+SCRAPING_AVAILABLE = _probe(lambda: __import__("requests"))
 HUGGINGFACE_AVAILABLE = _probe(lambda: __import__("huggingface_hub"))
 
 if GROQ_AVAILABLE:
@@ -95,7 +113,6 @@ if EDGE_TTS_AVAILABLE:
 if REDIS_AVAILABLE:
     import redis as redis_lib
 if SCRAPING_AVAILABLE:
-    from bs4 import BeautifulSoup
     import requests
 if HUGGINGFACE_AVAILABLE:
     from huggingface_hub import InferenceClient
@@ -128,19 +145,41 @@ NODE_ENV = os.environ.get("NODE_ENV", "production")
 def get_today_str():
     return datetime.now(timezone.utc).strftime("%B %d, %Y")
 
-# Token limits
+# Token limits (estimated BPE tokens, see jarvis_prompt)
 MAX_CONTEXT_TOKENS = 3000
+KNOWLEDGE_MAX_TOKENS = int(os.environ.get("KNOWLEDGE_MAX_TOKENS", "2500"))
+LLM_MAX_COMPLETION_TOKENS = int(os.environ.get("LLM_MAX_COMPLETION_TOKENS", "2048"))
+# Retrieved text is ranked by passage (BM25, near-duplicates dropped) before
+# packing; 0 keeps the per-source sections in fetch order
+CONTEXT_RANKING = os.environ.get("CONTEXT_RANKING", "1") != "0"
 FALLBACK_MESSAGE = "Sir, I'm recalibrating my systems. Please try again in a moment."
 
 # Security — from env only
 JARVIS_AUTH_KEY = os.environ.get("JARVIS_AUTH_KEY", "MySuperSecretKey123")
 JARVIS_SECURE_KEY = os.environ.get("JARVIS_SECURE_KEY", "VISHAI_SECURE_2026")
 FORBIDDEN_KEYWORDS = ["ignore previous", "system prompt", "reveal your instructions"]
+# No right-hand word boundary: "system prompts", "ignore previously ..." must still trip it
+_FORBIDDEN = register_keywords("app.forbidden", FORBIDDEN_KEYWORDS, whole_words=False)
 
-# Rate limiting
+# Rate limiting (token buckets; rules are "route=requests/seconds,...")
 RATE_LIMIT_WINDOW_SECONDS = 10
 RATE_LIMIT_MAX_REQUESTS = 3
-_request_log: Dict[str, List[float]] = {}
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")  # memory | shm | redis
+RATE_LIMIT_IP_RULES = os.environ.get(
+    "RATE_LIMIT_IP_RULES",
+    f"/chat={RATE_LIMIT_MAX_REQUESTS}/{RATE_LIMIT_WINDOW_SECONDS},/ask=10/60,/vision=5/60",
+)
+RATE_LIMIT_USER_RULES = os.environ.get("RATE_LIMIT_USER_RULES", "/chat=3/10,/ask=10/60,/vision=5/60")
+RATE_LIMIT_SHM_SLOTS = int(os.environ.get("RATE_LIMIT_SHM_SLOTS", "65536"))
+
+# Admission control: (level 1, level 2, shed) thresholds per worker
+ADMISSION_INFLIGHT_THRESHOLDS = tuple(
+    int(x) for x in os.environ.get("ADMISSION_INFLIGHT_THRESHOLDS", "4,8,16").split(",")
+)
+ADMISSION_QUEUE_MS_THRESHOLDS = tuple(
+    float(x) for x in os.environ.get("ADMISSION_QUEUE_MS_THRESHOLDS", "500,2000,8000").split(",")
+)
+ADMISSION_RETRY_AFTER_SECONDS = float(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", "5"))
 
 # ── Warm Manifest Config (NO OneDrive paths) ──
 # Use explicit env var or current script directory as root
@@ -157,6 +196,27 @@ MANIFEST_READ_BYTES = int(os.environ.get("MANIFEST_READ_BYTES", "256"))
 MANIFEST_REVALIDATE_SECONDS = int(os.environ.get("MANIFEST_REVALIDATE_SECONDS", "15"))
 OPS_LATENCY_WINDOW = int(os.environ.get("OPS_LATENCY_WINDOW", "5000"))
 
+# Tracing (spans are no-ops unless a trace is open for the request)
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "1") == "1"
+TRACE_SLOW_BUFFER_SIZE = int(os.environ.get("TRACE_SLOW_BUFFER_SIZE", "50"))
+
+# Sampling profiler (/ops/profile, X-Jarvis-Key required)
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "30"))
+PROFILE_DEFAULT_HZ = float(os.environ.get("PROFILE_DEFAULT_HZ", "100"))
+
+# Browser pool (/api/browser-action → jarvis_browser_scan)
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_CONCURRENCY = int(os.environ.get("BROWSER_POOL_CONCURRENCY", "4"))
+BROWSER_POOL_MAX_PAGES = int(os.environ.get("BROWSER_POOL_MAX_PAGES", "50"))
+BROWSER_POOL_QUEUE_TIMEOUT = float(os.environ.get("BROWSER_POOL_QUEUE_TIMEOUT", "20"))
+BROWSER_BLOCK_RESOURCES = os.environ.get("BROWSER_BLOCK_RESOURCES", "1") == "1"
+
+# /chat context analysis: "speculative" runs the Gemini analysis alongside
+# retrieval, "local" uses the keyword classifier only (no LLM round-trip),
+# "llm" analyses first and retrieves afterwards
+CHAT_CONTEXT_MODE = os.environ.get("CHAT_CONTEXT_MODE", "speculative")
+CHAT_SPECULATIVE_WORKERS = int(os.environ.get("CHAT_SPECULATIVE_WORKERS", "16"))
+
 # Voice
 VOICE_NAME = os.environ.get("VOICE_NAME", "en-GB-RyanNeural")
 VOICE_DIR = os.path.join(_SCRIPT_DIR, "voice_cache")
@@ -258,6 +318,71 @@ CORS(app, resources={
 })
 
 
+# ═══════════════════════════════════════════
+# § 4b. REQUEST TRACING
+# ═══════════════════════════════════════════
+
+slow_traces = SlowTraceBuffer(TRACE_SLOW_BUFFER_SIZE)
+
+
+def _trace_requested() -> bool:
+    """Opt-in waterfall in the response body via ?trace=1."""
+    return request.args.get("trace", "") in ("1", "true")
+
+
+def request_trace(route: str, want_trace: bool):
+    """Root trace for a route; always opened when the caller asked for ?trace=1."""
+    return trace_request(route, enabled=TRACING_ENABLED or want_trace, sink=slow_traces)
+
+
+profiler = SamplingProfiler(max_seconds=PROFILE_MAX_SECONDS)
+
+
+# ═══════════════════════════════════════════
+# § 4c. ADMISSION CONTROL
+# ═══════════════════════════════════════════
+
+admission = AdmissionController(
+    ADMISSION_INFLIGHT_THRESHOLDS, ADMISSION_QUEUE_MS_THRESHOLDS, ADMISSION_RETRY_AFTER_SECONDS
+)
+# Recent answers per route, only served back when admission says level >= 2
+answer_caches = {"/ask": RecentAnswerCache(), "/chat": RecentAnswerCache()}
+
+
+def _queue_delay_ms() -> float:
+    """Time spent queued in front of the worker, as stamped by the proxy."""
+    return parse_queue_start(request.headers.get("X-Request-Start") or request.headers.get("X-Queue-Start", ""))
+
+
+def _overloaded_response(ticket):
+    resp = jsonify({"error": "JARVIS is at capacity. Please retry shortly.", "admission": ticket.describe()})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(int(admission.retry_after))
+    return resp
+
+
+def _answer_scope(user_id, model=None) -> Tuple[str, Optional[str]]:
+    """Answer cache scope; str() since both come straight from the JSON body."""
+    return str(user_id), (None if model is None else str(model))
+
+
+def _cached_answer(route: str, question: str, ticket, scope) -> Optional[dict]:
+    """Near-duplicate answer for an overloaded worker, if one is fresh.
+
+    `scope` is (user_id, model): answers use the user's memory and history,
+    so they are never served to another user or for another model.
+    """
+    if not degraded("answer_cache"):
+        return None
+    hit = answer_caches[route].get(question, scope)
+    if not hit:
+        return None
+    result, similarity = hit
+    admission.record(route, "served_cached")
+    return {**result, "served_from": "answer_cache", "similarity": round(similarity, 3),
+            "admission": ticket.describe()}
+
+
 # ═══════════════════════════════════════════
 # § 5. DATABASE
 # ═══════════════════════════════════════════
@@ -300,6 +425,7 @@ def init_database():
     print("✅ SQLite database initialized")
 
 
+@traced("db.save_message")
 def save_message(role: str, content: str, intent: str = "", sentiment: str = ""):
     try:
         conn = sqlite3.connect(DB_PATH)
@@ -404,42 +530,55 @@ def _is_cloud_file_provider_error(exc: Exception) -> bool:
 # § 8. MoE (MIXTURE OF EXPERTS) ROUTER
 # ═══════════════════════════════════════════
 
+# Keyword lists are matched as whole words (jarvis_keywords), so inflected
+# forms the old substring test caught by accident are listed explicitly
 _INTENT_MAP = {
-    "coding": ["code", "function", "debug", "algorithm", "python", "javascript",
-               "write a program", "fix bug", "class", "api", "html", "css", "sql",
-               "error", "compile", "runtime"],
-    "general": ["explain", "analyze", "compare", "philosophy", "why", "how does",
-                "what is", "describe", "history", "science", "complex"],
-    "gemma": ["hi", "hello", "thanks", "ok", "yes", "no", "what time", "hey", "bye",
-              "good morning", "good night"],
+    "coding": ["code", "coding", "function", "functions", "debug", "debugging", "algorithm",
+               "algorithms", "python", "javascript", "write a program", "fix bug", "class",
+               "classes", "api", "apis", "html", "css", "sql", "error", "errors", "compile",
+               "compiler", "runtime"],
+    "general": ["explain", "explanation", "analyze", "analysis", "compare", "comparison",
+                "philosophy", "why", "how does", "what is", "describe", "history", "science",
+                "complex"],
+    "gemma": ["hi", "hello", "thanks", "thank you", "ok", "okay", "yes", "no", "what time",
+              "hey", "bye", "good morning", "good night"],
 }
+_INTENT_CATEGORIES = [(intent, register_keywords(f"app.intent.{intent}", keywords))
+                      for intent, keywords in _INTENT_MAP.items()]
 
 
 def analyze_intent(question: str) -> str:
-    q = question.lower().strip()
-    for intent, keywords in _INTENT_MAP.items():
-        if any(kw in q for kw in keywords):
-            return intent
-    return "general"
+    tags = tag_query(question)
+    return next((intent for intent, category in _INTENT_CATEGORIES if category in tags), "general")
 
 
 # Layer 2: Query classification for /chat endpoint
+_CURRENT_EVENT = register_keywords("app.current_event", [
+    "latest", "today", "news", "current", "currently", "right now", "2026", "2025", "happening",
+    "update", "updates", "live", "breaking", "recent", "recently", "this week", "this month"])
+_ACADEMIC = register_keywords("app.academic", [
+    "research", "paper", "papers", "study", "studies", "journal", "journals", "thesis",
+    "citation", "citations", "book", "books", "textbook", "textbooks", "reference", "references",
+    "scholarly", "arxiv", "ieee"])
+_CODING = register_keywords("app.coding", [
+    "code", "coding", "program", "programs", "programming", "function", "functions", "algorithm",
+    "algorithms", "debug", "debugging", "error", "errors", "compile", "compiler", "python",
+    "javascript", "java", "html", "react", "api", "apis"])
+_TIME_SENSITIVE = register_keywords("app.time_sensitive", [
+    "today", "latest", "current", "currently", "now", "2026", "2025", "breaking", "live", "score",
+    "scores", "weather", "stock", "stocks", "price", "prices", "update", "updates"])
+
+
 def is_current_event(q: str) -> bool:
-    patterns = ["latest", "today", "news", "current", "right now", "2026", "2025",
-                "happening", "update", "live", "breaking", "recent", "this week", "this month"]
-    return any(p in q.lower() for p in patterns)
+    return _CURRENT_EVENT in tag_query(q)
 
 
 def is_academic_query(q: str) -> bool:
-    patterns = ["research", "paper", "study", "journal", "thesis", "citation",
-                "book", "textbook", "reference", "scholarly", "arxiv", "ieee"]
-    return any(p in q.lower() for p in patterns)
+    return _ACADEMIC in tag_query(q)
 
 
 def is_coding_query(q: str) -> bool:
-    patterns = ["code", "program", "function", "algorithm", "debug", "error",
-                "compile", "python", "javascript", "java", "html", "react", "api"]
-    return any(p in q.lower() for p in patterns)
+    return _CODING in tag_query(q)
 
 
 def classify_query(question: str) -> str:
@@ -463,9 +602,7 @@ def get_tavily_client() -> "TavilyClient":
 
 
 def is_time_sensitive_query(q: str) -> bool:
-    patterns = ["today", "latest", "current", "now", "2026", "2025", "breaking",
-                "live", "score", "weather", "stock", "price", "update"]
-    return any(p in q.lower() for p in patterns)
+    return _TIME_SENSITIVE in tag_query(q)
 
 
 def rewrite_with_date(q: str) -> str:
@@ -475,10 +612,23 @@ def rewrite_with_date(q: str) -> str:
 
 
 def truncate_to_tokens(text: str, max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
-    max_chars = max_tokens * 4
-    return text[:max_chars] if len(text) > max_chars else text
+    """Whole sentences of `text` that fit in max_tokens."""
+    return trim_to_tokens(text, max_tokens)
+
 
+def _format_tavily_results(results: dict) -> str:
+    if not results.get("results"):
+        return ""
+    parts = []
+    for r in results["results"]:
+        title = r.get("title", "")
+        content = r.get("content", "")
+        url = r.get("url", "")
+        parts.append(f"**{title}**\n{content}\nSource: {url}")
+    return truncate_to_tokens("\n\n".join(parts))
 
+
+@traced("tavily.search")
 def get_web_research(question: str) -> str:
     """Core Tavily search with multi-key rotation."""
     if not TAVILY_AVAILABLE or not TAVILY_API_KEYS:
@@ -487,15 +637,7 @@ def get_web_research(question: str) -> str:
         client = get_tavily_client()
         search_query = rewrite_with_date(question)
         results = client.search(query=search_query, search_depth="advanced", max_results=3)
-        if not results.get("results"):
-            return ""
-        parts = []
-        for r in results["results"]:
-            title = r.get("title", "")
-            content = r.get("content", "")
-            url = r.get("url", "")
-            parts.append(f"**{title}**\n{content}\nSource: {url}")
-        return truncate_to_tokens("\n\n".join(parts))
+        return _format_tavily_results(results)
     except Exception as e:
         print(f"⚠️ Tavily search error: {e}")
         return ""
@@ -505,28 +647,31 @@ def get_web_research(question: str) -> str:
 # § 10. WEB SCRAPING
 # ═══════════════════════════════════════════
 
+SCRAPE_HEADERS = {"User-Agent": "Mozilla/5.0 JARVIS-Bot/2026"}
+SCRAPE_MAX_BYTES = int(os.environ.get("SCRAPE_MAX_BYTES", str(1 << 20)))
+
+
+def _html_to_text(html: str, max_chars: int = 3000) -> str:
+    """Article → main → body text, noise tags dropped, lines > 20 chars."""
+    return extract_text(html, max_chars=max_chars, max_bytes=SCRAPE_MAX_BYTES)
+
+
+# Extracted page text, shared with jarvis_browser_scan and python-backend's
+# DDGS extractor through the disk tier (URL_CACHE_DIR).
+url_cache = URLCache.from_env()
+
+
+@traced("scrape.url")
 def scrape_url_content(url: str, max_chars: int = 3000) -> str:
     if not SCRAPING_AVAILABLE:
         return ""
     try:
-        headers = {"User-Agent": "Mozilla/5.0 JARVIS-Bot/2026"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        # Remove noise
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside", "iframe"]):
-            tag.decompose()
-        # Try article content first
-        article = soup.find("article")
-        if article:
-            text = article.get_text(separator="\n", strip=True)
-        else:
-            # Fallback: main or body
-            main = soup.find("main") or soup.find("body")
-            text = main.get_text(separator="\n", strip=True) if main else soup.get_text(separator="\n", strip=True)
-        # Clean up
-        lines = [line.strip() for line in text.splitlines() if len(line.strip()) > 20]
-        return "\n".join(lines)[:max_chars]
+        # Streamed: stops reading at SCRAPE_MAX_BYTES or once the article is complete
+        text = url_cache.fetch(
+            url, lambda resp: extract_response(resp, max_chars=max_chars, max_bytes=SCRAPE_MAX_BYTES),
+            namespace=f"scrape:{max_chars}", headers=SCRAPE_HEADERS, timeout=10, stream=True,
+        )
+        return text or ""
     except Exception as e:
         print(f"⚠️ Scrape error ({url}): {e}")
         return ""
@@ -536,33 +681,43 @@ def scrape_url_content(url: str, max_chars: int = 3000) -> str:
 # § 11. SONAR BACKUP (Perplexity API)
 # ═══════════════════════════════════════════
 
+SONAR_URL = "https://api.perplexity.ai/chat/completions"
+
+
+def _sonar_request(question: str) -> dict:
+    return {
+        "url": SONAR_URL,
+        "headers": {
+            "Authorization": f"Bearer {SONAR_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        "json": {
+            "model": "sonar",
+            "messages": [
+                {"role": "system", "content": "Provide accurate, cited answers."},
+                {"role": "user", "content": question},
+            ],
+            "search_recency_filter": "month",
+            "return_citations": True,
+        },
+    }
+
+
+def _parse_sonar(data: dict) -> str:
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    citations = data.get("citations", [])
+    if citations:
+        content += "\n\nSources:\n" + "\n".join(f"- {c}" for c in citations[:3])
+    return truncate_to_tokens(content)
+
+
+@traced("sonar.search")
 def search_sonar_api(question: str) -> str:
     if not SONAR_API_KEY:
         return ""
     try:
-        resp = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers={
-                "Authorization": f"Bearer {SONAR_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "sonar",
-                "messages": [
-                    {"role": "system", "content": "Provide accurate, cited answers."},
-                    {"role": "user", "content": question},
-                ],
-                "search_recency_filter": "month",
-                "return_citations": True,
-            },
-            timeout=15,
-        )
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        citations = data.get("citations", [])
-        if citations:
-            content += "\n\nSources:\n" + "\n".join(f"- {c}" for c in citations[:3])
-        return truncate_to_tokens(content)
+        resp = requests.post(**_sonar_request(question), timeout=15)
+        return _parse_sonar(resp.json())
     except Exception as e:
         print(f"⚠️ Sonar error: {e}")
         return ""
@@ -571,104 +726,136 @@ def search_sonar_api(question: str) -> str:
 # ═══════════════════════════════════════════
 # § 12. BOOK & PAPER APIs
 # ═══════════════════════════════════════════
+# Each source is split into a request spec (url + params) and a parser so the
+# async server (jarvis_asgi.py) can issue the same calls on its own client.
+
+def _google_books_request(query: str, max_results: int = 3) -> dict:
+    return {
+        "url": "https://www.googleapis.com/books/v1/volumes",
+        "params": {"q": query, "maxResults": max_results, "key": GOOGLE_BOOKS_API_KEY},
+    }
 
+
+def _parse_google_books(data: dict) -> str:
+    parts = []
+    for item in data.get("items", []):
+        info = item.get("volumeInfo", {})
+        title = info.get("title", "Unknown")
+        authors = ", ".join(info.get("authors", ["Unknown"]))
+        desc = info.get("description", "")[:200]
+        parts.append(f"📚 {title} by {authors}\n{desc}")
+    return "\n\n".join(parts)
+
+
+def _open_library_request(query: str, max_results: int = 3) -> dict:
+    return {"url": "https://openlibrary.org/search.json", "params": {"q": query, "limit": max_results}}
+
+
+def _parse_open_library(data: dict) -> str:
+    parts = []
+    for d in data.get("docs", []):
+        title = d.get("title", "Unknown")
+        authors = ", ".join(d.get("author_name", ["Unknown"]))
+        year = d.get("first_publish_year", "N/A")
+        parts.append(f"📖 {title} by {authors} ({year})")
+    return "\n\n".join(parts)
+
+
+def _gutenberg_request(query: str) -> dict:
+    return {"url": "https://gutendex.com/books/", "params": {"search": query}}
+
+
+def _parse_gutenberg(data: dict) -> str:
+    parts = []
+    for r in data.get("results", [])[:3]:
+        title = r.get("title", "Unknown")
+        authors = ", ".join(a.get("name", "") for a in r.get("authors", []))
+        parts.append(f"📜 {title} by {authors} (Public Domain)")
+    return "\n\n".join(parts)
+
+
+def _arxiv_request(query: str, max_results: int = 3) -> dict:
+    return {
+        "url": "http://export.arxiv.org/api/query",
+        "params": {"search_query": f"all:{query}", "max_results": max_results},
+    }
+
+
+def _parse_arxiv(xml_text: str) -> str:
+    import xml.etree.ElementTree as ET
+    root = ET.fromstring(xml_text)
+    ns = {"a": "http://www.w3.org/2005/Atom"}
+    parts = []
+    for e in root.findall("a:entry", ns):
+        title = e.findtext("a:title", "", ns).strip()
+        summary = e.findtext("a:summary", "", ns).strip()[:200]
+        link = e.findtext("a:id", "", ns)
+        parts.append(f"🔬 {title}\n{summary}\nLink: {link}")
+    return "\n\n".join(parts)
+
+
+def _semantic_scholar_request(query: str, max_results: int = 3) -> dict:
+    return {
+        "url": "https://api.semanticscholar.org/graph/v1/paper/search",
+        "params": {"query": query, "limit": max_results, "fields": "title,authors,year,abstract,url"},
+    }
+
+
+def _parse_semantic_scholar(data: dict) -> str:
+    parts = []
+    for p in data.get("data", []):
+        title = p.get("title", "Unknown")
+        authors = ", ".join(a.get("name", "") for a in (p.get("authors") or [])[:3])
+        year = p.get("year", "N/A")
+        abstract = (p.get("abstract") or "")[:200]
+        url = p.get("url", "")
+        parts.append(f"📄 {title} ({year})\nAuthors: {authors}\n{abstract}\n{url}")
+    return "\n\n".join(parts)
+
+
+@traced("books.google")
 def search_google_books(query: str, max_results: int = 3) -> str:
     if not GOOGLE_BOOKS_API_KEY:
         return ""
     try:
-        resp = requests.get(
-            "https://www.googleapis.com/books/v1/volumes",
-            params={"q": query, "maxResults": max_results, "key": GOOGLE_BOOKS_API_KEY},
-            timeout=10,
-        )
-        items = resp.json().get("items", [])
-        parts = []
-        for item in items:
-            info = item.get("volumeInfo", {})
-            title = info.get("title", "Unknown")
-            authors = ", ".join(info.get("authors", ["Unknown"]))
-            desc = info.get("description", "")[:200]
-            parts.append(f"📚 {title} by {authors}\n{desc}")
-        return "\n\n".join(parts)
+        resp = requests.get(**_google_books_request(query, max_results), timeout=10)
+        return _parse_google_books(resp.json())
     except Exception:
         return ""
 
 
+@traced("books.open_library")
 def search_open_library(query: str, max_results: int = 3) -> str:
     try:
-        resp = requests.get(
-            "https://openlibrary.org/search.json",
-            params={"q": query, "limit": max_results},
-            timeout=10,
-        )
-        docs = resp.json().get("docs", [])
-        parts = []
-        for d in docs:
-            title = d.get("title", "Unknown")
-            authors = ", ".join(d.get("author_name", ["Unknown"]))
-            year = d.get("first_publish_year", "N/A")
-            parts.append(f"📖 {title} by {authors} ({year})")
-        return "\n\n".join(parts)
+        resp = requests.get(**_open_library_request(query, max_results), timeout=10)
+        return _parse_open_library(resp.json())
     except Exception:
         return ""
 
 
+@traced("books.gutenberg")
 def search_gutenberg(query: str) -> str:
     try:
-        resp = requests.get(
-            f"https://gutendex.com/books/?search={query}",
-            timeout=10,
-        )
-        results = resp.json().get("results", [])[:3]
-        parts = []
-        for r in results:
-            title = r.get("title", "Unknown")
-            authors = ", ".join(a.get("name", "") for a in r.get("authors", []))
-            parts.append(f"📜 {title} by {authors} (Public Domain)")
-        return "\n\n".join(parts)
+        resp = requests.get(**_gutenberg_request(query), timeout=10)
+        return _parse_gutenberg(resp.json())
     except Exception:
         return ""
 
 
+@traced("papers.arxiv")
 def search_arxiv(query: str, max_results: int = 3) -> str:
     try:
-        import xml.etree.ElementTree as ET
-        resp = requests.get(
-            "http://export.arxiv.org/api/query",
-            params={"search_query": f"all:{query}", "max_results": max_results},
-            timeout=10,
-        )
-        root = ET.fromstring(resp.text)
-        ns = {"a": "http://www.w3.org/2005/Atom"}
-        entries = root.findall("a:entry", ns)
-        parts = []
-        for e in entries:
-            title = e.findtext("a:title", "", ns).strip()
-            summary = e.findtext("a:summary", "", ns).strip()[:200]
-            link = e.findtext("a:id", "", ns)
-            parts.append(f"🔬 {title}\n{summary}\nLink: {link}")
-        return "\n\n".join(parts)
+        resp = requests.get(**_arxiv_request(query, max_results), timeout=10)
+        return _parse_arxiv(resp.text)
     except Exception:
         return ""
 
 
+@traced("papers.semantic_scholar")
 def search_semantic_scholar(query: str, max_results: int = 3) -> str:
     try:
-        resp = requests.get(
-            "https://api.semanticscholar.org/graph/v1/paper/search",
-            params={"query": query, "limit": max_results, "fields": "title,authors,year,abstract,url"},
-            timeout=10,
-        )
-        papers = resp.json().get("data", [])
-        parts = []
-        for p in papers:
-            title = p.get("title", "Unknown")
-            authors = ", ".join(a.get("name", "") for a in (p.get("authors") or [])[:3])
-            year = p.get("year", "N/A")
-            abstract = (p.get("abstract") or "")[:200]
-            url = p.get("url", "")
-            parts.append(f"📄 {title} ({year})\nAuthors: {authors}\n{abstract}\n{url}")
-        return "\n\n".join(parts)
+        resp = requests.get(**_semantic_scholar_request(query, max_results), timeout=10)
+        return _parse_semantic_scholar(resp.json())
     except Exception:
         return ""
 
@@ -677,53 +864,91 @@ def search_semantic_scholar(query: str, max_results: int = 3) -> str:
 # § 13. KNOWLEDGE FUSION ENGINE
 # ═══════════════════════════════════════════
 
-def jarvis_knowledge_fusion(question: str) -> str:
-    """Combine Web + Books + Papers based on query classification."""
-    category = classify_query(question)
-    parts = []
+# Source key → section heading, in the order sections appear in the context.
+FUSION_SECTIONS = [
+    ("web", "🌐 **Web Research:**\n"),
+    ("books", "\n📚 **Books:**\n"),
+    ("olib", "\n📖 **Open Library:**\n"),
+    ("arxiv", "\n🔬 **Research Papers:**\n"),
+    ("scholar", "\n📄 **Semantic Scholar:**\n"),
+    ("gutenberg", "\n📜 **Classic Texts:**\n"),
+]
 
-    # Always try web search
-    web = get_web_research(question)
-    if web:
-        parts.append(f"🌐 **Web Research:**\n{web}")
 
+def _fusion_sources(question: str) -> List[str]:
+    """Which sources the fusion engine should query for this question."""
+    category = classify_query(question)
+    if degraded("fusion_optional"):
+        # Under load: web only, skip the slower book/paper APIs
+        category = "web_only"
+    sources = ["web"]
     if category in ("academic", "general"):
-        # Academic: try all scholarly sources
-        books = search_google_books(question)
-        if books:
-            parts.append(f"\n📚 **Books:**\n{books}")
+        sources += ["books", "olib"]
+        if category == "academic":
+            sources += ["arxiv", "scholar", "gutenberg"]
+    return sources
 
-        olib = search_open_library(question)
-        if olib:
-            parts.append(f"\n📖 **Open Library:**\n{olib}")
 
-        if category == "academic":
-            arxiv = search_arxiv(question)
-            if arxiv:
-                parts.append(f"\n🔬 **Research Papers:**\n{arxiv}")
+CONTEXT_LABELS = {key: heading.strip() for key, heading in FUSION_SECTIONS}
+CONTEXT_LABELS["sonar"] = "🛰️ **Sonar:**"
 
-            scholar = search_semantic_scholar(question)
-            if scholar:
-                parts.append(f"\n📄 **Semantic Scholar:**\n{scholar}")
 
-            gutenberg = search_gutenberg(question)
-            if gutenberg:
-                parts.append(f"\n📜 **Classic Texts:**\n{gutenberg}")
+def rank_context(question: str, sources: Dict[str, str], max_tokens: int = KNOWLEDGE_MAX_TOKENS) -> str:
+    """Most relevant passages of the retrieved text (source key -> text), best first."""
+    with span("context.rank") as s:
+        context = pack_passages(question, sources, max_tokens, labels=CONTEXT_LABELS)
+        s.set(sources=len(sources))
+        return context
 
-    return truncate_to_tokens("\n\n".join(parts), 2500) if parts else ""
+
+def _assemble_knowledge(question: str, results: Dict[str, str], max_tokens: int = KNOWLEDGE_MAX_TOKENS) -> str:
+    """Fusion context: ranked passages, or (CONTEXT_RANKING=0) sections in FUSION_SECTIONS order."""
+    sections = [(key, heading, results[key]) for key, heading in FUSION_SECTIONS if results.get(key)]
+    if not sections:
+        return ""
+    if CONTEXT_RANKING:
+        return rank_context(question, {key: text for key, _, text in sections}, max_tokens)
+    # Each source is guaranteed an equal share of max_tokens
+    floor = max_tokens // len(sections)
+    grants = allocate(max_tokens, [(key, estimate_tokens(heading + text), floor)
+                                   for key, heading, text in sections])
+    parts = [heading + truncate_to_tokens(text, grants[key] - estimate_tokens(heading))
+             for key, heading, text in sections]
+    return "\n\n".join(parts)
+
+
+FUSION_FETCHERS = {
+    "web": get_web_research,
+    "books": search_google_books,
+    "olib": search_open_library,
+    "arxiv": search_arxiv,
+    "scholar": search_semantic_scholar,
+    "gutenberg": search_gutenberg,
+}
+
+
+@traced("fusion")
+def jarvis_knowledge_fusion(question: str) -> str:
+    """Combine Web + Books + Papers based on query classification."""
+    results = {key: FUSION_FETCHERS[key](question) for key in _fusion_sources(question)}
+    return _assemble_knowledge(question, results)
 
 
+@traced("web.enhanced")
 def get_enhanced_web_research(question: str) -> str:
     """Tavily → Deep scrape → Sonar fallback chain."""
-    # Try Tavily first
-    web = get_web_research(question)
+    return _enhance_web_result(question, get_web_research(question))
+
+
+def _enhance_web_result(question: str, web: str) -> str:
+    """Rest of the get_enhanced_web_research chain, given the Tavily result."""
     if web and len(web) > 100:
-        return web
+        return rank_context(question, {"web": web}) if CONTEXT_RANKING else web
 
     # Sonar fallback
     sonar = search_sonar_api(question)
     if sonar:
-        return sonar
+        return rank_context(question, {"sonar": sonar}) if CONTEXT_RANKING else sonar
 
     return ""
 
@@ -732,23 +957,49 @@ def get_enhanced_web_research(question: str) -> str:
 # § 14. LLM FALLBACK CHAIN: Groq → Gemini → HuggingFace → Cache
 # ═══════════════════════════════════════════
 
-def call_groq_with_model(question: str, system_prompt: str, model_key: str = "general",
-                         history: list = None) -> Optional[str]:
-    """Call Groq API with specified model."""
-    if not GROQ_AVAILABLE or not GROQ_API_KEY:
-        return None
+def _groq_request(question: str, system_prompt: str, model_key: str = "general",
+                  history: list = None) -> dict:
     model = GROQ_MODELS.get(model_key, GROQ_MODELS["general"])
     messages = [{"role": "system", "content": system_prompt}]
     if history:
         messages.extend(history[-6:])  # Last 3 exchanges
     messages.append({"role": "user", "content": question})
+    return {
+        "url": "https://api.groq.com/openai/v1/chat/completions",
+        "headers": {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"},
+        "json": {"model": model, "messages": messages, "temperature": 0.7,
+                 "max_tokens": LLM_MAX_COMPLETION_TOKENS},
+    }
+
+
+def fit_prompt(model_key: str, build, question: str, web_data: str = "", memory: str = "",
+               history: list = None) -> Tuple[str, list]:
+    """
+    System prompt and history trimmed to the Groq model's context window.
+
+    build(web_data, memory) renders the system prompt; retrieval and memory
+    are cut at sentence boundaries, history by whole messages.
+    """
+    model = GROQ_MODELS.get(model_key, GROQ_MODELS["general"])
+    with span("prompt.fit", model=model) as s:
+        system_prompt, history, tokens = fit_prompt_to_window(
+            model, build, question, retrieval=web_data, memory=memory, history=history,
+            completion_tokens=LLM_MAX_COMPLETION_TOKENS,
+        )
+        s.set(prompt_tokens=tokens)
+    return system_prompt, history
+
+
+def call_groq_with_model(question: str, system_prompt: str, model_key: str = "general",
+                         history: list = None) -> Optional[str]:
+    """Call Groq API with specified model."""
+    if not GROQ_AVAILABLE or not GROQ_API_KEY:
+        return None
+    req = _groq_request(question, system_prompt, model_key, history)
+    model = req["json"]["model"]
     try:
-        with httpx.Client(timeout=30) as client:
-            resp = client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"},
-                json={"model": model, "messages": messages, "temperature": 0.7, "max_tokens": 2048},
-            )
+        with span("llm.groq", model=model), httpx.Client(timeout=30) as client:
+            resp = client.post(**req)
             resp.raise_for_status()
             return resp.json()["choices"][0]["message"]["content"]
     except Exception as e:
@@ -756,12 +1007,24 @@ def call_groq_with_model(question: str, system_prompt: str, model_key: str = "ge
         return None
 
 
+_flash_model = None
+
+
+def _gemini_flash_model():
+    # Built once per process instead of per call (text, context analysis, vision)
+    global _flash_model
+    if _flash_model is None:
+        _flash_model = genai.GenerativeModel("gemini-1.5-flash")
+    return _flash_model
+
+
+@traced("llm.gemini")
 def call_gemini_text(question: str, system_prompt: str = "") -> Optional[str]:
     """Call Gemini 1.5 Flash for text generation."""
     if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
         return None
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
+        model = _gemini_flash_model()
         prompt = f"{system_prompt}\n\nUser: {question}" if system_prompt else question
         response = model.generate_content(prompt)
         return response.text if response and response.text else None
@@ -770,6 +1033,7 @@ def call_gemini_text(question: str, system_prompt: str = "") -> Optional[str]:
         return None
 
 
+@traced("llm.huggingface")
 def call_huggingface_api(question: str, system_prompt: str = "") -> Optional[str]:
     """Final fallback: HuggingFace Mixtral-8x7B."""
     if not HUGGINGFACE_AVAILABLE or not HUGGINGFACE_API_KEY:
@@ -795,7 +1059,9 @@ def call_llm_with_fallback(question: str, system_prompt: str, model_key: str = "
                            history: list = None) -> str:
     """Groq → Gemini → HuggingFace → Cache → Fallback message."""
     # Check cache first
-    cached = llm_cache.get(question, system_prompt, model_key)
+    with span("llm.cache_lookup") as s:
+        cached = llm_cache.get(question, system_prompt, model_key)
+        s.set(hit=bool(cached))
     if cached:
         return cached
 
@@ -865,6 +1131,7 @@ def _execute_tool(name: str, args: dict) -> str:
     return fn() if fn else json.dumps({"error": f"Unknown tool: {name}"})
 
 
+@traced("llm.gemini_tools")
 def run_gemini_with_tools(question: str, system_prompt: str = "", max_rounds: int = 3) -> Optional[str]:
     """Gemini function-calling with auto tool execution (up to 3 rounds)."""
     if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
@@ -915,6 +1182,7 @@ def run_gemini_with_tools(question: str, system_prompt: str = "", max_rounds: in
 # § 16. TTS (Edge TTS)
 # ═══════════════════════════════════════════
 
+@traced("tts.edge")
 def generate_tts_audio(text: str, voice: str = None) -> Optional[str]:
     if not EDGE_TTS_AVAILABLE:
         return None
@@ -936,25 +1204,77 @@ def generate_tts_audio(text: str, voice: str = None) -> Optional[str]:
 # § 17. USER CONTEXT ANALYSIS (Gemini)
 # ═══════════════════════════════════════════
 
-def analyze_user_context(question: str) -> dict:
-    """Use Gemini to analyze intent/sentiment/urgency."""
-    if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
-        return {"intent": "GENERAL", "sentiment": "neutral", "urgency": "normal"}
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = f"""Analyze this user message and return JSON only:
+DEFAULT_USER_CONTEXT = {"intent": "GENERAL", "sentiment": "neutral", "urgency": "normal"}
+
+
+def _context_prompt(question: str) -> str:
+    return f"""Analyze this user message and return JSON only:
 {{"intent": "SEARCH|CODING|SOCIAL|MEMORY|GENERAL", "sentiment": "positive|negative|neutral|frustrated|curious", "urgency": "low|normal|high|critical"}}
 
 Message: {question[:200]}"""
-        resp = model.generate_content(prompt)
-        text = resp.text.strip()
-        # Extract JSON from response
-        match = re.search(r'\{[^}]+\}', text)
-        if match:
+
+
+def _parse_context(text: str) -> dict:
+    # Extract JSON from response
+    match = re.search(r'\{[^}]+\}', text.strip())
+    if match:
+        try:
             return json.loads(match.group())
+        except ValueError:
+            pass
+    return dict(DEFAULT_USER_CONTEXT)
+
+
+@traced("context.analyze")
+def analyze_user_context(question: str) -> dict:
+    """Use Gemini to analyze intent/sentiment/urgency."""
+    if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
+        return dict(DEFAULT_USER_CONTEXT)
+    try:
+        resp = _gemini_flash_model().generate_content(_context_prompt(question))
+        return _parse_context(resp.text)
     except Exception:
         pass
-    return {"intent": "GENERAL", "sentiment": "neutral", "urgency": "normal"}
+    return dict(DEFAULT_USER_CONTEXT)
+
+
+# Word lists from python-backend MLService.analyze_sentiment, plus the
+# frustrated/curious/urgent cues the Gemini prompt asks for
+_SENTIMENT_CATEGORIES = [
+    ("frustrated", register_keywords("app.sentiment.frustrated", [
+        "frustrated", "frustrating", "annoyed", "annoying", "still not working", "doesn't work",
+        "does not work", "not working", "stuck", "again and again", "fed up", "confused"])),
+    ("negative", register_keywords("app.sentiment.negative", [
+        "bad", "terrible", "awful", "horrible", "worst", "hate", "poor", "disappointing", "useless"])),
+    ("positive", register_keywords("app.sentiment.positive", [
+        "good", "great", "excellent", "amazing", "wonderful", "fantastic", "love", "best", "awesome",
+        "perfect", "thanks", "thank you"])),
+    ("curious", register_keywords("app.sentiment.curious", [
+        "curious", "wonder", "wondering", "why", "how come", "what if", "interesting", "tell me more"])),
+]
+_URGENT = register_keywords("app.urgency.high", [
+    "urgent", "urgently", "asap", "immediately", "emergency", "right away", "deadline",
+    "exam tomorrow", "exam today"])
+
+
+def local_user_context(question: str) -> dict:
+    """Keyword-only stand-in for analyze_user_context (no LLM round-trip)."""
+    if analyze_intent(question) == "gemma":
+        intent = "SOCIAL"
+    else:
+        intent = {"current_event": "SEARCH", "academic": "SEARCH", "coding": "CODING"}.get(
+            classify_query(question), "GENERAL"
+        )
+    tags = tag_query(question)
+    moods = [mood for mood, category in _SENTIMENT_CATEGORIES if category in tags]
+    if "frustrated" in moods:
+        sentiment = "frustrated"
+    elif ("negative" in moods) != ("positive" in moods):
+        sentiment = "negative" if "negative" in moods else "positive"
+    else:
+        sentiment = "curious" if "curious" in moods else "neutral"
+    urgency = "high" if _URGENT in tags else "normal"
+    return {"intent": intent, "sentiment": sentiment, "urgency": urgency, "source": "local"}
 
 
 def apply_emotional_tone(prompt: str, sentiment: str) -> str:
@@ -977,21 +1297,27 @@ def sanitize_response(text: str) -> str:
     return text.strip()
 
 
-def _rate_limit_check(ip: str) -> bool:
-    now = time.time()
-    if ip not in _request_log:
-        _request_log[ip] = []
-    # Clean old entries (also prevents unbounded growth)
-    _request_log[ip] = [t for t in _request_log[ip] if now - t < RATE_LIMIT_WINDOW_SECONDS]
-    if len(_request_log[ip]) >= RATE_LIMIT_MAX_REQUESTS:
-        return False  # Rate limited
-    _request_log[ip].append(now)
-    return True
+rate_limiter = RateLimiter(
+    build_store(RATE_LIMIT_BACKEND, redis_memory, RATE_LIMIT_SHM_SLOTS),
+    parse_rules(RATE_LIMIT_IP_RULES),
+    parse_rules(RATE_LIMIT_USER_RULES),
+)
+
+
+def _rate_limit_check(route: str, ip: str, user_id: Optional[str] = None) -> Tuple[bool, float]:
+    """Token-bucket check for the caller's IP and user_id. Returns (allowed, retry_after)."""
+    return rate_limiter.check(route, ip, user_id)
+
+
+def _rate_limited_response(retry_after: float):
+    resp = jsonify({"error": "Rate limited. Please wait.", "retry_after": round(retry_after, 1)})
+    resp.status_code = 429
+    resp.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    return resp
 
 
 def _is_forbidden_input(text: str) -> bool:
-    t = text.lower()
-    return any(f in t for f in FORBIDDEN_KEYWORDS)
+    return _FORBIDDEN in tag_query(text)
 
 
 def verify_jarvis_security(req) -> bool:
@@ -1007,6 +1333,7 @@ def _secure_gemini_instruction() -> str:
 # § 19. REDIS MEMORY HELPERS
 # ═══════════════════════════════════════════
 
+@traced("redis.get_memory")
 def get_user_memory(user_id: str) -> str:
     if not redis_memory:
         return ""
@@ -1025,6 +1352,7 @@ def set_user_memory(user_id: str, data: str):
         pass
 
 
+@traced("redis.append_memory")
 def append_user_memory(user_id: str, entry: str):
     existing = get_user_memory(user_id)
     combined = f"{existing}\n{entry}" if existing else entry
@@ -1109,17 +1437,21 @@ if firebase_db:
     print(f"✅ Firebase RTDB: {FIREBASE_RTDB_URL}")
 
 
+def _firebase_chat_record(question: str, response: str, intent: str = "") -> dict:
+    return {
+        "question": question[:500],
+        "response": response[:2000],
+        "intent": intent,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 def sync_chat_to_firebase(user_id: str, question: str, response: str, intent: str = ""):
     """Save chat exchange to Firebase RTDB for cross-device persistence."""
     if not firebase_db:
         return
     try:
-        firebase_db.post(f"chats/{user_id}", {
-            "question": question[:500],
-            "response": response[:2000],
-            "intent": intent,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
+        firebase_db.post(f"chats/{user_id}", _firebase_chat_record(question, response, intent))
     except Exception:
         pass
 
@@ -1458,11 +1790,12 @@ Be warm, witty, and personable. Address user as 'Sir'."""
 # § 22. VISION (Gemini 1.5 Flash Multimodal)
 # ═══════════════════════════════════════════
 
+@traced("vision.gemini")
 def process_image_with_gemini(image_bytes: bytes, prompt: str = "Analyze this image in detail.") -> Optional[str]:
     if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
         return None
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
+        model = _gemini_flash_model()
         image_data = {"mime_type": "image/jpeg", "data": image_bytes}
         response = model.generate_content([prompt, image_data])
         return response.text if response and response.text else None
@@ -1475,36 +1808,47 @@ def process_image_with_gemini(image_bytes: bytes, prompt: str = "Analyze this im
 # § 23. ORCHESTRATORS
 # ═══════════════════════════════════════════
 
+def persist_exchange(user_id: str, question: str, response: str, intent: str,
+                     sentiment: str = "", remember: bool = False):
+    """Chat memory + SQLite (+ Redis long-term memory when `remember`)."""
+    chat_memory.add(user_id, "user", question)
+    chat_memory.add(user_id, "assistant", response)
+    save_message("user", question, intent, sentiment)
+    save_message("assistant", response, intent, sentiment)
+    if remember:
+        append_user_memory(user_id, f"Q: {question[:100]} | A: {response[:100]}")
+
+
 def handle_query_with_moe(question: str, model_override: str = None, user_id: str = "default") -> dict:
     """Main /ask orchestrator — Knowledge Fusion + MoE + LLM Fallback."""
     start_time = time.time()
 
     # Intent routing
-    intent = model_override or analyze_intent(question)
-    model_key = intent if intent in GROQ_MODELS else "general"
+    with span("route.intent") as s:
+        intent = model_override or analyze_intent(question)
+        model_key = intent if intent in GROQ_MODELS else "general"
+        s.set(intent=intent)
 
     # Knowledge fusion
-    knowledge = jarvis_knowledge_fusion(question)
-    web_data = knowledge if knowledge else get_enhanced_web_research(question)
+    with span("retrieval"):
+        knowledge = jarvis_knowledge_fusion(question)
+        web_data = knowledge if knowledge else get_enhanced_web_research(question)
 
     # Build prompt
-    memory = get_user_memory(user_id)
-    system_prompt = build_system_prompt(web_data, memory)
-
-    # History
-    history = chat_memory.get(user_id)
+    with span("prompt.build"):
+        memory = get_user_memory(user_id)
+        history = chat_memory.get(user_id)
+        system_prompt, history = fit_prompt(model_key, build_system_prompt, question, web_data, memory, history)
 
     # LLM call
-    raw_response = call_llm_with_fallback(question, system_prompt, model_key, history)
-    response = sanitize_response(raw_response)
-    response = format_response_with_citations(response, web_data)
+    with span("generate"):
+        raw_response = call_llm_with_fallback(question, system_prompt, model_key, history)
+        response = sanitize_response(raw_response)
+        response = format_response_with_citations(response, web_data)
 
     # Save
-    chat_memory.add(user_id, "user", question)
-    chat_memory.add(user_id, "assistant", response)
-    save_message("user", question, intent)
-    save_message("assistant", response, intent)
-    append_user_memory(user_id, f"Q: {question[:100]} | A: {response[:100]}")
+    with span("persist"):
+        persist_exchange(user_id, question, response, intent, remember=True)
 
     # Sync to Firebase RTDB (non-blocking)
     threading.Thread(target=sync_chat_to_firebase, args=(user_id, question, response, intent), daemon=True).start()
@@ -1521,46 +1865,158 @@ def handle_query_with_moe(question: str, model_override: str = None, user_id: st
     }
 
 
-def handle_chat_hybrid(question: str, user_id: str = "default") -> dict:
-    """Full /chat orchestrator — context analysis + knowledge fusion."""
-    start_time = time.time()
+_chat_pool = ThreadPoolExecutor(max_workers=CHAT_SPECULATIVE_WORKERS, thread_name_prefix="chat-spec")
+
+
+class ChatPipelineStats:
+    """How often /chat speculation paid off (/ops/cache-metrics)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "local_context": 0, "llm_context": 0,
+                       "retrieval_used": 0, "retrieval_discarded": 0, "context_ms_total": 0.0}
+
+    def record(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.counts[key] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.counts)
+        llm_ms = out.pop("context_ms_total")
+        out["avg_llm_context_ms"] = round(llm_ms / out["llm_context"], 1) if out["llm_context"] else 0.0
+        out["mode"] = CHAT_CONTEXT_MODE
+        return out
+
+
+chat_pipeline_stats = ChatPipelineStats()
+
+
+class SpeculativeRetrieval:
+    """
+    /chat retrieval started before the intent is known. Sources are fetched
+    on the shared pool as soon as they are requested; whatever the final
+    intent does not read is cancelled (or left to finish and dropped).
+    """
+
+    def __init__(self, question: str):
+        self.question = question
+        self.futures: Dict[str, object] = {}
+        self.used = False
+
+    def prefetch(self, intent_guess: str):
+        if intent_guess in ("CODING", "SOCIAL"):
+            return  # no retrieval on those routes; don't spend API calls on a guess
+        self._start("web")
+        if intent_guess in ("SEARCH", "MEMORY"):
+            for key in _fusion_sources(self.question):
+                self._start(key)
+
+    def _start(self, key: str):
+        if key not in self.futures:
+            self.futures[key] = _chat_pool.submit(propagate(FUSION_FETCHERS[key]), self.question)
+
+    def _get(self, key: str) -> str:
+        self._start(key)
+        self.used = True
+        try:
+            return self.futures[key].result()
+        except Exception as e:
+            print(f"⚠️ Retrieval '{key}' failed: {e}")
+            return ""
 
-    # Analyze user context with Gemini
+    def knowledge(self) -> str:
+        """jarvis_knowledge_fusion, falling back to get_enhanced_web_research."""
+        results = {key: self._get(key) for key in _fusion_sources(self.question)}
+        knowledge = _assemble_knowledge(self.question, results)
+        return knowledge if knowledge else self.web_research()
+
+    def web_research(self) -> str:
+        """get_enhanced_web_research, reusing the prefetched Tavily result."""
+        return _enhance_web_result(self.question, self._get("web"))
+
+    def discard(self):
+        for future in self.futures.values():
+            future.cancel()
+        if self.futures:
+            chat_pipeline_stats.record(**{"retrieval_used" if self.used else "retrieval_discarded": 1})
+
+
+def _chat_context(question: str, retrieval: SpeculativeRetrieval) -> dict:
+    """User context for /chat per CHAT_CONTEXT_MODE, prefetching retrieval meanwhile."""
+    local = local_user_context(question)
+    mode = "local" if degraded("context_analysis") else CHAT_CONTEXT_MODE
+    if mode == "local":
+        retrieval.prefetch(local["intent"])
+        chat_pipeline_stats.record(local_context=1)
+        return local
+
+    started = time.perf_counter()
+    if mode == "speculative":
+        # The retrieval the keyword router expects runs on the pool while the
+        # Gemini analysis runs here; it is the critical path, so it must not
+        # queue behind other requests' prefetches
+        retrieval.prefetch(local["intent"])
     ctx = analyze_user_context(question)
-    intent = ctx.get("intent", "GENERAL")
-    sentiment = ctx.get("sentiment", "neutral")
+    chat_pipeline_stats.record(llm_context=1, context_ms_total=(time.perf_counter() - started) * 1000)
+    return ctx
 
-    # Route based on intent
-    if intent in ("SEARCH", "MEMORY"):
-        knowledge = jarvis_knowledge_fusion(question)
-        web_data = knowledge if knowledge else get_enhanced_web_research(question)
-        system_prompt = build_hybrid_prompt(web_data) if web_data else build_system_prompt()
-        system_prompt = apply_emotional_tone(system_prompt, sentiment)
-        history = chat_memory.get(user_id)
-        response = call_llm_with_fallback(question, system_prompt, "general", history)
-    elif intent == "CODING":
-        system_prompt = build_coding_prompt()
-        system_prompt = apply_emotional_tone(system_prompt, sentiment)
-        history = chat_memory.get(user_id)
-        response = call_llm_with_fallback(question, system_prompt, "coding", history)
-    elif intent == "SOCIAL":
-        response = call_gemini_social(question) or call_llm_with_fallback(
-            question, build_system_prompt(), "gemma"
-        )
-    else:
-        web_data = get_enhanced_web_research(question)
-        system_prompt = build_system_prompt(web_data)
-        system_prompt = apply_emotional_tone(system_prompt, sentiment)
-        history = chat_memory.get(user_id)
-        response = call_llm_with_fallback(question, system_prompt, "general", history)
+
+def handle_chat_hybrid(question: str, user_id: str = "default") -> dict:
+    """Full /chat orchestrator — context analysis + knowledge fusion.
+
+    Context analysis and retrieval overlap (CHAT_CONTEXT_MODE); retrieval the
+    final intent does not need is discarded.
+    """
+    start_time = time.time()
+    chat_pipeline_stats.record(requests=1)
+    retrieval = SpeculativeRetrieval(question)
+
+    try:
+        # Analyze user context with Gemini (keyword routing when shedding load)
+        ctx = _chat_context(question, retrieval)
+        intent = ctx.get("intent", "GENERAL")
+        sentiment = ctx.get("sentiment", "neutral")
+
+        # Route based on intent
+        with span("route." + intent.lower()):
+            if intent in ("SEARCH", "MEMORY"):
+                with span("retrieval"):
+                    web_data = retrieval.knowledge()
+                system_prompt, history = fit_prompt(
+                    "general",
+                    lambda web, _: apply_emotional_tone(build_hybrid_prompt(web) if web else build_system_prompt(), sentiment),
+                    question, web_data, history=chat_memory.get(user_id),
+                )
+                response = call_llm_with_fallback(question, system_prompt, "general", history)
+            elif intent == "CODING":
+                system_prompt, history = fit_prompt(
+                    "coding", lambda _web, _mem: apply_emotional_tone(build_coding_prompt(), sentiment),
+                    question, history=chat_memory.get(user_id),
+                )
+                response = call_llm_with_fallback(question, system_prompt, "coding", history)
+            elif intent == "SOCIAL":
+                response = call_gemini_social(question) or call_llm_with_fallback(
+                    question, build_system_prompt(), "gemma"
+                )
+            else:
+                with span("retrieval"):
+                    web_data = retrieval.web_research()
+                system_prompt, history = fit_prompt(
+                    "general", lambda web, _: apply_emotional_tone(build_system_prompt(web), sentiment),
+                    question, web_data, history=chat_memory.get(user_id),
+                )
+                response = call_llm_with_fallback(question, system_prompt, "general", history)
+    finally:
+        # Cancel speculative fetches the route didn't read, even if it raised
+        retrieval.discard()
 
     response = sanitize_response(response)
 
     # Save
-    chat_memory.add(user_id, "user", question)
-    chat_memory.add(user_id, "assistant", response)
-    save_message("user", question, intent, sentiment)
-    save_message("assistant", response, intent, sentiment)
+    with span("persist"):
+        persist_exchange(user_id, question, response, intent, sentiment)
 
     # Sync to Firebase RTDB (non-blocking)
     threading.Thread(target=sync_chat_to_firebase, args=(user_id, question, response, intent), daemon=True).start()
@@ -1570,7 +2026,7 @@ def handle_chat_hybrid(question: str, user_id: str = "default") -> dict:
 
     # TTS generation (async, non-blocking)
     tts_file = None
-    if len(response) < 500:
+    if len(response) < 500 and not degraded("tts"):
         tts_file = generate_tts_audio(response)
 
     return {
@@ -1586,21 +2042,35 @@ def handle_chat_hybrid(question: str, user_id: str = "default") -> dict:
 # § 24. BROWSER AUTOMATION
 # ═══════════════════════════════════════════
 
+# Browsers are launched lazily on the first scan, i.e. after gunicorn forks.
+browser_pool = BrowserPool(
+    size=BROWSER_POOL_SIZE,
+    max_concurrency=BROWSER_POOL_CONCURRENCY,
+    max_pages_per_browser=BROWSER_POOL_MAX_PAGES,
+    queue_timeout=BROWSER_POOL_QUEUE_TIMEOUT,
+    block_resources=BROWSER_BLOCK_RESOURCES,
+) if PLAYWRIGHT_AVAILABLE else None
+if browser_pool:
+    atexit.register(browser_pool.close)
+
+
+@traced("browser.scan")
 def jarvis_browser_scan(url: str) -> str:
-    """Playwright headless Chromium page scraper."""
-    if not PLAYWRIGHT_AVAILABLE:
+    """Playwright headless Chromium page scraper (pooled browsers)."""
+    if not browser_pool:
         return scrape_url_content(url)  # Fallback to requests
+    cached = url_cache.get(url, namespace="browser")
+    if cached is not None:
+        return cached
     try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, timeout=15000)
-            page.wait_for_load_state("networkidle", timeout=10000)
-            content = page.inner_text("body")
-            browser.close()
-            lines = [l.strip() for l in content.splitlines() if len(l.strip()) > 20]
-            return "\n".join(lines)[:5000]
+        content = browser_pool.scan(url)
+        lines = [l.strip() for l in content.splitlines() if len(l.strip()) > 20]
+        text = "\n".join(lines)[:5000]
+        url_cache.put(url, text, namespace="browser")
+        return text
+    except PoolBusy as e:
+        print(f"⚠️ Browser pool busy, falling back to requests: {e}")
+        return scrape_url_content(url)
     except Exception as e:
         print(f"⚠️ Browser scan error: {e}")
         return scrape_url_content(url)
@@ -1624,7 +2094,8 @@ def home():
                       "/api/firebase/user-profile", "/api/firebase/knowledge",
                       "/api/firebase/corpus-stats", "/api/firebase/sync-knowledge",
                       "/ops/filesystem-status", "/ops/launch-readiness",
-                      "/ops/cache-metrics"],
+                      "/ops/cache-metrics", "/ops/slow-traces", "/ops/profile",
+                      "/ops/admission", "/ops/browser-pool"],
     })
 
 
@@ -1642,10 +2113,29 @@ def ask_endpoint():
         return jsonify({"response": "I can't process that request, Sir."}), 200
 
     model = data.get("model", None)
+    ip = request.remote_addr or "unknown"
     user_id = data.get("user_id", request.remote_addr or "default")
-
-    result = handle_query_with_moe(question, model, user_id)
-    return jsonify(result)
+    allowed, retry_after = _rate_limit_check("/ask", ip, user_id)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    with admission.admit("/ask", _queue_delay_ms()) as ticket:
+        if ticket.shed:
+            return _overloaded_response(ticket)
+        cached = _cached_answer("/ask", question, ticket, _answer_scope(user_id, model))
+        if cached:
+            return jsonify(cached)
+
+        want_trace = _trace_requested()
+        with request_trace("/ask", want_trace) as trace:
+            result = handle_query_with_moe(question, model, user_id)
+        # Copy before the per-request admission/trace fields are added
+        answer_caches["/ask"].put(question, dict(result), _answer_scope(user_id, model))
+        if ticket.level:
+            result["admission"] = ticket.describe()
+        if want_trace and trace:
+            result["trace"] = trace.to_dict()
+        return jsonify(result)
 
 
 @app.route("/chat", methods=["POST", "OPTIONS"])
@@ -1654,10 +2144,12 @@ def chat_endpoint():
         return "", 204
 
     ip = request.remote_addr or "unknown"
-    if not _rate_limit_check(ip):
-        return jsonify({"error": "Rate limited. Please wait."}), 429
-
     data = request.get_json(force=True, silent=True) or {}
+    user_id = data.get("user_id", ip)
+    allowed, retry_after = _rate_limit_check("/chat", ip, user_id)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
     question = data.get("question", data.get("message", "")).strip()
     if not question:
         return jsonify({"error": "No message provided"}), 400
@@ -1665,9 +2157,22 @@ def chat_endpoint():
     if _is_forbidden_input(question):
         return jsonify({"response": "I can't process that request, Sir."}), 200
 
-    user_id = data.get("user_id", ip)
-    result = handle_chat_hybrid(question, user_id)
-    return jsonify(result)
+    with admission.admit("/chat", _queue_delay_ms()) as ticket:
+        if ticket.shed:
+            return _overloaded_response(ticket)
+        cached = _cached_answer("/chat", question, ticket, _answer_scope(user_id))
+        if cached:
+            return jsonify(cached)
+
+        want_trace = _trace_requested()
+        with request_trace("/chat", want_trace) as trace:
+            result = handle_chat_hybrid(question, user_id)
+        answer_caches["/chat"].put(question, dict(result), _answer_scope(user_id))
+        if ticket.level:
+            result["admission"] = ticket.describe()
+        if want_trace and trace:
+            result["trace"] = trace.to_dict()
+        return jsonify(result)
 
 
 @app.route("/history", methods=["GET", "OPTIONS"])
@@ -1780,29 +2285,37 @@ def vision_endpoint():
     if request.method == "OPTIONS":
         return "", 204
 
+    allowed, retry_after = _rate_limit_check("/vision", request.remote_addr or "unknown",
+                                             request.form.get("user_id"))
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
     if "file" not in request.files:
         return jsonify({"error": "No image uploaded"}), 400
 
     file = request.files["file"]
     prompt = request.form.get("prompt", "Analyze this image in detail.")
 
-    try:
-        # FIXED: Use tempfile instead of hardcoded /tmp/ (Windows compatible)
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, f"jarvis_vision_{uuid.uuid4().hex}_{file.filename}")
-        file.save(temp_path)
+    with admission.admit("/vision", _queue_delay_ms()) as ticket:
+        if ticket.shed:
+            return _overloaded_response(ticket)
+        try:
+            # FIXED: Use tempfile instead of hardcoded /tmp/ (Windows compatible)
+            temp_dir = tempfile.gettempdir()
+            temp_path = os.path.join(temp_dir, f"jarvis_vision_{uuid.uuid4().hex}_{file.filename}")
+            file.save(temp_path)
 
-        with open(temp_path, "rb") as f:
-            image_bytes = f.read()
+            with open(temp_path, "rb") as f:
+                image_bytes = f.read()
 
-        os.remove(temp_path)
+            os.remove(temp_path)
 
-        result = process_image_with_gemini(image_bytes, prompt)
-        if result:
-            return jsonify({"response": result, "model": "gemini-1.5-flash"})
-        return jsonify({"error": "Vision processing failed"}), 500
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+            result = process_image_with_gemini(image_bytes, prompt)
+            if result:
+                return jsonify({"response": result, "model": "gemini-1.5-flash"})
+            return jsonify({"error": "Vision processing failed"}), 500
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
 
 @app.route("/health", methods=["GET", "OPTIONS"])
@@ -1857,10 +2370,95 @@ def ops_cache_metrics():
     return jsonify({
         "telemetry": ops_telemetry.stats(),
         "llm_cache_size": len(llm_cache._store),
+        "rate_limiter": rate_limiter.stats(),
+        "admission": admission.stats(),
+        "browser_pool": browser_pool.stats() if browser_pool else None,
+        "url_cache": url_cache.stats(),
         "manifest": manifest_cache.snapshot(),
+        "chat_pipeline": chat_pipeline_stats.stats(),
+        "prompt": prompt_stats.stats(),
+        "context_rank": passage_stats.stats(),
     })
 
 
+@app.route("/ops/slow-traces", methods=["GET", "OPTIONS"])
+def ops_slow_traces():
+    """Slowest recent request traces with per-stage waterfall."""
+    if request.method == "OPTIONS":
+        return "", 204
+    if request.args.get("clear") == "1":
+        slow_traces.clear()
+    limit = request.args.get("limit", TRACE_SLOW_BUFFER_SIZE, type=int)
+    limit = min(max(limit, 1), TRACE_SLOW_BUFFER_SIZE)
+    return jsonify({
+        "tracing_enabled": TRACING_ENABLED,
+        "buffer": slow_traces.stats(),
+        "traces": slow_traces.snapshot(limit),
+    })
+
+
+@app.route("/ops/admission", methods=["GET", "OPTIONS"])
+def ops_admission():
+    """In-flight load, thresholds and shedding decision counts for this worker."""
+    if request.method == "OPTIONS":
+        return "", 204
+    return jsonify({
+        **admission.stats(),
+        "answer_cache_items": {route: len(c) for route, c in answer_caches.items()},
+    })
+
+
+@app.route("/ops/profile", methods=["GET", "OPTIONS"])
+def ops_profile():
+    """Sample this worker's stacks for N seconds; returns flamegraph-ready collapsed stacks.
+
+    ?seconds=N   sampling window (capped at PROFILE_MAX_SECONDS)
+    ?hz=100      sampling frequency
+    ?idle=1      keep threads parked in socket/lock waits
+    ?wait=0      start detached and return 202; fetch later with ?last=1
+    ?format=json JSON envelope instead of text/plain
+    """
+    if request.method == "OPTIONS":
+        return "", 204
+    if not verify_jarvis_security(request):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    as_json = request.args.get("format", "") == "json"
+    if request.args.get("last") == "1":
+        result = profiler.last_result
+        if result is None:
+            return jsonify({"error": "No profile recorded yet", "running": profiler.running}), 404
+    else:
+        try:
+            seconds = float(request.args.get("seconds", "10"))
+            hz = float(request.args.get("hz", str(PROFILE_DEFAULT_HZ)))
+        except ValueError:
+            return jsonify({"error": "seconds and hz must be numbers"}), 400
+        include_idle = request.args.get("idle") == "1"
+        try:
+            if request.args.get("wait", "1") == "0":
+                profiler.start_background(seconds, hz, include_idle)
+                return jsonify({"status": "started", "pid": os.getpid(),
+                                "seconds": min(seconds, PROFILE_MAX_SECONDS)}), 202
+            result = profiler.profile(seconds, hz, include_idle)
+        except ProfilerBusy as e:
+            return jsonify({"error": str(e)}), 409
+
+    if as_json:
+        return jsonify(result)
+    return app.response_class(result["collapsed"] + "\n", mimetype="text/plain")
+
+
+@app.route("/ops/browser-pool", methods=["GET", "OPTIONS"])
+def ops_browser_pool():
+    """Browser pool utilization and page-load latency."""
+    if request.method == "OPTIONS":
+        return "", 204
+    if not browser_pool:
+        return jsonify({"available": False})
+    return jsonify({"available": True, **browser_pool.stats()})
+
+
 @app.route("/ops/reindex-manifest", methods=["POST", "GET", "OPTIONS"])
 def ops_reindex_manifest():
     if request.method == "OPTIONS":
@@ -1,15 +1,41 @@
 const { spawn } = require('child_process');
 const path = require('path');
+const PythonDaemon = require('./python-daemon');
+
+// One resident search process (warm DDGS sessions + result cache) shared by
+// every JARVISLiveSearch; LIVE_SEARCH_DAEMON=0 goes back to a process per search.
+const USE_DAEMON = process.env.LIVE_SEARCH_DAEMON !== '0';
+let sharedDaemon = null;
 
 class JARVISLiveSearch {
   constructor() {
     this.pythonScript = path.join(__dirname, 'jarvis-live-search.py');
+    if (USE_DAEMON && !sharedDaemon) {
+      sharedDaemon = new PythonDaemon(this.pythonScript, { name: 'Live Search', pythonCmd: 'python3' });
+    }
+    this.daemon = USE_DAEMON ? sharedDaemon : null;
   }
 
   /**
-   * Execute Python search script
+   * Run a search in the resident process, or spawn one if it is unavailable
    */
   async runPythonSearch(functionName, query, maxResults = 5) {
+    if (this.daemon) {
+      try {
+        const result = await this.daemon.request(functionName, { query, max_results: maxResults }, 45000);
+        console.log(`✅ Search result status: ${result.status} (${result.total_results || 0} results)`);
+        return result;
+      } catch (error) {
+        console.error(`⚠️ Live search daemon failed (${error.message}), spawning a process instead`);
+      }
+    }
+    return this.spawnPythonSearch(functionName, query, maxResults);
+  }
+
+  /**
+   * Execute Python search script (one process per search)
+   */
+  async spawnPythonSearch(functionName, query, maxResults = 5) {
     return new Promise((resolve, reject) => {
       const pythonProcess = spawn('python3', [
         this.pythonScript,
@@ -144,6 +170,17 @@ class JARVISLiveSearch {
       };
     }
   }
+
+  /**
+   * Result cache and search timing counters from the resident process
+   */
+  async stats() {
+    return this.daemon ? this.daemon.request('stats') : null;
+  }
+
+  stop() {
+    if (this.daemon) this.daemon.stop();
+  }
 }
 
 module.exports = JARVISLiveSearch;
\ No newline at end of file
@@ -4,11 +4,26 @@ except ImportError:
     from duckduckgo_search import DDGS
 import json
 import datetime
+import os
 import sys
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from jarvis_keywords import register, tag_query
 
 # Package info: duckduckgo_search has been renamed to ddgs
 # Install with: pip install ddgs
+#
+# Modes:
+#   python3 jarvis-live-search.py news|web <query> [max_results]   one-shot JSON
+#   python3 jarvis-live-search.py --serve                          resident worker (see serve_stdio)
+
+LIVE_SEARCH_CACHE_TTL = float(os.environ.get('LIVE_SEARCH_CACHE_TTL', '300'))  # seconds
+LIVE_SEARCH_CACHE_SIZE = int(os.environ.get('LIVE_SEARCH_CACHE_SIZE', '512'))
+LIVE_SEARCH_WORKERS = int(os.environ.get('LIVE_SEARCH_WORKERS', '16'))
 
 PREFERRED_SITES = "site:techcrunch.com OR site:theverge.com OR site:reuters.com"
 KEYWORDS = ["ai", "intelligence", "security", "space", "quantum"]
@@ -18,6 +33,8 @@ REGIONAL_KEYWORDS = {
     'tamil_nadu': ['tamil nadu', 'tamilnadu', 'chennai', 'madurai', 'coimbatore', 'trichy'],
     'india': ['india', 'indian', 'delhi', 'mumbai', 'bangalore', 'kolkata', 'hyderabad']
 }
+_REGION_CATEGORIES = {region: register(f"live_search.region.{region}", keywords)
+                      for region, keywords in REGIONAL_KEYWORDS.items()}
 
 INDIAN_NEWS_SITES = [
     "thehindu.com",
@@ -33,12 +50,92 @@ INDIAN_NEWS_SITES = [
 ]
 
 
+# ===== WARM SESSIONS + RESULT CACHE =====
+
+_local = threading.local()
+_search_pool = ThreadPoolExecutor(max_workers=LIVE_SEARCH_WORKERS, thread_name_prefix='ddgs')
+
+
+def _ddgs() -> DDGS:
+    """One DDGS client per thread, reused across searches (keeps its HTTP session warm)."""
+    client = getattr(_local, 'ddgs', None)
+    if client is None:
+        client = _local.ddgs = DDGS()
+    return client
+
+
+class _ResultCache:
+    """TTL + LRU cache of raw DDGS result lists keyed by (mode, region, query, timelimit, max_results)."""
+
+    def __init__(self, ttl: float = LIVE_SEARCH_CACHE_TTL, capacity: int = LIVE_SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'errors': 0, 'search_seconds': 0.0}
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item and time.time() - item[0] < self.ttl:
+                self._items.move_to_end(key)
+                self.counts['hits'] += 1
+                return item[1]
+            self.counts['misses'] += 1
+            return None
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def put(self, key, results):
+        with self._lock:
+            self._items[key] = (time.time(), results)
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.counts)
+            lookups = out['hits'] + out['misses']
+            out['entries'] = len(self._items)
+            out['hit_ratio'] = round(out['hits'] / lookups, 4) if lookups else 0.0
+            out['search_seconds'] = round(out['search_seconds'], 2)
+            return out
+
+
+result_cache = _ResultCache()
+
+
+def _search(mode: str, query: str, region: str, timelimit: str, max_results: int) -> list:
+    """ddgs.news / ddgs.text through the result cache. Errors are raised, not cached."""
+    key = (mode, region, query, timelimit, max_results)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return list(cached)
+    t0 = time.perf_counter()
+    try:
+        client = _ddgs()
+        search = client.news if mode == 'news' else client.text
+        results = list(search(query, region=region, safesearch="off", timelimit=timelimit,
+                              max_results=max_results))
+    except Exception:
+        result_cache.count('errors')
+        _local.ddgs = None  # a broken session is rebuilt on the next call
+        raise
+    finally:
+        result_cache.count('search_seconds', time.perf_counter() - t0)
+    result_cache.put(key, results)
+    return list(results)
+
+
 def _detect_regional_query(query: str) -> dict:
     """Detect if query is asking for regional news"""
-    query_lower = query.lower()
+    tags = tag_query(query)
     
     # Check for Tamil Nadu/Chennai specific queries
-    if any(kw in query_lower for kw in REGIONAL_KEYWORDS['tamil_nadu']):
+    if _REGION_CATEGORIES['tamil_nadu'] in tags:
         return {
             'is_regional': True,
             'region': 'tamil_nadu',
@@ -48,7 +145,7 @@ def _detect_regional_query(query: str) -> dict:
         }
     
     # Check for general Indian queries
-    if any(kw in query_lower for kw in REGIONAL_KEYWORDS['india']):
+    if _REGION_CATEGORIES['india'] in tags:
         return {
             'is_regional': True,
             'region': 'india',
@@ -106,124 +203,120 @@ def jarvis_live_search(query, max_results=5):
     regional_info = _detect_regional_query(query)
     
     try:
-        with DDGS() as ddgs:
-            # Set region based on query
-            search_region = regional_info.get('search_region', 'us-en') if regional_info.get('is_regional') else 'us-en'
+        # Set region based on query
+        search_region = regional_info.get('search_region', 'us-en') if regional_info.get('is_regional') else 'us-en'
+        
+        search_query = _augment_query(query, regional_info)
+        print(f"DEBUG: Using search query: {search_query}", file=sys.stderr)
+        print(f"DEBUG: Search region: {search_region}", file=sys.stderr)
+        
+        # Regional queries start the broader fallback search at the same time
+        # instead of waiting for the first one to come back empty
+        broader = None
+        if regional_info.get('is_regional'):
+            region_name = regional_info.get('region_name', 'the region')
+            broader_query = f"{region_name} latest news government announcements updates"
+            broader = _search_pool.submit(_search, 'news', broader_query, search_region, "w",  # Last week
+                                          max_results * 2)
+        
+        # Get news results with timelimit for recent news (last 24 hours)
+        try:
+            results = _search('news', search_query, search_region, "d",  # Last day (24 hours)
+                              max_results * 3)
+            print(f"DEBUG: Got {len(results)} news results", file=sys.stderr)
+        except Exception as search_err:
+            print(f"ERROR: News search failed: {str(search_err)}", file=sys.stderr)
+            results = []
+        
+        # Filter and prioritize results
+        filtered = _filter_results(results, regional_info)
+        results = (filtered if filtered else results)[:max_results]
+        print(f"DEBUG: After filtering: {len(results)} results", file=sys.stderr)
+
+        # If regional query and no results, try broader search
+        if regional_info.get('is_regional') and not results:
+            region_name = regional_info.get('region_name', 'the region')
+            print(f"JARVIS: No recent local news found. Searching for {region_name} updates...", file=sys.stderr)
             
-            search_query = _augment_query(query, regional_info)
-            print(f"DEBUG: Using search query: {search_query}", file=sys.stderr)
-            print(f"DEBUG: Search region: {search_region}", file=sys.stderr)
+            # Broader search (already running)
+            print(f"DEBUG: Using broader search: '{broader_query}'", file=sys.stderr)
             
-            # Get news results with timelimit for recent news (last 24 hours)
             try:
-                results = list(ddgs.news(
-                    search_query, 
-                    region=search_region,
-                    safesearch="off",
-                    timelimit="d",  # Last day (24 hours)
-                    max_results=max_results * 3
-                ))
-                print(f"DEBUG: Got {len(results)} news results", file=sys.stderr)
-            except Exception as search_err:
-                print(f"ERROR: News search failed: {str(search_err)}", file=sys.stderr)
+                results = broader.result()
+                print(f"DEBUG: Broader search got {len(results)} results", file=sys.stderr)
+            except Exception as broader_err:
+                print(f"ERROR: Broader search failed: {str(broader_err)}", file=sys.stderr)
                 results = []
             
-            # Filter and prioritize results
+            # Filter again with regional preference
             filtered = _filter_results(results, regional_info)
             results = (filtered if filtered else results)[:max_results]
-            print(f"DEBUG: After filtering: {len(results)} results", file=sys.stderr)
-
-            # If regional query and no results, try broader search
-            if regional_info.get('is_regional') and not results:
-                region_name = regional_info.get('region_name', 'the region')
-                print(f"JARVIS: No recent local news found. Searching for {region_name} updates...", file=sys.stderr)
-                
-                # Try a broader search
-                broader_query = f"{region_name} latest news government announcements updates"
-                print(f"DEBUG: Trying broader search: '{broader_query}'", file=sys.stderr)
-                
-                try:
-                    results = list(ddgs.news(
-                        broader_query,
-                        region=search_region,
-                        safesearch="off",
-                        timelimit="w",  # Last week for broader search
-                        max_results=max_results * 2
-                    ))
-                    print(f"DEBUG: Broader search got {len(results)} results", file=sys.stderr)
-                except Exception as broader_err:
-                    print(f"ERROR: Broader search failed: {str(broader_err)}", file=sys.stderr)
-                    results = []
-                
-                # Filter again with regional preference
-                filtered = _filter_results(results, regional_info)
-                results = (filtered if filtered else results)[:max_results]
-                
-                if not results:
-                    return {
-                        "status": "no_results",
-                        "message": f"Searching for local {region_name} updates... No recent specific news found. Try checking local news websites directly.",
-                        "query": query,
-                        "region": region_name,
-                        "timestamp": datetime.datetime.now().isoformat(),
-                        "suggestion": f"Try visiting: {', '.join(regional_info['sites'][:3])}"
-                    }
-
+            
             if not results:
                 return {
                     "status": "no_results",
-                    "message": "No recent news found for your query.",
+                    "message": f"Searching for local {region_name} updates... No recent specific news found. Try checking local news websites directly.",
                     "query": query,
-                    "timestamp": datetime.datetime.now().isoformat()
+                    "region": region_name,
+                    "timestamp": datetime.datetime.now().isoformat(),
+                    "suggestion": f"Try visiting: {', '.join(regional_info['sites'][:3])}"
                 }
 
-            # Format the results
-            formatted_results = []
-            for i, res in enumerate(results):
-                formatted_results.append({
-                    "id": i + 1,
-                    "title": res.get('title', 'No title'),
-                    "source": res.get('source', 'Unknown source'),
-                    "url": res.get('url', ''),
-                    "date": res.get('date', ''),
-                    "body": res.get('body', '')[:200] + '...' if res.get('body') else ''
-                })
-
-            formatted_news = ""
-            
-            # Add regional context header if applicable
-            if regional_info.get('is_regional'):
-                region_name = regional_info.get('region_name', 'Regional')
-                formatted_news += f"🌍 {region_name} News (Last 24 hours)\n\n"
-            
-            for res in formatted_results:
-                formatted_news += f"{res['id']}. {res['title']}\n"
-                formatted_news += f"Source: {res['source']}\n"
-                if res['date']:
-                    formatted_news += f"Date: {res['date']}\n"
-                formatted_news += f"Link: {res['url']}\n"
-                if res['body']:
-                    formatted_news += f"Summary: {res['body']}\n"
-                formatted_news += "\n"
-
+        if not results:
             return {
-                "status": "success",
+                "status": "no_results",
+                "message": "No recent news found for your query.",
                 "query": query,
-                "region": regional_info.get('region_name') if regional_info.get('is_regional') else None,
-                "total_results": len(formatted_results),
-                "results": formatted_results,
-                "formatted_text": formatted_news.strip(),
-                "timestamp": datetime.datetime.now().isoformat(),
-                "search_info": {
-                    "timeframe": "Last 24 hours",
-                    "region": search_region,
-                    "is_regional_search": regional_info.get('is_regional', False)
-                }
+                "timestamp": datetime.datetime.now().isoformat()
             }
 
+        # Format the results
+        formatted_results = []
+        for i, res in enumerate(results):
+            formatted_results.append({
+                "id": i + 1,
+                "title": res.get('title', 'No title'),
+                "source": res.get('source', 'Unknown source'),
+                "url": res.get('url', ''),
+                "date": res.get('date', ''),
+                "body": res.get('body', '')[:200] + '...' if res.get('body') else ''
+            })
+
+        formatted_news = ""
+        
+        # Add regional context header if applicable
+        if regional_info.get('is_regional'):
+            region_name = regional_info.get('region_name', 'Regional')
+            formatted_news += f"🌍 {region_name} News (Last 24 hours)\n\n"
+        
+        for res in formatted_results:
+            formatted_news += f"{res['id']}. {res['title']}\n"
+            formatted_news += f"Source: {res['source']}\n"
+            if res['date']:
+                formatted_news += f"Date: {res['date']}\n"
+            formatted_news += f"Link: {res['url']}\n"
+            if res['body']:
+                formatted_news += f"Summary: {res['body']}\n"
+            formatted_news += "\n"
+
+        return {
+            "status": "success",
+            "query": query,
+            "region": regional_info.get('region_name') if regional_info.get('is_regional') else None,
+            "total_results": len(formatted_results),
+            "results": formatted_results,
+            "formatted_text": formatted_news.strip(),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "search_info": {
+                "timeframe": "Last 24 hours",
+                "region": search_region,
+                "is_regional_search": regional_info.get('is_regional', False)
+            }
+        }
+
     except Exception as e:
         error_msg = f"Error searching internet: {str(e)}"
-        print(f"ERROR: {error_msg}")
+        print(f"ERROR: {error_msg}", file=sys.stderr)
         return {
             "status": "error",
             "message": error_msg,
@@ -235,76 +328,70 @@ def jarvis_web_search(query, max_results=10):
     """
     General web search (not just news) with regional awareness
     """
-    print(f"JARVIS: Performing general web search for '{query}'...")
+    print(f"JARVIS: Performing general web search for '{query}'...", file=sys.stderr)
 
     # Detect if this is a regional query
     regional_info = _detect_regional_query(query)
 
     try:
-        with DDGS() as ddgs:
-            # Set region based on query
-            search_region = regional_info.get('search_region', 'us-en') if regional_info.get('is_regional') else 'us-en'
-            
-            search_query = _augment_query(query, regional_info)
-            results = [r for r in ddgs.text(
-                search_query,
-                region=search_region,
-                safesearch="off",
-                timelimit="m",  # Last month
-                max_results=max_results * 2
-            )]
-            
-            filtered = _filter_results(results, regional_info)
-            results = (filtered if filtered else results)[:max_results]
+        # Set region based on query
+        search_region = regional_info.get('search_region', 'us-en') if regional_info.get('is_regional') else 'us-en'
+        
+        search_query = _augment_query(query, regional_info)
+        results = _search('web', search_query, search_region, "m",  # Last month
+                          max_results * 2)
+        
+        filtered = _filter_results(results, regional_info)
+        results = (filtered if filtered else results)[:max_results]
 
-            if not results:
-                return {
-                    "status": "no_results",
-                    "message": "No search results found.",
-                    "query": query,
-                    "timestamp": datetime.datetime.now().isoformat()
-                }
+        if not results:
+            return {
+                "status": "no_results",
+                "message": "No search results found.",
+                "query": query,
+                "timestamp": datetime.datetime.now().isoformat()
+            }
 
-            formatted_results = []
-            for i, res in enumerate(results):
-                formatted_results.append({
-                    "id": i + 1,
-                    "title": res.get('title', 'No title'),
-                    "url": res.get('href', ''),
-                    "body": res.get('body', '')[:300] + '...' if res.get('body') else ''
-                })
+        formatted_results = []
+        for i, res in enumerate(results):
+            formatted_results.append({
+                "id": i + 1,
+                "title": res.get('title', 'No title'),
+                "url": res.get('href', ''),
+                "body": res.get('body', '')[:300] + '...' if res.get('body') else ''
+            })
 
-            formatted_text = ""
-            
-            # Add regional context header if applicable
-            if regional_info.get('is_regional'):
-                region_name = regional_info.get('region_name', 'Regional')
-                formatted_text += f"🌍 {region_name} Search Results\n\n"
-            
-            for res in formatted_results:
-                formatted_text += f"{res['id']}. {res['title']}\n"
-                formatted_text += f"URL: {res['url']}\n"
-                if res['body']:
-                    formatted_text += f"Summary: {res['body']}\n"
-                formatted_text += "\n"
+        formatted_text = ""
+        
+        # Add regional context header if applicable
+        if regional_info.get('is_regional'):
+            region_name = regional_info.get('region_name', 'Regional')
+            formatted_text += f"🌍 {region_name} Search Results\n\n"
+        
+        for res in formatted_results:
+            formatted_text += f"{res['id']}. {res['title']}\n"
+            formatted_text += f"URL: {res['url']}\n"
+            if res['body']:
+                formatted_text += f"Summary: {res['body']}\n"
+            formatted_text += "\n"
 
-            return {
-                "status": "success",
-                "query": query,
-                "region": regional_info.get('region_name') if regional_info.get('is_regional') else None,
-                "total_results": len(formatted_results),
-                "results": formatted_results,
-                "formatted_text": formatted_text.strip(),
-                "timestamp": datetime.datetime.now().isoformat(),
-                "search_info": {
-                    "region": search_region,
-                    "is_regional_search": regional_info.get('is_regional', False)
-                }
+        return {
+            "status": "success",
+            "query": query,
+            "region": regional_info.get('region_name') if regional_info.get('is_regional') else None,
+            "total_results": len(formatted_results),
+            "results": formatted_results,
+            "formatted_text": formatted_text.strip(),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "search_info": {
+                "region": search_region,
+                "is_regional_search": regional_info.get('is_regional', False)
             }
+        }
 
     except Exception as e:
         error_msg = f"Error performing web search: {str(e)}"
-        print(f"ERROR: {error_msg}")
+        print(f"ERROR: {error_msg}", file=sys.stderr)
         return {
             "status": "error",
             "message": error_msg,
@@ -312,11 +399,63 @@ def jarvis_web_search(query, max_results=10):
             "timestamp": datetime.datetime.now().isoformat()
         }
 
+# ===== RESIDENT MODE =====
+
+def handle_request(request: dict):
+    op = request.get("op")
+    if op == "news":
+        return jarvis_live_search(request["query"], int(request.get("max_results", 5)))
+    if op == "web":
+        return jarvis_web_search(request["query"], int(request.get("max_results", 10)))
+    if op == "ping":
+        return "pong"
+    if op == "stats":
+        return result_cache.stats()
+    raise ValueError(f"unknown op: {op}")
+
+
+def serve_stdio():
+    """
+    Line-delimited JSON over stdin/stdout (protocol in python-daemon.js).
+    Requests are answered concurrently, so replies may arrive out of order.
+    """
+    write_lock = threading.Lock()
+
+    def reply(message: dict):
+        with write_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def run(request: dict):
+        try:
+            reply({"id": request.get("id"), "ok": True, "result": handle_request(request)})
+        except Exception as e:
+            reply({"id": request.get("id"), "ok": False, "error": str(e)})
+
+    reply({"id": None, "ok": True, "result": "ready"})
+    print(f"JARVIS: Live search serving on stdio ({LIVE_SEARCH_WORKERS} workers)", file=sys.stderr)
+    # Separate pool from _search_pool so a full set of requests waiting on
+    # their broader fallback can never starve it
+    with ThreadPoolExecutor(max_workers=LIVE_SEARCH_WORKERS, thread_name_prefix='live-search') as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply({"id": None, "ok": False, "error": f"bad request: {e}"})
+                continue
+            pool.submit(run, request)
+
+
 # Test functions
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve_stdio()
+    elif len(sys.argv) > 1:
         # Command line mode for Node.js integration
         function_name = sys.argv[1]
         query = sys.argv[2] if len(sys.argv) > 2 else "AI news"
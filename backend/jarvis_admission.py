@@ -0,0 +1,231 @@
+"""
+JARVIS Admission Control — graceful degradation before hard shedding
+
+Every heavy request (/ask, /chat, /vision) passes through admit(). The
+controller looks at two pressure signals:
+
+  in-flight   requests currently inside this worker
+  queue delay time the request waited before reaching Python, read from the
+              X-Request-Start / X-Queue-Start header set by the proxy
+
+and picks a level:
+
+  0  normal
+  1  skip optional knowledge-fusion sources and TTS
+  2  also skip Gemini context analysis and serve near-duplicate cached answers
+  3  shed — caller returns 503 with Retry-After
+
+The active level's degradations are published through a ContextVar so code
+deep in the pipeline can ask `degraded("tts")` without extra arguments.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import FrozenSet, Hashable, Optional, Tuple
+
+LEVEL_DEGRADATIONS = {
+    0: frozenset(),
+    1: frozenset({"fusion_optional", "tts"}),
+    2: frozenset({"fusion_optional", "tts", "context_analysis", "answer_cache"}),
+}
+SHED_LEVEL = 3
+
+_active: contextvars.ContextVar = contextvars.ContextVar("jarvis_degradations", default=frozenset())
+
+
+def degraded(feature: str) -> bool:
+    """True when the current request should skip `feature`."""
+    return feature in _active.get()
+
+
+def parse_queue_start(header: str, now: Optional[float] = None) -> float:
+    """Queue delay in ms from an X-Request-Start style header ("t=<ts>" or bare).
+
+    Accepts seconds (nginx ${msec}), milliseconds (Heroku) or microseconds.
+    Returns 0.0 when the header is absent or nonsensical.
+    """
+    if not header:
+        return 0.0
+    raw = header.strip()
+    if raw.startswith("t="):
+        raw = raw[2:]
+    try:
+        value = float(raw)
+    except ValueError:
+        return 0.0
+    now = time.time() if now is None else now
+    if value > 1e14:      # microseconds
+        value /= 1e6
+    elif value > 1e11:    # milliseconds
+        value /= 1e3
+    delay = (now - value) * 1000
+    return delay if 0 <= delay < 3_600_000 else 0.0
+
+
+class Ticket:
+    """An admission decision; use as a context manager around the request body."""
+
+    __slots__ = ("controller", "route", "level", "in_flight", "queue_ms", "_token", "_entered")
+
+    def __init__(self, controller: "AdmissionController", route: str, level: int,
+                 in_flight: int, queue_ms: float):
+        self.controller = controller
+        self.route = route
+        self.level = level
+        self.in_flight = in_flight
+        self.queue_ms = queue_ms
+        self._token = None
+        self._entered = False
+
+    @property
+    def shed(self) -> bool:
+        return self.level >= SHED_LEVEL
+
+    @property
+    def degradations(self) -> FrozenSet[str]:
+        return LEVEL_DEGRADATIONS.get(self.level, frozenset())
+
+    def __enter__(self) -> "Ticket":
+        if not self.shed:
+            self._token = _active.set(self.degradations)
+            self._entered = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._entered:
+            _active.reset(self._token)
+            self.controller._release()
+        return False
+
+    def describe(self) -> dict:
+        return {
+            "level": self.level,
+            "in_flight": self.in_flight,
+            "queue_ms": round(self.queue_ms, 1),
+            "skipped": sorted(self.degradations),
+        }
+
+
+class AdmissionController:
+    """Per-worker in-flight accounting with threshold-based levels."""
+
+    def __init__(self, inflight_thresholds: Tuple[int, int, int] = (4, 8, 16),
+                 queue_thresholds_ms: Tuple[float, float, float] = (500.0, 2000.0, 8000.0),
+                 retry_after: float = 5.0):
+        self.inflight_thresholds = inflight_thresholds
+        self.queue_thresholds_ms = queue_thresholds_ms
+        self.retry_after = retry_after
+        self._in_flight = 0
+        self._peak = 0
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def _level_for(self, in_flight: int, queue_ms: float) -> int:
+        level = 0
+        for i, (n, q) in enumerate(zip(self.inflight_thresholds, self.queue_thresholds_ms), start=1):
+            if in_flight >= n or queue_ms >= q:
+                level = i
+        return level
+
+    def admit(self, route: str, queue_ms: float = 0.0) -> Ticket:
+        """Decide for one request. The returned ticket must be used with `with`."""
+        with self._lock:
+            # Count ourselves: the request being decided is already in the worker.
+            level = self._level_for(self._in_flight + 1, queue_ms)
+            if level < SHED_LEVEL:
+                self._in_flight += 1
+                self._peak = max(self._peak, self._in_flight)
+            in_flight = self._in_flight
+            self._counts[f"{route}:{'shed' if level >= SHED_LEVEL else f'level{level}'}"] += 1
+        return Ticket(self, route, level, in_flight, queue_ms)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def record(self, route: str, event: str):
+        """Count a degradation actually applied (e.g. a cached answer served)."""
+        with self._lock:
+            self._counts[f"{route}:{event}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak,
+                "inflight_thresholds": list(self.inflight_thresholds),
+                "queue_thresholds_ms": list(self.queue_thresholds_ms),
+                "retry_after_s": self.retry_after,
+                "decisions": dict(self._counts),
+            }
+
+
+# ═══════════════════════════════════════════
+# Near-duplicate answer cache
+# ═══════════════════════════════════════════
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(question: str) -> Tuple[str, FrozenSet[str]]:
+    words = _WORD_RE.findall(question.lower())
+    return " ".join(words), frozenset(words)
+
+
+class RecentAnswerCache:
+    """Bounded LRU of recent answers, matched exactly or by word-set Jaccard.
+
+    Only consulted under load, so a linear scan over a few hundred entries is
+    an acceptable price for catching "what is ai" vs "what is AI?" repeats.
+    Answers built from per-user memory/history must not cross users, so every
+    entry carries a scope (user, model, ...) and only matches within it.
+    """
+
+    def __init__(self, max_items: int = 500, ttl: float = 900.0, min_similarity: float = 0.8):
+        self._items: "OrderedDict[Tuple[Hashable, str], Tuple[float, FrozenSet[str], dict]]" = OrderedDict()
+        self._max = max_items
+        self._ttl = ttl
+        self._min_similarity = min_similarity
+        self._lock = threading.Lock()
+
+    def put(self, question: str, result: dict, scope: Hashable = ()):
+        key, words = _normalize(question)
+        if not key:
+            return
+        with self._lock:
+            self._items[(scope, key)] = (time.time(), words, result)
+            self._items.move_to_end((scope, key))
+            while len(self._items) > self._max:
+                self._items.popitem(last=False)
+
+    def get(self, question: str, scope: Hashable = ()) -> Optional[Tuple[dict, float]]:
+        """Returns (result, similarity) for the closest fresh match in `scope`, if any."""
+        key, words = _normalize(question)
+        if not key:
+            return None
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            hit = self._items.get((scope, key))
+            if hit and hit[0] >= cutoff:
+                return hit[2], 1.0
+            best, best_sim = None, 0.0
+            for (other_scope, _), (ts, other, result) in self._items.items():
+                if other_scope != scope or ts < cutoff or not other:
+                    continue
+                inter = len(words & other)
+                if not inter:
+                    continue
+                sim = inter / len(words | other)
+                if sim > best_sim:
+                    best, best_sim = result, sim
+        if best is not None and best_sim >= self._min_similarity:
+            return best, best_sim
+        return None
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,695 @@
+"""
+JARVIS ASGI Server — async serving mode for app.py
+
+Under gunicorn's sync workers every /ask or /chat pins a worker for the whole
+Tavily → books/papers → Groq round-trip, so a worker serves one request per
+upstream latency. This module serves the three heavy routes (/ask, /chat,
+/vision) from coroutines instead: upstream HTTP calls share one pooled
+httpx.AsyncClient on the worker's event loop, knowledge-fusion sources are
+fetched concurrently, Gemini uses generate_content_async and Edge TTS is
+awaited directly. Blocking pieces that are cheap or local (SQLite, Redis,
+the HuggingFace fallback, Gemini tool calling) run in the default thread pool.
+
+Everything else — /health, /history, /ops/*, /api/* — is the unchanged Flask
+app mounted behind a WSGI adapter, so routes and JSON contracts are identical
+between the two modes. Rate limiting, admission control, tracing and the
+answer caches are the same objects app.py uses.
+
+Run:
+    uvicorn jarvis_asgi:app --host 0.0.0.0 --port $PORT --workers 2
+
+Admission thresholds count in-flight coroutines here, not threads, so the
+ASGI defaults are much higher (ASGI_ADMISSION_INFLIGHT_THRESHOLDS).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import app as core
+from jarvis_admission import AdmissionController, degraded, parse_queue_start
+from jarvis_tracing import span
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+# ═══════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════
+
+ASGI_MAX_CONNECTIONS = int(os.environ.get("ASGI_MAX_CONNECTIONS", "200"))
+ASGI_MAX_KEEPALIVE = int(os.environ.get("ASGI_MAX_KEEPALIVE", "50"))
+ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "10"))
+ASGI_ADMISSION_INFLIGHT_THRESHOLDS = tuple(
+    int(x) for x in os.environ.get("ASGI_ADMISSION_INFLIGHT_THRESHOLDS", "64,128,256").split(",")
+)
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+# One controller per worker process. Installed on app.py too so the mounted
+# /ops/admission and /ops/cache-metrics report what this server is doing.
+admission = AdmissionController(
+    ASGI_ADMISSION_INFLIGHT_THRESHOLDS, core.ADMISSION_QUEUE_MS_THRESHOLDS, core.ADMISSION_RETRY_AFTER_SECONDS
+)
+core.admission = admission
+
+
+# ═══════════════════════════════════════════
+# SHARED UPSTREAM CLIENT
+# ═══════════════════════════════════════════
+
+class Upstream:
+    """The worker's pooled AsyncClient plus fire-and-forget task tracking."""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._background: set = set()
+
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=ASGI_MAX_CONNECTIONS,
+                                    max_keepalive_connections=ASGI_MAX_KEEPALIVE),
+                transport=transport,
+            )
+
+    async def close(self):
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def spawn(self, coro):
+        """Run coro after the response without losing the task to the GC."""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+upstream = Upstream()
+
+
+async def _get(spec: dict, timeout: float = 10) -> httpx.Response:
+    return await upstream.client.get(spec["url"], params=spec.get("params"), timeout=timeout)
+
+
+# ═══════════════════════════════════════════
+# WEB RESEARCH + KNOWLEDGE FUSION
+# ═══════════════════════════════════════════
+
+async def get_web_research(question: str) -> str:
+    """Tavily REST search (same key rotation and formatting as app.py)."""
+    if not core.TAVILY_API_KEYS:
+        return ""
+    with span("tavily.search"):
+        try:
+            resp = await upstream.client.post(TAVILY_SEARCH_URL, json={
+                "api_key": random.choice(core.TAVILY_API_KEYS),
+                "query": core.rewrite_with_date(question),
+                "search_depth": "advanced",
+                "max_results": 3,
+            })
+            resp.raise_for_status()
+            return core._format_tavily_results(resp.json())
+        except Exception as e:
+            print(f"⚠️ Tavily search error: {e}")
+            return ""
+
+
+async def search_sonar_api(question: str) -> str:
+    if not core.SONAR_API_KEY:
+        return ""
+    with span("sonar.search"):
+        try:
+            req = core._sonar_request(question)
+            resp = await upstream.client.post(req["url"], headers=req["headers"], json=req["json"], timeout=15)
+            return core._parse_sonar(resp.json())
+        except Exception as e:
+            print(f"⚠️ Sonar error: {e}")
+            return ""
+
+
+async def _fetch_source(name: str, spec: dict, parse, as_text: bool = False) -> str:
+    with span(name):
+        try:
+            resp = await _get(spec)
+            return parse(resp.text if as_text else resp.json())
+        except Exception:
+            return ""
+
+
+async def search_google_books(query: str) -> str:
+    if not core.GOOGLE_BOOKS_API_KEY:
+        return ""
+    return await _fetch_source("books.google", core._google_books_request(query), core._parse_google_books)
+
+
+async def search_open_library(query: str) -> str:
+    return await _fetch_source("books.open_library", core._open_library_request(query), core._parse_open_library)
+
+
+async def search_gutenberg(query: str) -> str:
+    return await _fetch_source("books.gutenberg", core._gutenberg_request(query), core._parse_gutenberg)
+
+
+async def search_arxiv(query: str) -> str:
+    return await _fetch_source("papers.arxiv", core._arxiv_request(query), core._parse_arxiv, as_text=True)
+
+
+async def search_semantic_scholar(query: str) -> str:
+    return await _fetch_source("papers.semantic_scholar", core._semantic_scholar_request(query),
+                               core._parse_semantic_scholar)
+
+
+_FETCHERS = {
+    "web": get_web_research,
+    "books": search_google_books,
+    "olib": search_open_library,
+    "arxiv": search_arxiv,
+    "scholar": search_semantic_scholar,
+    "gutenberg": search_gutenberg,
+}
+
+
+async def jarvis_knowledge_fusion(question: str) -> str:
+    """Same sources as app.jarvis_knowledge_fusion, fetched concurrently."""
+    with span("fusion"):
+        keys = core._fusion_sources(question)
+        texts = await asyncio.gather(*(_FETCHERS[k](question) for k in keys))
+        return core._assemble_knowledge(question, dict(zip(keys, texts)))
+
+
+async def get_enhanced_web_research(question: str) -> str:
+    """Tavily → Sonar fallback chain."""
+    with span("web.enhanced"):
+        web = await get_web_research(question)
+        return await _enhance_web_result(question, web)
+
+
+async def _enhance_web_result(question: str, web: str) -> str:
+    if web and len(web) > 100:
+        return core.rank_context(question, {"web": web}) if core.CONTEXT_RANKING else web
+    sonar = await search_sonar_api(question)
+    if sonar and core.CONTEXT_RANKING:
+        return core.rank_context(question, {"sonar": sonar})
+    return sonar
+
+
+# ═══════════════════════════════════════════
+# LLM FALLBACK CHAIN
+# ═══════════════════════════════════════════
+
+async def _gemini_generate(contents) -> Optional[str]:
+    model = core._gemini_flash_model()
+    generate_async = getattr(model, "generate_content_async", None)
+    if generate_async is not None:
+        response = await generate_async(contents)
+    else:
+        response = await asyncio.to_thread(model.generate_content, contents)
+    return response.text if response and response.text else None
+
+
+async def call_groq_with_model(question: str, system_prompt: str, model_key: str = "general",
+                               history: list = None) -> Optional[str]:
+    if not core.GROQ_API_KEY:
+        return None
+    req = core._groq_request(question, system_prompt, model_key, history)
+    model = req["json"]["model"]
+    try:
+        with span("llm.groq", model=model):
+            resp = await upstream.client.post(req["url"], headers=req["headers"], json=req["json"])
+            resp.raise_for_status()
+            return resp.json()["choices"][0]["message"]["content"]
+    except Exception as e:
+        print(f"⚠️ Groq ({model}) error: {e}")
+        return None
+
+
+async def call_gemini_text(question: str, system_prompt: str = "") -> Optional[str]:
+    if not core.GEMINI_AVAILABLE or not core.GEMINI_API_KEY:
+        return None
+    with span("llm.gemini"):
+        try:
+            prompt = f"{system_prompt}\n\nUser: {question}" if system_prompt else question
+            return await _gemini_generate(prompt)
+        except Exception as e:
+            print(f"⚠️ Gemini text error: {e}")
+            return None
+
+
+async def call_llm_with_fallback(question: str, system_prompt: str, model_key: str = "general",
+                                 history: list = None) -> str:
+    """Groq → Gemini → HuggingFace → Cache → Fallback message."""
+    with span("llm.cache_lookup") as s:
+        cached = core.llm_cache.get(question, system_prompt, model_key)
+        s.set(hit=bool(cached))
+    if cached:
+        return cached
+
+    for caller in (
+        lambda: call_groq_with_model(question, system_prompt, model_key, history),
+        lambda: call_gemini_text(question, system_prompt),
+        lambda: asyncio.to_thread(core.call_huggingface_api, question, system_prompt),
+    ):
+        result = await caller()
+        if result and len(result.strip()) > 10:
+            core.llm_cache.put(question, result, system_prompt, model_key)
+            return result
+
+    return core.FALLBACK_MESSAGE
+
+
+# ═══════════════════════════════════════════
+# CONTEXT, TTS, VISION, PERSISTENCE
+# ═══════════════════════════════════════════
+
+async def analyze_user_context(question: str) -> dict:
+    if not core.GEMINI_AVAILABLE or not core.GEMINI_API_KEY:
+        return dict(core.DEFAULT_USER_CONTEXT)
+    with span("context.analyze"):
+        try:
+            text = await _gemini_generate(core._context_prompt(question))
+            return core._parse_context(text or "")
+        except Exception:
+            return dict(core.DEFAULT_USER_CONTEXT)
+
+
+async def generate_tts_audio(text: str, voice: str = None) -> Optional[str]:
+    if not core.EDGE_TTS_AVAILABLE:
+        return None
+    voice = voice or core.VOICE_NAME
+    filename = hashlib.md5(f"{text}{voice}".encode()).hexdigest() + ".mp3"
+    filepath = os.path.join(core.VOICE_DIR, filename)
+    if os.path.exists(filepath):
+        return filepath
+    with span("tts.edge"):
+        try:
+            await core.edge_tts.Communicate(text[:500], voice).save(filepath)
+            return filepath
+        except Exception as e:
+            print(f"⚠️ TTS error: {e}")
+            return None
+
+
+async def process_image_with_gemini(image_bytes: bytes, prompt: str) -> Optional[str]:
+    if not core.GEMINI_AVAILABLE or not core.GEMINI_API_KEY:
+        return None
+    with span("vision.gemini"):
+        try:
+            return await _gemini_generate([prompt, {"mime_type": "image/jpeg", "data": image_bytes}])
+        except Exception as e:
+            print(f"⚠️ Vision error: {e}")
+            return None
+
+
+async def sync_chat_to_firebase(user_id: str, question: str, response: str, intent: str = ""):
+    if not core.firebase_db:
+        return
+    try:
+        resp = await upstream.client.post(core.firebase_db._url(f"chats/{user_id}"),
+                                          json=core._firebase_chat_record(question, response, intent),
+                                          timeout=10)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"⚠️ RTDB POST chats/{user_id}: {e}")
+
+
+# ═══════════════════════════════════════════
+# ORCHESTRATORS (async twins of app.py § 23)
+# ═══════════════════════════════════════════
+
+async def handle_query_with_moe(question: str, model_override: str = None, user_id: str = "default") -> dict:
+    start_time = time.time()
+
+    with span("route.intent") as s:
+        intent = model_override or core.analyze_intent(question)
+        model_key = intent if intent in core.GROQ_MODELS else "general"
+        s.set(intent=intent)
+
+    # Retrieval and the Redis memory read don't depend on each other
+    with span("retrieval"):
+        knowledge, memory = await asyncio.gather(
+            jarvis_knowledge_fusion(question),
+            asyncio.to_thread(core.get_user_memory, user_id),
+        )
+        web_data = knowledge if knowledge else await get_enhanced_web_research(question)
+
+    with span("prompt.build"):
+        system_prompt, history = core.fit_prompt(model_key, core.build_system_prompt, question, web_data,
+                                                 memory, core.chat_memory.get(user_id))
+
+    with span("generate"):
+        raw_response = await call_llm_with_fallback(question, system_prompt, model_key, history)
+        response = core.sanitize_response(raw_response)
+        response = core.format_response_with_citations(response, web_data)
+
+    with span("persist"):
+        await asyncio.to_thread(core.persist_exchange, user_id, question, response, intent, "", True)
+
+    upstream.spawn(sync_chat_to_firebase(user_id, question, response, intent))
+
+    elapsed = round((time.time() - start_time) * 1000, 1)
+    core.ops_telemetry.record(elapsed)
+
+    return {
+        "response": response,
+        "model_used": core.GROQ_MODELS.get(model_key, "unknown"),
+        "intent": intent,
+        "has_web_data": bool(web_data),
+        "latency_ms": elapsed,
+    }
+
+
+class SpeculativeRetrieval:
+    """Async twin of app.SpeculativeRetrieval: tasks instead of pool futures."""
+
+    def __init__(self, question: str):
+        self.question = question
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.used = False
+
+    def prefetch(self, intent_guess: str):
+        if intent_guess in ("CODING", "SOCIAL"):
+            return
+        self._start("web")
+        if intent_guess in ("SEARCH", "MEMORY"):
+            for key in core._fusion_sources(self.question):
+                self._start(key)
+
+    def _start(self, key: str):
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(_FETCHERS[key](self.question))
+
+    async def _get(self, key: str) -> str:
+        self._start(key)
+        self.used = True
+        try:
+            return await self.tasks[key]
+        except Exception as e:
+            print(f"⚠️ Retrieval '{key}' failed: {e}")
+            return ""
+
+    async def knowledge(self) -> str:
+        keys = core._fusion_sources(self.question)
+        texts = await asyncio.gather(*(self._get(k) for k in keys))
+        knowledge = core._assemble_knowledge(self.question, dict(zip(keys, texts)))
+        return knowledge if knowledge else await self.web_research()
+
+    async def web_research(self) -> str:
+        return await _enhance_web_result(self.question, await self._get("web"))
+
+    def discard(self):
+        for task in self.tasks.values():
+            task.cancel()
+        if self.tasks:
+            core.chat_pipeline_stats.record(**{"retrieval_used" if self.used else "retrieval_discarded": 1})
+
+
+async def _chat_context(question: str, retrieval: SpeculativeRetrieval) -> dict:
+    local = core.local_user_context(question)
+    mode = "local" if degraded("context_analysis") else core.CHAT_CONTEXT_MODE
+    if mode == "local":
+        retrieval.prefetch(local["intent"])
+        core.chat_pipeline_stats.record(local_context=1)
+        return local
+
+    started = time.perf_counter()
+    if mode == "speculative":
+        retrieval.prefetch(local["intent"])
+    ctx = await analyze_user_context(question)
+    core.chat_pipeline_stats.record(llm_context=1, context_ms_total=(time.perf_counter() - started) * 1000)
+    return ctx
+
+
+async def handle_chat_hybrid(question: str, user_id: str = "default") -> dict:
+    start_time = time.time()
+    core.chat_pipeline_stats.record(requests=1)
+    retrieval = SpeculativeRetrieval(question)
+
+    try:
+        ctx = await _chat_context(question, retrieval)
+        intent = ctx.get("intent", "GENERAL")
+        sentiment = ctx.get("sentiment", "neutral")
+
+        with span("route." + intent.lower()):
+            if intent in ("SEARCH", "MEMORY"):
+                with span("retrieval"):
+                    web_data = await retrieval.knowledge()
+                system_prompt, history = core.fit_prompt(
+                    "general",
+                    lambda web, _: core.apply_emotional_tone(
+                        core.build_hybrid_prompt(web) if web else core.build_system_prompt(), sentiment),
+                    question, web_data, history=core.chat_memory.get(user_id),
+                )
+                response = await call_llm_with_fallback(question, system_prompt, "general", history)
+            elif intent == "CODING":
+                system_prompt, history = core.fit_prompt(
+                    "coding", lambda _web, _mem: core.apply_emotional_tone(core.build_coding_prompt(), sentiment),
+                    question, history=core.chat_memory.get(user_id),
+                )
+                response = await call_llm_with_fallback(question, system_prompt, "coding", history)
+            elif intent == "SOCIAL":
+                # Gemini function calling runs tools synchronously; keep it off the loop
+                response = await asyncio.to_thread(core.call_gemini_social, question) or \
+                    await call_llm_with_fallback(question, core.build_system_prompt(), "gemma")
+            else:
+                with span("retrieval"):
+                    web_data = await retrieval.web_research()
+                system_prompt, history = core.fit_prompt(
+                    "general", lambda web, _: core.apply_emotional_tone(core.build_system_prompt(web), sentiment),
+                    question, web_data, history=core.chat_memory.get(user_id),
+                )
+                response = await call_llm_with_fallback(question, system_prompt, "general", history)
+    finally:
+        # Cancel speculative fetches the route didn't read, even if it raised
+        retrieval.discard()
+
+    response = core.sanitize_response(response)
+
+    with span("persist"):
+        await asyncio.to_thread(core.persist_exchange, user_id, question, response, intent, sentiment)
+
+    upstream.spawn(sync_chat_to_firebase(user_id, question, response, intent))
+
+    elapsed = round((time.time() - start_time) * 1000, 1)
+    core.ops_telemetry.record(elapsed)
+
+    tts_file = None
+    if len(response) < 500 and not degraded("tts"):
+        tts_file = await generate_tts_audio(response)
+
+    return {
+        "response": response,
+        "intent": intent,
+        "sentiment": sentiment,
+        "tts_file": os.path.basename(tts_file) if tts_file else None,
+        "latency_ms": elapsed,
+    }
+
+
+# ═══════════════════════════════════════════
+# ROUTES
+# ═══════════════════════════════════════════
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _queue_delay_ms(request: Request) -> float:
+    return parse_queue_start(request.headers.get("X-Request-Start") or request.headers.get("X-Queue-Start", ""))
+
+
+def _trace_requested(request: Request) -> bool:
+    return request.query_params.get("trace", "") in ("1", "true")
+
+
+def _rate_limited_response(retry_after: float) -> JSONResponse:
+    return JSONResponse({"error": "Rate limited. Please wait.", "retry_after": round(retry_after, 1)},
+                        status_code=429, headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+
+
+def _overloaded_response(ticket) -> JSONResponse:
+    return JSONResponse({"error": "JARVIS is at capacity. Please retry shortly.", "admission": ticket.describe()},
+                        status_code=503, headers={"Retry-After": str(int(admission.retry_after))})
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _run_guarded(route: str, request: Request, question: str, handler, scope) -> Response:
+    """Admission → answer cache → traced handler; mirrors the Flask routes.
+
+    `scope` keeps cached answers to the user (and model) they were built for.
+    """
+    with admission.admit(route, _queue_delay_ms(request)) as ticket:
+        if ticket.shed:
+            return _overloaded_response(ticket)
+        cached = core._cached_answer(route, question, ticket, scope)
+        if cached:
+            return JSONResponse(cached)
+
+        want_trace = _trace_requested(request)
+        with core.request_trace(route, want_trace) as trace:
+            result = await handler()
+        # Copy before the per-request admission/trace fields are added
+        core.answer_caches[route].put(question, dict(result), scope)
+        if ticket.level:
+            result["admission"] = ticket.describe()
+        if want_trace and trace:
+            result["trace"] = trace.to_dict()
+        return JSONResponse(result)
+
+
+async def ask_endpoint(request: Request) -> Response:
+    if request.method == "OPTIONS":
+        return Response(status_code=204)
+
+    data = await _json_body(request)
+    question = str(data.get("question", "")).strip()
+    if not question:
+        return JSONResponse({"error": "No question provided"}, status_code=400)
+
+    if core._is_forbidden_input(question):
+        return JSONResponse({"response": "I can't process that request, Sir."})
+
+    model = data.get("model", None)
+    ip = _client_ip(request)
+    user_id = data.get("user_id", ip or "default")
+    allowed, retry_after = core._rate_limit_check("/ask", ip, user_id)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    return await _run_guarded("/ask", request, question,
+                              lambda: handle_query_with_moe(question, model, user_id),
+                              core._answer_scope(user_id, model))
+
+
+async def chat_endpoint(request: Request) -> Response:
+    if request.method == "OPTIONS":
+        return Response(status_code=204)
+
+    ip = _client_ip(request)
+    data = await _json_body(request)
+    user_id = data.get("user_id", ip)
+    allowed, retry_after = core._rate_limit_check("/chat", ip, user_id)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    question = str(data.get("question", data.get("message", ""))).strip()
+    if not question:
+        return JSONResponse({"error": "No message provided"}, status_code=400)
+
+    if core._is_forbidden_input(question):
+        return JSONResponse({"response": "I can't process that request, Sir."})
+
+    return await _run_guarded("/chat", request, question, lambda: handle_chat_hybrid(question, user_id),
+                              core._answer_scope(user_id))
+
+
+async def vision_endpoint(request: Request) -> Response:
+    if request.method == "OPTIONS":
+        return Response(status_code=204)
+
+    form = await request.form()
+    allowed, retry_after = core._rate_limit_check("/vision", _client_ip(request), form.get("user_id"))
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    upload = form.get("file")
+    if upload is None or isinstance(upload, str):
+        return JSONResponse({"error": "No image uploaded"}, status_code=400)
+    prompt = form.get("prompt", "Analyze this image in detail.")
+
+    with admission.admit("/vision", _queue_delay_ms(request)) as ticket:
+        if ticket.shed:
+            return _overloaded_response(ticket)
+        try:
+            image_bytes = await upload.read()
+            result = await process_image_with_gemini(image_bytes, prompt)
+            if result:
+                return JSONResponse({"response": result, "model": "gemini-1.5-flash"})
+            return JSONResponse({"error": "Vision processing failed"}, status_code=500)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ═══════════════════════════════════════════
+# APP FACTORY
+# ═══════════════════════════════════════════
+
+ASYNC_ROUTES = {
+    "/ask": ask_endpoint,
+    "/chat": chat_endpoint,
+    "/vision": vision_endpoint,
+}
+
+
+class _Dispatcher:
+    """Async routes go to Starlette, everything else to the Flask app.
+
+    A plain path switch rather than Starlette's Mount so the Flask side keeps
+    its own flask_cors handling and doesn't get CORS headers twice.
+    """
+
+    def __init__(self, api, wsgi):
+        self.api = api
+        self.wsgi = wsgi
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" or scope.get("path") in ASYNC_ROUTES:
+            await self.api(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+
+def create_app():
+    @asynccontextmanager
+    async def lifespan(_app):
+        await upstream.start()
+        print(f"✅ ASGI mode: async {', '.join(ASYNC_ROUTES)} (pool={ASGI_MAX_CONNECTIONS})")
+        yield
+        await upstream.close()
+
+    api = Starlette(
+        routes=[Route(path, fn, methods=["POST", "OPTIONS"]) for path, fn in ASYNC_ROUTES.items()],
+        middleware=[Middleware(CORSMiddleware, allow_origins=core.ALLOWED_ORIGINS,
+                               allow_methods=["GET", "POST", "OPTIONS"],
+                               allow_headers=["Content-Type", "Authorization", "X-Jarvis-Key"])],
+        lifespan=lifespan,
+    )
+    try:
+        wsgi = WSGIMiddleware(core.app, workers=ASGI_WSGI_THREADS)
+    except TypeError:  # starlette's adapter has no pool size option
+        wsgi = WSGIMiddleware(core.app)
+    return _Dispatcher(api, wsgi)
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("jarvis_asgi:app", host="0.0.0.0", port=core.PORT)
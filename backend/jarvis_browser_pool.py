@@ -0,0 +1,301 @@
+"""
+JARVIS Browser Pool — long-lived headless Chromium for page scans
+
+jarvis_browser_scan used to launch a fresh Chromium per request (seconds of
+startup, hundreds of MB). The pool keeps N browsers alive instead:
+
+  browsers   launched once per worker process, lazily on the first scan
+  contexts   each browser keeps one spare context warmed with the
+             resource-blocking route already installed; a scan takes it and
+             a replacement is warmed in the background
+  pages      one fresh page per scan inside that context, closed with the
+             context afterwards, so cookies/storage never leak between users
+  recycle    a browser that has served max_pages is drained and relaunched
+  queueing   at most max_concurrency scans run at once; the rest wait up to
+             queue_timeout seconds and then get PoolBusy
+
+Playwright's sync API is bound to the thread that created it, so the pool
+runs the async API on a private event-loop thread and request threads submit
+work with run_coroutine_threadsafe().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+BOOT_RETRY_SECONDS = 60.0  # after a failed launch, callers fall back instead of retrying
+
+
+class PoolBusy(RuntimeError):
+    """Raised when a scan waited longer than queue_timeout for a free page."""
+
+
+class _Slot:
+    """One browser process and its warmed spare context."""
+
+    __slots__ = ("index", "browser", "spare", "active", "pages_served", "retiring", "launched_at")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser = None
+        self.spare: Optional[asyncio.Task] = None
+        self.active = 0
+        self.pages_served = 0
+        self.retiring = False
+        self.launched_at = 0.0
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_concurrency: int = 4, max_pages_per_browser: int = 50,
+                 queue_timeout: float = 20.0, nav_timeout_ms: int = 15000, idle_timeout_ms: int = 5000,
+                 block_resources: bool = True, headless: bool = True):
+        self.size = max(1, size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.queue_timeout = queue_timeout
+        self.nav_timeout_ms = nav_timeout_ms
+        self.idle_timeout_ms = idle_timeout_ms
+        self.block_resources = block_resources
+        self.headless = headless
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._slots: List[_Slot] = []
+        self._sem: Optional[asyncio.Semaphore] = None
+
+        self._started_at = 0.0
+        self._boot_failed_at = 0.0
+        self._busy_seconds = 0.0
+        self._waiting = 0
+        self._load_ms: deque = deque(maxlen=500)
+        self._wait_ms: deque = deque(maxlen=500)
+        self._counts = {"scans": 0, "errors": 0, "busy_rejects": 0, "launches": 0,
+                        "recycles": 0, "blocked_requests": 0}
+
+    # ─── lifecycle ───
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            if time.time() - self._boot_failed_at < BOOT_RETRY_SECONDS:
+                raise RuntimeError("Browser pool failed to start recently; not retrying yet")
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="jarvis-browser-pool", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._boot(), loop).result(timeout=60)
+            except Exception:
+                self._boot_failed_at = time.time()
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            self._thread = thread
+            self._loop = loop
+
+    async def _boot(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._slots = [_Slot(i) for i in range(self.size)]
+        try:
+            await asyncio.gather(*(self._launch(slot) for slot in self._slots))
+        except Exception:
+            await self._shutdown()
+            raise
+        self._started_at = time.time()
+        print(f"✅ [BROWSER-POOL] {self.size} browser(s), {self.max_concurrency} concurrent pages")
+
+    async def _launch(self, slot: _Slot):
+        slot.browser = await self._playwright.chromium.launch(headless=self.headless)
+        slot.browser.on("disconnected", lambda _b, s=slot: self._on_disconnect(s))
+        slot.pages_served = 0
+        slot.retiring = False
+        slot.launched_at = time.time()
+        slot.spare = asyncio.ensure_future(self._new_context(slot.browser))
+        self._counts["launches"] += 1
+
+    def _on_disconnect(self, slot: _Slot):
+        # Crashed or closed under us: relaunch unless a recycle is already doing it
+        if not slot.retiring and self._playwright is not None:
+            print(f"⚠️ [BROWSER-POOL] browser {slot.index} disconnected, relaunching")
+            slot.retiring = True
+            asyncio.ensure_future(self._relaunch_when_idle(slot))
+
+    async def _relaunch_when_idle(self, slot: _Slot):
+        while slot.active:
+            await asyncio.sleep(0.05)
+        old = slot.browser
+        if slot.spare is not None:
+            slot.spare.cancel()
+        try:
+            await old.close()
+        except Exception:
+            pass
+        # Scans wait for this slot's replacement, so keep trying until the pool shuts down
+        while self._playwright is not None:
+            try:
+                await self._launch(slot)
+                self._counts["recycles"] += 1
+                return
+            except Exception as e:
+                print(f"⚠️ [BROWSER-POOL] relaunch failed: {e}; retrying in {BOOT_RETRY_SECONDS:.0f}s")
+                await asyncio.sleep(BOOT_RETRY_SECONDS)
+
+    async def _new_context(self, browser):
+        context = await browser.new_context(java_script_enabled=True)
+        if self.block_resources:
+            await context.route("**/*", self._route_filter)
+        return context
+
+    async def _route_filter(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            self._counts["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=15)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _shutdown(self):
+        pw, self._playwright = self._playwright, None
+        for slot in self._slots:
+            slot.retiring = True
+            if slot.browser is None:
+                continue
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+        if pw is not None:
+            await pw.stop()
+
+    # ─── scanning ───
+
+    async def _pick_slot(self, deadline: float) -> _Slot:
+        # A retiring browser only closes once its scans drain, so new scans
+        # wait for its replacement rather than keep it alive (size=1 included)
+        while True:
+            live = [s for s in self._slots if not s.retiring]
+            if live:
+                return min(live, key=lambda s: (s.active, s.pages_served))
+            if time.perf_counter() >= deadline:
+                self._counts["busy_rejects"] += 1
+                raise PoolBusy(f"No browser free within {self.queue_timeout:.0f}s")
+            await asyncio.sleep(0.05)
+
+    async def _take_context(self, slot: _Slot):
+        spare = slot.spare
+        slot.spare = asyncio.ensure_future(self._new_context(slot.browser))
+        try:
+            return await spare
+        except Exception:
+            # The spare was warmed on a browser that has since died
+            return await self._new_context(slot.browser)
+
+    async def _scan(self, url: str) -> str:
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._counts["busy_rejects"] += 1
+            raise PoolBusy(f"No browser page free within {self.queue_timeout:.0f}s")
+        finally:
+            self._waiting -= 1
+        try:
+            slot = await self._pick_slot(queued + self.queue_timeout)
+        except PoolBusy:
+            self._sem.release()
+            raise
+        slot.active += 1
+        started = time.perf_counter()
+        self._wait_ms.append((started - queued) * 1000)
+        context = None
+        try:
+            context = await self._take_context(slot)
+            page = await context.new_page()
+            await page.goto(url, timeout=self.nav_timeout_ms, wait_until="domcontentloaded")
+            try:
+                await page.wait_for_load_state("networkidle", timeout=self.idle_timeout_ms)
+            except Exception:
+                pass  # long-polling pages never go idle; what has rendered is enough
+            text = await page.inner_text("body")
+            self._load_ms.append((time.perf_counter() - started) * 1000)
+            self._counts["scans"] += 1
+            return text
+        except Exception:
+            self._counts["errors"] += 1
+            raise
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            slot.active -= 1
+            slot.pages_served += 1
+            self._busy_seconds += time.perf_counter() - started
+            self._sem.release()
+            if slot.pages_served >= self.max_pages_per_browser and not slot.retiring:
+                slot.retiring = True
+                asyncio.ensure_future(self._relaunch_when_idle(slot))
+
+    def scan(self, url: str) -> str:
+        """Load `url` in an isolated page and return the body text.
+
+        Blocks the calling thread. Raises PoolBusy when the queue wait
+        exceeds queue_timeout, and Playwright errors for failed loads.
+        """
+        self._ensure_started()
+        budget = self.queue_timeout + (self.nav_timeout_ms + self.idle_timeout_ms) / 1000 + 10
+        future = asyncio.run_coroutine_threadsafe(self._scan(url), self._loop)
+        return future.result(timeout=budget)
+
+    # ─── metrics ───
+
+    def stats(self) -> dict:
+        if self._loop is None:
+            return {"started": False, "size": self.size, "max_concurrency": self.max_concurrency}
+        active = sum(s.active for s in self._slots)
+        uptime = max(1e-9, time.time() - self._started_at)
+        load = sorted(self._load_ms)
+        return {
+            "started": True,
+            "size": self.size,
+            "max_concurrency": self.max_concurrency,
+            "active_pages": active,
+            "queued": self._waiting,
+            "utilization_pct": round(100 * active / self.max_concurrency, 1),
+            "busy_pct_since_start": round(100 * self._busy_seconds / (uptime * self.max_concurrency), 2),
+            "page_load_ms": {
+                "p50": round(statistics.median(load), 1) if load else 0.0,
+                "p95": round(load[int(len(load) * 0.95) - 1], 1) if load else 0.0,
+                "samples": len(load),
+            },
+            "queue_wait_ms_p95": round(sorted(self._wait_ms)[int(len(self._wait_ms) * 0.95) - 1], 1)
+            if self._wait_ms else 0.0,
+            "browsers": [
+                {"index": s.index, "active": s.active, "pages_served": s.pages_served,
+                 "retiring": s.retiring, "age_s": round(time.time() - s.launched_at, 1)}
+                for s in self._slots
+            ],
+            **self._counts,
+        }
@@ -3,7 +3,6 @@ import re
 import time
 from collections import Counter
 from google import genai
-from pinecone import Pinecone
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -13,10 +12,19 @@ load_dotenv(dotenv_path=base_path / ".env")
 
 # 2. Initialize Clients
 client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-index = pc.Index(os.getenv('PINECONE_INDEX_NAME', 'jarvis-knowledge'))
-
-print("✅ API Keys & Pinecone connected successfully.")
+# VECTOR_BACKEND=local searches the on-disk copy instead of calling Pinecone per question
+from jarvis_vector_store import VECTOR_BACKEND, open_index
+from jarvis_embed_cache import shared_cache
+if VECTOR_BACKEND == "local":
+    index = open_index(os.getenv('PINECONE_INDEX_NAME', 'jarvis-knowledge'))
+    print(f"✅ API Keys & local vector index loaded ({index.describe_index_stats()['total_vector_count']} vectors).")
+else:
+    from pinecone import Pinecone
+    pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
+    index = pc.Index(os.getenv('PINECONE_INDEX_NAME', 'jarvis-knowledge'))
+    print("✅ API Keys & Pinecone connected successfully.")
+
+embed_cache = shared_cache()
 
 # Simple in-memory user profile for adaptive prompting
 USER_PROFILE = {
@@ -41,8 +49,11 @@ def detect_task(user_input: str) -> str:
 
 def get_context(query):
     """Pinecone memory search with confidence scoring and metadata."""
-    res = client.models.embed_content(model='text-embedding-004', contents=query)
-    query_emb = res.embeddings[0].values
+    # Repeated questions are served from the embedding cache shared with the news pipeline
+    def call_api(batch):
+        res = client.models.embed_content(model='text-embedding-004', contents=batch)
+        return [e.values for e in res.embeddings]
+    query_emb = embed_cache.embed([query], 'text-embedding-004', None, call_api)[0]
 
     results = index.query(vector=query_emb, top_k=5, include_metadata=True)
 
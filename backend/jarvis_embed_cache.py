@@ -0,0 +1,259 @@
+"""
+JARVIS Embedding Cache — content-hash cache in front of embed_content
+
+The news pipeline re-embeds the same article texts every day and the chat
+loop re-embeds repeated student questions. EmbeddingCache keys each vector
+by (model, task_type, sha256(text)) and keeps it on disk, shared by every
+process that opens the same directory:
+
+  <model>.npy    (capacity, dim) float32 matrix, memory-mapped, one row per key
+  <model>.keys   sidecar index: one "task_type:sha256" line per row, append-only
+  <model>.lock   flock'd while a writer appends, so processes never share a row
+
+Readers pick up rows appended by other processes by re-reading the tail of
+the key file. embed() looks every text up, sends only the misses to the API
+(deduplicated, in batches) and stores the results; stats() and
+since(snapshot) report hits, misses and API calls saved.
+
+    cache = shared_cache()
+    vectors = cache.embed(texts, "text-embedding-004", "RETRIEVAL_DOCUMENT",
+                          lambda batch: genai.embed_content(..., content=batch)["embedding"])
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:  # Windows: single-process locking only
+    FLOCK_AVAILABLE = False
+
+EMBED_CACHE_DIR = os.environ.get(
+    "EMBED_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embed_cache"))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "100"))
+
+_INITIAL_CAPACITY = 1024
+_COUNTERS = ("lookups", "hits", "misses", "api_calls", "api_calls_saved", "stored")
+
+
+def text_key(task_type: Optional[str], text: str) -> str:
+    return f"{task_type or 'DEFAULT'}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def _model_slug(model: str) -> str:
+    # "models/text-embedding-004" and "text-embedding-004" are the same model
+    name = model[len("models/"):] if model.startswith("models/") else model
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+
+
+class _ModelStore:
+    """Matrix + key index for one embedding model."""
+
+    def __init__(self, directory: str, slug: str):
+        self.matrix_path = os.path.join(directory, f"{slug}.npy")
+        self.keys_path = os.path.join(directory, f"{slug}.keys")
+        self.lock_path = os.path.join(directory, f"{slug}.lock")
+        self.matrix: Optional[np.memmap] = None
+        self.mapped = None  # (inode, size) of the file self.matrix maps
+        self.rows: Dict[str, int] = {}
+        self.keys_offset = 0
+
+    def _identity(self):
+        st = os.stat(self.matrix_path)
+        return st.st_ino, st.st_size
+
+    def _map(self):
+        # A grow by another process replaces the file; stat around the load
+        # so self.mapped always describes the file that is actually mapped
+        while True:
+            before = self._identity()
+            matrix = np.load(self.matrix_path, mmap_mode="r+")
+            if self._identity() == before:
+                self.matrix, self.mapped = matrix, before
+                return
+
+    def refresh(self):
+        """
+        Index key lines appended since the last refresh (by any process), and
+        re-map the matrix if another process has grown (replaced) it since.
+        Rows indexed here were written before their keys, so the mapping
+        taken afterwards always holds them.
+        """
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self.keys_offset)
+            tail = f.read()
+        end = tail.rfind(b"\n") + 1  # a line without its newline is still being written
+        for line in tail[:end].decode("ascii", errors="replace").splitlines():
+            self.rows.setdefault(line, len(self.rows))
+        self.keys_offset += end
+        if self.matrix is not None and os.path.exists(self.matrix_path) and self._identity() != self.mapped:
+            self._map()
+
+    def vector(self, row: int) -> np.ndarray:
+        if self.matrix is None or row >= self.matrix.shape[0]:
+            self._map()  # grown by another process
+        return np.array(self.matrix[row], dtype=np.float32)
+
+    def append(self, keys: List[str], vectors: np.ndarray):
+        """
+        Caller holds the file lock and has just refreshed, so the mapping is
+        the current file: growing a stale mapping would copy its old, shorter
+        view over rows other processes have written since.
+        """
+        if self.matrix is None and os.path.exists(self.matrix_path):
+            self._map()
+        start, dim = len(self.rows), vectors.shape[1]
+        if self.matrix is None:
+            self.matrix = np.lib.format.open_memmap(
+                self.matrix_path, mode="w+", dtype=np.float32,
+                shape=(max(_INITIAL_CAPACITY, len(keys)), dim))
+            self.mapped = self._identity()
+        elif self.matrix.shape[1] != dim:
+            raise ValueError(f"cached dimension {self.matrix.shape[1]} != {dim}")
+        if start + len(keys) > self.matrix.shape[0]:
+            self._grow(start + len(keys))
+        self.matrix[start:start + len(keys)] = vectors
+        self.matrix.flush()
+        # Truncate a torn line left by a crashed writer before appending after it
+        if os.path.exists(self.keys_path) and os.path.getsize(self.keys_path) > self.keys_offset:
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(self.keys_offset)
+        payload = "".join(k + "\n" for k in keys).encode("ascii")
+        with open(self.keys_path, "ab") as f:
+            f.write(payload)
+        for k in keys:
+            self.rows[k] = len(self.rows)
+        self.keys_offset += len(payload)
+
+    def _grow(self, needed: int):
+        capacity = self.matrix.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        tmp = self.matrix_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32,
+                                          shape=(capacity, self.matrix.shape[1]))
+        grown[:self.matrix.shape[0]] = self.matrix
+        grown.flush()
+        del grown
+        os.replace(tmp, self.matrix_path)
+        self._map()
+
+
+class EmbeddingCache:
+    def __init__(self, directory: str = EMBED_CACHE_DIR, batch_size: int = EMBED_BATCH_SIZE):
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._stores: Dict[str, _ModelStore] = {}
+        self._counts = dict.fromkeys(_COUNTERS, 0)
+
+    def _store(self, model: str) -> _ModelStore:
+        slug = _model_slug(model)
+        if slug not in self._stores:
+            self._stores[slug] = _ModelStore(self.directory, slug)
+        return self._stores[slug]
+
+    @contextmanager
+    def _file_lock(self, store: _ModelStore):
+        if not FLOCK_AVAILABLE:
+            yield
+            return
+        with open(store.lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def get_many(self, texts: Sequence[str], model: str, task_type: Optional[str] = None) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            store = self._store(model)
+            keys = [text_key(task_type, t) for t in texts]
+            if any(k not in store.rows for k in keys):
+                store.refresh()
+            out = [store.vector(store.rows[k]) if k in store.rows else None for k in keys]
+            hits = sum(v is not None for v in out)
+            self._counts["lookups"] += len(keys)
+            self._counts["hits"] += hits
+            self._counts["misses"] += len(keys) - hits
+            return out
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], model: str,
+                 task_type: Optional[str] = None):
+        if not texts:
+            return
+        with self._lock:
+            store = self._store(model)
+            with self._file_lock(store):
+                store.refresh()
+                fresh: Dict[str, Sequence[float]] = {}
+                for text, vec in zip(texts, vectors):
+                    k = text_key(task_type, text)
+                    if k not in store.rows:
+                        fresh[k] = vec
+                if fresh:
+                    store.append(list(fresh), np.asarray(list(fresh.values()), dtype=np.float32))
+                    self._counts["stored"] += len(fresh)
+
+    def embed(self, texts: Sequence[str], model: str, task_type: Optional[str],
+              embed_batch: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Embed `texts`, calling `embed_batch` only for uncached, distinct texts.
+
+        Raises whatever embed_batch raises; batches that completed before the
+        failure stay cached.
+        """
+        texts = list(texts)
+        cached = self.get_many(texts, model, task_type)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        computed: Dict[str, List[float]] = {}
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = embed_batch(batch)
+            with self._lock:
+                self._counts["api_calls"] += 1
+            self.put_many(batch, vectors, model, task_type)
+            computed.update(zip(batch, (list(map(float, v)) for v in vectors)))
+        with self._lock:
+            needed = math.ceil(len(texts) / self.batch_size)
+            self._counts["api_calls_saved"] += needed - math.ceil(len(missing) / self.batch_size)
+        return [v.tolist() if v is not None else computed[t] for t, v in zip(texts, cached)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counts)
+            out["hit_ratio"] = round(out["hits"] / out["lookups"], 4) if out["lookups"] else 0.0
+            out["entries"] = {slug: len(s.rows) for slug, s in self._stores.items()}
+            return out
+
+    def since(self, snapshot: dict) -> dict:
+        """Counter deltas since an earlier stats() call (per pipeline run)."""
+        now = self.stats()
+        delta = {k: now[k] - snapshot.get(k, 0) for k in _COUNTERS}
+        delta["hit_ratio"] = round(delta["hits"] / delta["lookups"], 4) if delta["lookups"] else 0.0
+        return delta
+
+
+_shared: Optional[EmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> EmbeddingCache:
+    """Process-wide cache over EMBED_CACHE_DIR (the pipeline and chat loop use the same files)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = EmbeddingCache()
+        return _shared
@@ -0,0 +1,265 @@
+"""
+JARVIS HTML → text — streaming extraction for the scrapers
+
+Replaces the BeautifulSoup pipeline (parse whole page → decompose noise →
+get_text → split/filter lines) with a single pass over parser events:
+
+  - the body is fed to the parser in chunks as it downloads, capped at
+    max_bytes, so multi-MB pages are never held or parsed in full
+  - text inside noise tags (script/style/nav/...) is dropped as it streams
+    past instead of being built into a tree and decomposed
+  - article, main and body text are collected side by side; parsing stops
+    as soon as the first <article> closes or has max_chars of usable text
+
+The parser is lxml's C HTML parser driven through its target interface (no
+tree is built) when lxml is installed, otherwise the stdlib incremental
+html.parser. Both produce the same output as the old BeautifulSoup code:
+first <article>, else <main>, else <body> (the `prefer` order), else the
+whole document.
+
+    text = extract_text(html, max_chars=3000)                  # "\\n"-joined lines > 20 chars
+    text = extract_text(html, max_chars=1000, mode="flat",     # whitespace-collapsed
+                        skip_tags=("script", "style"), prefer=("article", "body"))
+    text = extract_response(requests.get(url, stream=True), max_chars=3000)
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Union
+
+try:
+    from lxml import etree as _etree
+    ENGINE = "lxml"
+except ImportError:  # pragma: no cover - depends on the deployment
+    _etree = None
+    ENGINE = "html.parser"
+
+NOISE_TAGS = ("script", "style", "nav", "footer", "header", "aside", "iframe")
+CONTAINERS = ("article", "main", "body")  # first one present wins
+DEFAULT_MAX_BYTES = 1 << 20
+CHUNK_SIZE = 16384
+
+# Never text, even when the caller's skip list is shorter (bs4's get_text skips these too)
+_ALWAYS_SKIP = frozenset({"script", "style", "template"})
+_VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+                        "meta", "param", "source", "track", "wbr"})
+_WS_RE = re.compile(r"\s+")
+
+
+class _Collector:
+    """Parser target: routes text nodes into article / main / body / all buckets."""
+
+    def __init__(self, max_chars: int, mode: str, skip_tags, min_line: int, prefer):
+        self.max_chars = max_chars
+        self.mode = mode
+        self.skip = frozenset(t.lower() for t in skip_tags) | _ALWAYS_SKIP
+        self.min_line = min_line
+        self.prefer = prefer
+        self.pending: List[str] = []
+        self.skip_depth = 0
+        self.depth = {"article": 0, "main": 0, "body": 0}
+        self.seen = {"article": False, "main": False, "body": False}
+        self.closed = {"article": False, "main": False}
+        self.parts = {"article": [], "main": [], "body": [], "all": []}
+        self.article_chars = 0
+        self.done = False
+
+    # Only the *first* article/main counts, like soup.find()
+    def _open(self, name: str) -> bool:
+        return self.depth[name] > 0 and not self.closed.get(name, False)
+
+    def start(self, tag, attrib=None):
+        self._flush()
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in _VOID_TAGS:
+            return
+        if tag in self.skip:
+            self.skip_depth += 1
+            return
+        if tag in self.depth and not self.closed.get(tag, False):
+            self.depth[tag] += 1
+            self.seen[tag] = True
+
+    def end(self, tag):
+        self._flush()
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in self.skip:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if tag in self.depth and self.depth[tag] > 0 and not self.closed.get(tag, False):
+            self.depth[tag] -= 1
+            if self.depth[tag] == 0 and tag in self.closed:
+                self.closed[tag] = True
+                # The first article decides the output; nothing after it matters
+                self.done = self.done or tag == "article"
+
+    def data(self, text):
+        # Parsers may split one text node (entities, chunk boundaries); join before filtering
+        if text and not self.skip_depth:
+            self.pending.append(text)
+
+    def _flush(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending.clear()
+        if self.mode == "lines":
+            pieces = [line.strip() for line in text.splitlines()]
+            pieces = [p for p in pieces if len(p) > self.min_line]
+        else:
+            pieces = [text]
+        if not pieces:
+            return
+        size = sum(len(p) + 1 for p in pieces)
+        for name in ("article", "main", "body"):
+            if self._open(name):
+                self.parts[name].extend(pieces)
+        self.parts["all"].extend(pieces)
+        if self._open("article"):
+            self.article_chars += size
+            if self.article_chars >= self.max_chars:
+                self.done = True
+
+    def close(self):
+        self._flush()
+
+    def result(self) -> str:
+        self._flush()
+        for name in self.prefer:
+            if self.seen[name]:
+                chosen = self.parts[name]
+                break
+        else:
+            chosen = self.parts["all"]
+        if self.mode == "lines":
+            return "\n".join(chosen)[:self.max_chars]
+        return _WS_RE.sub(" ", "".join(chosen)).strip()[:self.max_chars]
+
+
+class _StdlibAdapter(HTMLParser):
+    def __init__(self, target: _Collector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _make_parser(target: _Collector):
+    if _etree is not None:
+        return _etree.HTMLParser(target=target, recover=True, no_network=True)
+    return _StdlibAdapter(target)
+
+
+def _finish(parser):
+    try:
+        parser.close()
+    except Exception:
+        pass  # lxml raises on empty/garbage input; whatever was collected stands
+
+
+def extract_chunks(chunks: Iterable[str], max_chars: int = 3000, mode: str = "lines",
+                   skip_tags=NOISE_TAGS, min_line: int = 20, max_bytes: int = DEFAULT_MAX_BYTES,
+                   prefer=CONTAINERS) -> str:
+    """Extract from an iterable of decoded HTML chunks, stopping early when possible."""
+    target = _Collector(max_chars, mode, skip_tags, min_line, prefer)
+    parser = _make_parser(target)
+    consumed = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if consumed + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - consumed]
+        consumed += len(chunk)
+        try:
+            parser.feed(chunk)
+        except Exception:
+            break
+        if target.done or consumed >= max_bytes:
+            break
+    _finish(parser)
+    return target.result()
+
+
+def extract_text(html: Union[str, bytes], max_chars: int = 3000, mode: str = "lines",
+                 skip_tags=NOISE_TAGS, min_line: int = 20, max_bytes: int = DEFAULT_MAX_BYTES,
+                 prefer=CONTAINERS) -> str:
+    """Extract from a complete document (fed in chunks so early stop still applies)."""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    chunks = (html[i:i + CHUNK_SIZE] for i in range(0, min(len(html), max_bytes), CHUNK_SIZE))
+    return extract_chunks(chunks, max_chars, mode, skip_tags, min_line, max_bytes, prefer)
+
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _known(name) -> Union[str, None]:
+    try:
+        return codecs.lookup(name.decode("ascii") if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def _charset(resp, head: bytes) -> str:
+    """
+    Content-Type charset, else BOM, else <meta charset> in the first chunk,
+    else UTF-8 (windows-1252 if the head is not valid UTF-8). requests'
+    resp.encoding is only used when the header names a charset: for bare
+    text/html it is ISO-8859-1, which garbles UTF-8 pages.
+    """
+    match = _HEADER_CHARSET.search(resp.headers.get("Content-Type", ""))
+    if match and _known(match.group(1)):
+        return _known(match.group(1))
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    match = _META_CHARSET.search(head)
+    if match and _known(match.group(1)):
+        return _known(match.group(1))
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:  # not just a character cut at the chunk edge
+            return "cp1252"
+    return "utf-8"
+
+
+def _decoded(resp, max_bytes: int) -> Iterable[str]:
+    decoder = None
+    read = 0
+    for raw in resp.iter_content(CHUNK_SIZE):
+        if not raw:
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(_charset(resp, raw))(errors="replace")
+        read += len(raw)
+        yield decoder.decode(raw)
+        if read >= max_bytes:
+            return
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def extract_response(resp, max_chars: int = 3000, mode: str = "lines", skip_tags=NOISE_TAGS,
+                     min_line: int = 20, max_bytes: int = DEFAULT_MAX_BYTES, prefer=CONTAINERS) -> str:
+    """Extract from a streaming requests.Response (get(..., stream=True)).
+
+    Stops reading the socket at max_bytes or once the article is complete;
+    the caller should close the response.
+    """
+    return extract_chunks(_decoded(resp, max_bytes), max_chars, mode, skip_tags, min_line, max_bytes, prefer)
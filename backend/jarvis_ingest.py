@@ -0,0 +1,227 @@
+"""
+JARVIS Ingest — chunked, parallel embed + upsert for knowledge backfills
+
+generate_embeddings used to send every text in one embed_content call (one
+failure lost the whole run) and the stores upserted every vector in one
+request. IngestPipeline streams items through instead:
+
+  chunk     inputs are cut to the provider batch limit (EMBED_BATCH_SIZE,
+            Gemini batchEmbedContents takes 100)
+  embed     up to `workers` chunks are in flight at once; a failing chunk is
+            retried with exponential backoff and, if it still fails, is
+            reported and skipped instead of aborting the run
+  upsert    embeddings are buffered as chunks finish and flushed in batches
+            capped by count and request size (Pinecone: 100 vectors / 2 MB)
+  resume    ids are appended to a checkpoint file after their upsert
+            succeeds; a rerun with the same checkpoint skips them
+
+    pipeline = IngestPipeline(embed_batch, index, checkpoint_path="backfill.ckpt")
+    report = pipeline.run({"id": ..., "text": ..., "metadata": {...}} for ... in source)
+    print(report.summary())        # docs/s, embedded, upserted, skipped, failed
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "100"))
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", "4"))
+EMBED_RETRIES = int(os.environ.get("EMBED_RETRIES", "3"))
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", "100"))
+UPSERT_MAX_BYTES = int(os.environ.get("UPSERT_MAX_BYTES", str(2 * 1024 * 1024)))
+
+
+def _with_retry(fn: Callable[[], Any], retries: int, base_delay: float = 1.0) -> Any:
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _vector_bytes(vector: Dict[str, Any]) -> int:
+    # JSON size of the request entry: ~12 chars per float plus metadata
+    return len(vector["values"]) * 12 + len(json.dumps(vector.get("metadata") or {})) + len(vector["id"]) + 64
+
+
+def upsert_batches(index, vectors: Sequence[Dict[str, Any]], max_count: int = UPSERT_BATCH_SIZE,
+                   max_bytes: int = UPSERT_MAX_BYTES, retries: int = EMBED_RETRIES,
+                   on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                   on_error: Optional[Callable[[List[Dict[str, Any]], Exception], None]] = None) -> int:
+    """
+    Upsert `vectors` in requests capped by count and size. Returns how many were sent.
+
+    on_batch(batch) runs after each request succeeds. Without on_error the
+    first failing request raises; with it, on_error(batch, exc) is called and
+    the remaining requests are still sent.
+    """
+    sent = 0
+    batch: List[Dict[str, Any]] = []
+    size = 0
+    for vector in list(vectors) + [None]:
+        vbytes = _vector_bytes(vector) if vector is not None else 0
+        if batch and (vector is None or len(batch) >= max_count or size + vbytes > max_bytes):
+            try:
+                _with_retry(lambda b=batch: index.upsert(vectors=b), retries)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(batch, e)
+            else:
+                sent += len(batch)
+                if on_batch:
+                    on_batch(batch)
+            batch, size = [], 0
+        if vector is not None:
+            batch.append(vector)
+            size += vbytes
+    return sent
+
+
+def embed_chunks(texts: Sequence[str], embed_batch: Callable[[List[str]], List[List[float]]],
+                 batch_size: int = EMBED_BATCH_SIZE, workers: int = EMBED_WORKERS,
+                 retries: int = EMBED_RETRIES) -> List[List[float]]:
+    """Embed `texts` in parallel provider-sized chunks, order preserved. Raises if a chunk keeps failing."""
+    chunks = [list(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    if len(chunks) <= 1:
+        return _with_retry(lambda: embed_batch(chunks[0]), retries) if chunks else []
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks)), thread_name_prefix="embed") as pool:
+        results = list(pool.map(lambda c: _with_retry(lambda: embed_batch(c), retries), chunks))
+    return [vector for chunk in results for vector in chunk]
+
+
+class IngestReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.embedded = 0
+        self.upserted = 0
+        self.skipped = 0
+        self.failed_ids: List[str] = []
+        self.errors: List[str] = []
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.upserted / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"embedded": self.embedded, "upserted": self.upserted, "skipped": self.skipped,
+                "failed": len(self.failed_ids), "seconds": round(self.elapsed, 2),
+                "docs_per_second": round(self.docs_per_second, 1), "errors": self.errors[:5]}
+
+    def summary(self) -> str:
+        return (f"{self.upserted} upserted in {self.elapsed:.1f}s ({self.docs_per_second:.1f} docs/s), "
+                f"{self.skipped} already done, {len(self.failed_ids)} failed")
+
+
+class IngestPipeline:
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], index,
+                 batch_size: int = EMBED_BATCH_SIZE, workers: int = EMBED_WORKERS,
+                 retries: int = EMBED_RETRIES, upsert_batch_size: int = UPSERT_BATCH_SIZE,
+                 upsert_max_bytes: int = UPSERT_MAX_BYTES, checkpoint_path: Optional[str] = None,
+                 progress: Optional[Callable[[IngestReport], None]] = None):
+        self.embed_batch = embed_batch
+        self.index = index
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_max_bytes = upsert_max_bytes
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+
+    def _load_checkpoint(self) -> Set[str]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.endswith("\n")}
+
+    def _checkpoint(self, ids: List[str]):
+        if self.checkpoint_path and ids:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write("".join(i + "\n" for i in ids))
+
+    def _embed_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        embeddings = _with_retry(lambda: self.embed_batch([item["text"] for item in chunk]), self.retries)
+        if len(embeddings) != len(chunk):
+            raise ValueError(f"expected {len(chunk)} embeddings, got {len(embeddings)}")
+        return [{"id": str(item["id"]), "values": list(vec), "metadata": item.get("metadata") or {}}
+                for item, vec in zip(chunk, embeddings)]
+
+    def _flush(self, buffer: List[Dict[str, Any]], report: IngestReport, force: bool = False) -> List[Dict[str, Any]]:
+        if not buffer or (not force and len(buffer) < self.upsert_batch_size):
+            return buffer
+        def failed(batch, e):
+            report.failed_ids.extend(v["id"] for v in batch)
+            report.errors.append(f"upsert: {e}")
+
+        # Checkpoint per request, so one failing request doesn't undo the ones already stored
+        report.upserted += upsert_batches(self.index, buffer, self.upsert_batch_size,
+                                          self.upsert_max_bytes, self.retries,
+                                          on_batch=lambda batch: self._checkpoint([v["id"] for v in batch]),
+                                          on_error=failed)
+        if self.progress:
+            report.elapsed = time.perf_counter() - report.started
+            self.progress(report)
+        return []
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> IngestReport:
+        """Embed and upsert `items` ({id, text, metadata}); consumes the iterable lazily."""
+        report = IngestReport()
+        done = self._load_checkpoint()
+
+        def pending_items():
+            for item in items:
+                if str(item["id"]) in done:
+                    report.skipped += 1
+                else:
+                    yield item
+
+        buffer: List[Dict[str, Any]] = []
+        in_flight: Dict[Future, List[Dict[str, Any]]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool:
+            source = _chunks(pending_items(), self.batch_size)
+            exhausted = False
+            while in_flight or not exhausted:
+                # Keep a bounded number of chunks in flight so huge inputs are never fully materialised
+                while not exhausted and len(in_flight) < self.workers * 2:
+                    chunk = next(source, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        in_flight[pool.submit(self._embed_chunk, chunk)] = chunk
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk = in_flight.pop(future)
+                    try:
+                        vectors = future.result()
+                    except Exception as e:
+                        report.failed_ids.extend(str(item["id"]) for item in chunk)
+                        report.errors.append(f"embed: {e}")
+                        continue
+                    report.embedded += len(vectors)
+                    buffer.extend(vectors)
+                    buffer = self._flush(buffer, report)
+            self._flush(buffer, report, force=True)
+        report.elapsed = time.perf_counter() - report.started
+        return report
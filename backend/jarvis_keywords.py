@@ -0,0 +1,132 @@
+"""
+JARVIS Keywords — one compiled matcher for every heuristic classifier
+
+analyze_intent, is_current_event, is_coding_query, _is_forbidden_input,
+MLService._needs_web_search, ContentVerifier.detect_intent, the live-search
+region detector, ... each used to lowercase the question and run
+`any(kw in q for kw in ...)` over their own lists. That scans the same string
+once per list, and plain substring tests misfire ("hi" in "this", "api" in
+"capital", "tn" in "attention").
+
+Classifiers register their lists here under a category name; all categories
+are compiled into a single regex (a trie of the keywords, so shared prefixes
+are tested once). tag_query() runs it over the text one time and returns
+every category that matched; the result is memoised, so the dozen
+classifiers that look at one request share that single pass.
+
+    CODING = register("app.coding", ["code", "debug", "python"])
+    FORBIDDEN = register("app.forbidden", ["system prompt"], whole_words=False)
+    CODING in tag_query("Debug my Python code")     # True
+
+Keywords are literal and case-insensitive. whole_words=True (the default)
+requires a non-alphanumeric character or the string edge on both sides;
+whole_words=False drops the right-hand boundary, for lists where a longer
+word should still count ("system prompts" for "system prompt").
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+_LEFT = r"(?<![0-9a-z])"
+_RIGHT = r"(?![0-9a-z])"
+
+
+def _trie_regex(words: Dict[str, bool]) -> str:
+    """
+    Regex matching any keyword in `words` (keyword -> whole_words), shared
+    prefixes factored. Longer keywords are tried first; a keyword's right
+    boundary is only required where that keyword ends.
+    """
+    trie: Dict = {}
+    for word, whole in words.items():
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = whole
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            branches.append(_RIGHT if node[""] else "")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keywords: Dict[str, Set[str]] = {}       # keyword -> categories
+        self._whole: Dict[str, bool] = {}              # keyword -> whole_words
+        self._categories: Dict[str, List[str]] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._expanded: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+
+    def register(self, category: str, keywords: Iterable[str], whole_words: bool = True) -> str:
+        """Add `keywords` under `category` (re-registering a category replaces it). Returns `category`."""
+        keywords = [k.lower().strip() for k in keywords if k and k.strip()]
+        with self._lock:
+            for kw in self._categories.pop(category, []):
+                self._keywords[kw].discard(category)
+            self._categories[category] = keywords
+            for kw in keywords:
+                self._keywords.setdefault(kw, set()).add(category)
+                # A keyword registered both ways keeps the looser (substring) semantics
+                self._whole[kw] = self._whole.get(kw, True) and whole_words
+            self._pattern = None
+        tag_query.cache_clear()
+        return category
+
+    def keywords(self, category: str) -> List[str]:
+        return list(self._categories.get(category, []))
+
+    def _compile(self) -> re.Pattern:
+        live = {kw: cats for kw, cats in self._keywords.items() if cats}
+        # Zero-width match at every word start, so overlapping keywords
+        # ("breaking news" / "news") are all seen. Text is lowercased once in
+        # tag(); no IGNORECASE, which is about twice as slow
+        body = _trie_regex({kw: self._whole[kw] for kw in live}) if live else "(?!)"
+        pattern = re.compile(f"{_LEFT}(?=({body}))")
+
+        # Only the longest keyword starting at a position is reported; it also
+        # stands for the shorter keywords it starts with ("breaking news" -> "breaking")
+        expanded = {}
+        for kw in live:
+            hits = {(category, kw) for category in live[kw]}
+            for other, other_cats in live.items():
+                if other != kw and kw.startswith(other) and (
+                        not self._whole[other] or not kw[len(other)].isalnum()):
+                    hits.update((category, other) for category in other_cats)
+            expanded[kw] = tuple(sorted(hits))
+        self._expanded = expanded
+        return pattern
+
+    def tag(self, text: str) -> Dict[str, List[str]]:
+        """Category -> matched keywords (in order of appearance), one pass over `text`."""
+        with self._lock:
+            if self._pattern is None:
+                self._pattern = self._compile()
+            pattern, expanded = self._pattern, self._expanded
+        found: Dict[str, List[str]] = {}
+        for match in pattern.finditer(text.lower()):
+            for category, kw in expanded[match.group(1)]:
+                found.setdefault(category, []).append(kw)
+        return found
+
+
+matcher = KeywordMatcher()
+
+
+def register(category: str, keywords: Iterable[str], whole_words: bool = True) -> str:
+    """Register a keyword list on the process-wide matcher."""
+    return matcher.register(category, keywords, whole_words)
+
+
+@lru_cache(maxsize=4096)
+def tag_query(text: str) -> FrozenSet[str]:
+    """Every registered category that matches `text` (memoised per string)."""
+    return frozenset(matcher.tag(text))
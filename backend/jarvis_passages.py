@@ -0,0 +1,250 @@
+"""
+JARVIS Passages — relevance-ranked context packing
+
+Knowledge fusion used to stitch the retrieved text together in source order
+(web, then books, papers, ...) and cut whatever did not fit. This module
+ranks the text instead:
+
+  split    every source is split into passages: one per result block
+           (blank-line separated), long blocks into sentence windows of
+           about PASSAGE_MAX_WORDS words that keep the block's title and
+           its Source/Link line
+  score    BM25 of each passage against the query, vectorized with NumPy
+           (term-frequency matrix over the query terms only); pure Python
+           when NumPy is not installed
+  dedupe   word 4-gram shingles, hashed; a passage whose Jaccard similarity
+           to one already kept is >= DEDUPE_THRESHOLD is dropped (the same
+           story from Tavily and Sonar, reprinted abstracts, ...)
+  pack     highest score first into the token budget, so a later tail cut
+           (jarvis_prompt.fit_prompt) drops the least relevant text
+
+    context = pack_passages("isro launch", {"web": tavily_text, "sonar": sonar_text}, 2500)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from jarvis_prompt import estimate_tokens, trim_to_tokens
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+PASSAGE_MAX_WORDS = int(os.environ.get("PASSAGE_MAX_WORDS", "90"))
+DEDUPE_THRESHOLD = float(os.environ.get("PASSAGE_DEDUPE_THRESHOLD", "0.5"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+SHINGLE_SIZE = 4
+
+_WORD = re.compile(r"[^\W_]+")
+_SENTENCE = re.compile(r".+?(?:[.!?]+(?=\s)|$)\s*", re.DOTALL)
+_REF_LINE = re.compile(r"^(?:Source:|Link:|Sources:|- )?\s*https?://\S+$|^Sources:$")
+_STOPWORDS = frozenset(
+    "a an the is are was were be been of in on at to for and or but with by from as that this it its "
+    "what who whom which when where why how do does did can could should would will about into me my "
+    "tell please give show i you your we our".split()
+)
+
+
+def _stem(word: str) -> str:
+    # Plural/verb "s" only; enough to match "launches"/"launch", "papers"/"paper"
+    if len(word) > 4 and (word.endswith(("ches", "shes")) or (word.endswith("es") and word[-3] in "sxz")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased, stemmed words without stopwords."""
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _is_ref(line: str) -> bool:
+    return bool(_REF_LINE.match(line.strip()))
+
+
+class Passage:
+    __slots__ = ("source", "text", "position", "terms", "tokens", "score", "fingerprint")
+
+    def __init__(self, source: str, text: str, position: int):
+        self.source = source
+        self.text = text
+        self.position = position
+        self.terms = terms(text)
+        self.tokens = estimate_tokens(text)
+        self.score = 0.0
+        # Titles and URLs differ between reprints of the same story; compare the body
+        lines = [line for line in text.split("\n") if not _is_ref(line)]
+        body = lines[1:] if len(lines) > 1 else lines
+        self.fingerprint = shingles(terms(" ".join(body)))
+
+
+def _split_block(block: str, max_words: int) -> List[str]:
+    lines = block.split("\n")
+    refs = [line for line in lines if _is_ref(line)]
+    body = [line for line in lines if line not in refs]
+    if len(block.split()) <= max_words or not body:
+        return [block]
+    # Short first line is the result's title; it goes with every window
+    title = body.pop(0) if len(body) > 1 and len(body[0].split()) <= 15 else ""
+    windows, current, words = [], [], 0
+    for sentence in _SENTENCE.findall(" ".join(body)):
+        n = len(sentence.split())
+        if current and words + n > max_words:
+            windows.append("".join(current).strip())
+            current, words = [], 0
+        current.append(sentence)
+        words += n
+    if current:
+        windows.append("".join(current).strip())
+    suffix = "\n" + "\n".join(refs) if refs else ""
+    return [(f"{title}\n" if title else "") + window + suffix for window in windows]
+
+
+def split_passages(source: str, text: str, max_words: int = PASSAGE_MAX_WORDS,
+                   start: int = 0) -> List[Passage]:
+    passages = []
+    for block in re.split(r"\n\s*\n", text or ""):
+        block = block.strip()
+        if block:
+            for piece in _split_block(block, max_words):
+                passages.append(Passage(source, piece, start + len(passages)))
+    return passages
+
+
+def _bm25_numpy(query: List[str], passages: Sequence[Passage]) -> List[float]:
+    vocab = {term: i for i, term in enumerate(dict.fromkeys(query))}
+    n, q = len(passages), len(vocab)
+    lengths = np.fromiter((len(p.terms) for p in passages), dtype=np.float64, count=n)
+    # (passage, term) pairs for query terms only, counted in one bincount
+    doc_ids, term_ids = [], []
+    for i, p in enumerate(passages):
+        for term in p.terms:
+            j = vocab.get(term)
+            if j is not None:
+                doc_ids.append(i)
+                term_ids.append(j)
+    if not doc_ids:
+        return [0.0] * n
+    flat = np.asarray(doc_ids, dtype=np.int64) * q + np.asarray(term_ids, dtype=np.int64)
+    tf = np.bincount(flat, minlength=n * q).reshape(n, q).astype(np.float64)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avgdl = lengths.mean() or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl)
+    scores = (tf * (BM25_K1 + 1) / (tf + norm[:, None])) @ idf
+    return scores.tolist()
+
+
+def _bm25_python(query: List[str], passages: Sequence[Passage]) -> List[float]:
+    query = list(dict.fromkeys(query))
+    n = len(passages)
+    counts = []
+    for p in passages:
+        c: Dict[str, int] = {}
+        for term in p.terms:
+            c[term] = c.get(term, 0) + 1
+        counts.append(c)
+    df = {t: sum(1 for c in counts if t in c) for t in query}
+    idf = {t: math.log1p((n - df[t] + 0.5) / (df[t] + 0.5)) for t in query}
+    avgdl = (sum(len(p.terms) for p in passages) / n) or 1.0
+    scores = []
+    for p, c in zip(passages, counts):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(p.terms) / avgdl)
+        scores.append(sum(idf[t] * c[t] * (BM25_K1 + 1) / (c[t] + norm) for t in query if t in c))
+    return scores
+
+
+def bm25_scores(query: str, passages: Sequence[Passage]) -> List[float]:
+    query_terms = terms(query)
+    if not passages or not query_terms:
+        return [0.0] * len(passages)
+    if NUMPY_AVAILABLE:
+        return _bm25_numpy(query_terms, passages)
+    return _bm25_python(query_terms, passages)
+
+
+def shingles(words: List[str], size: int = SHINGLE_SIZE) -> frozenset:
+    if len(words) < size:
+        return frozenset(zlib.crc32(w.encode("utf-8")) for w in words)
+    return frozenset(zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+                     for i in range(len(words) - size + 1))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class PassageStats:
+    """Ranking and packing counters (/ops/cache-metrics)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"packs": 0, "passages": 0, "duplicates": 0, "packed": 0, "dropped": 0,
+                       "tokens_in": 0, "tokens_out": 0}
+
+    def record(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.counts[key] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self.counts)
+        out["scorer"] = "bm25-numpy" if NUMPY_AVAILABLE else "bm25"
+        return out
+
+
+passage_stats = PassageStats()
+
+
+def pack_passages(query: str, sources: Dict[str, str], max_tokens: int,
+                  labels: Optional[Dict[str, str]] = None) -> str:
+    """
+    The most relevant, non-duplicate passages of `sources` (key -> text)
+    that fit in max_tokens, best first. With more than one source each
+    passage is prefixed by labels[key].
+    """
+    passages: List[Passage] = []
+    for key, text in sources.items():
+        passages += split_passages(key, text, start=len(passages))
+    if not passages:
+        return ""
+    for p, score in zip(passages, bm25_scores(query, passages)):
+        p.score = score
+    # Ties (and the no-match case) keep retrieval order
+    ranked = sorted(passages, key=lambda p: (-p.score, p.position))
+
+    tag = len(sources) > 1 and labels
+    kept, seen, used, duplicates = [], [], 0, 0
+    for p in ranked:
+        if any(_jaccard(p.fingerprint, other) >= DEDUPE_THRESHOLD for other in seen):
+            duplicates += 1
+            continue
+        text = f"{labels.get(p.source, '')} {p.text}".strip() if tag else p.text
+        cost = estimate_tokens(text) + 1
+        if used + cost > max_tokens:
+            if not kept and max_tokens > 0:
+                kept.append(trim_to_tokens(text, max_tokens))
+                used = max_tokens
+            continue
+        seen.append(p.fingerprint)
+        kept.append(text)
+        used += cost
+
+    passage_stats.record(packs=1, passages=len(passages), duplicates=duplicates, packed=len(kept),
+                         dropped=len(passages) - duplicates - len(kept),
+                         tokens_in=sum(p.tokens for p in passages), tokens_out=used)
+    return "\n\n".join(kept)
@@ -0,0 +1,159 @@
+"""
+JARVIS Sampling Profiler — safe to run inside a live worker
+
+A side thread wakes every `interval` seconds, snapshots every other thread's
+Python stack via sys._current_frames() and counts identical stacks. Nothing
+is installed on the request threads (no sys.setprofile hook), so the cost to
+traffic is one stack walk per thread per tick, and the profiler exits on its
+own when the duration elapses.
+
+Output is the "collapsed stack" format consumed by flamegraph.pl and
+speedscope:
+
+    thread:MainThread;handle_query_with_moe (app.py:1530);scrape_url_content (app.py:512) 42
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Leaf frames that mean "blocked", not "burning CPU" (filename, function).
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socket.py", "readinto"),
+    ("socket.py", "accept"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+    ("queue.py", "get"),
+    ("socketserver.py", "serve_forever"),
+}
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is already running in this process."""
+
+
+class SamplingProfiler:
+    """One profiling session per process at a time."""
+
+    def __init__(self, max_seconds: float = 30.0, max_stack_depth: int = 64):
+        self.max_seconds = max_seconds
+        self.max_stack_depth = max_stack_depth
+        self._run_lock = threading.Lock()
+        self._last: Optional[dict] = None
+        self._label_cache: Dict[object, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked()
+
+    @property
+    def last_result(self) -> Optional[dict]:
+        return self._last
+
+    def _label(self, code) -> str:
+        label = self._label_cache.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._label_cache[code] = label
+        return label
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+    def _collapse(self, frame, thread_name: str) -> str:
+        parts = []
+        depth = 0
+        while frame is not None and depth < self.max_stack_depth:
+            parts.append(self._label(frame.f_code))
+            frame = frame.f_back
+            depth += 1
+        parts.append(f"thread:{thread_name}")
+        parts.reverse()
+        return ";".join(parts)
+
+    def _sample_loop(self, duration: float, interval: float, include_idle: bool) -> Tuple[Counter, dict]:
+        stacks: Counter = Counter()
+        me = threading.get_ident()
+        ticks = 0
+        samples = 0
+        sampler_time = 0.0
+        started = time.perf_counter()
+        deadline = started + duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            t0 = now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frame = None
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not include_idle and self._is_idle(frame):
+                    continue
+                stacks[self._collapse(frame, names.get(ident, str(ident)))] += 1
+                samples += 1
+            del frame  # don't pin the last sampled frame
+            ticks += 1
+            sampler_time += time.perf_counter() - t0
+            time.sleep(interval)
+        wall = time.perf_counter() - started
+        meta = {
+            "duration_s": round(wall, 3),
+            "interval_ms": round(interval * 1000, 2),
+            "ticks": ticks,
+            "samples": samples,
+            "unique_stacks": len(stacks),
+            "include_idle": include_idle,
+            "sampler_overhead_pct": round(100 * sampler_time / wall, 3) if wall else 0.0,
+        }
+        return stacks, meta
+
+    def profile(self, seconds: float, hz: float = 100.0, include_idle: bool = False) -> dict:
+        """Sample for `seconds` (capped at max_seconds) and return the collapsed stacks."""
+        seconds = max(0.1, min(float(seconds), self.max_seconds))
+        interval = 1.0 / max(1.0, min(float(hz), 1000.0))
+        if not self._run_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            stacks, meta = self._sample_loop(seconds, interval, include_idle)
+        finally:
+            self._run_lock.release()
+        result = {
+            **meta,
+            "pid": os.getpid(),
+            "finished_at": time.time(),
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            "top_leaves": [{"frame": s, "samples": c} for s, c in _leaf_counts(stacks).most_common(15)],
+        }
+        self._last = result
+        return result
+
+    def start_background(self, seconds: float, hz: float = 100.0, include_idle: bool = False) -> None:
+        """Detached profile; poll last_result afterwards. Raises ProfilerBusy if one is running."""
+        if self.running:
+            raise ProfilerBusy("A profile is already running in this worker")
+
+        def _run():
+            try:
+                self.profile(seconds, hz, include_idle)
+            except ProfilerBusy:
+                pass
+
+        threading.Thread(target=_run, name="jarvis-profiler", daemon=True).start()
+
+
+def _leaf_counts(stacks: Counter) -> Counter:
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return leaves
@@ -0,0 +1,259 @@
+"""
+JARVIS Prompt — token budgets for prompt assembly
+
+truncate_to_tokens used to assume 4 characters per token and slice strings
+mid-word. Knowledge fusion capped its sections at 2500 "tokens", then the
+persona, user memory and six history messages went on top without looking
+at the model, which can overflow llama3-8b-8192 once the 2048-token
+completion is reserved, and wastes latency on every other model.
+
+  estimate_tokens  local count: the text is split with the pre-tokenizer
+                   rules of GPT-style BPE vocabularies (cl100k, Llama 3) and
+                   each piece is priced from its length and script. Exact
+                   counts via tiktoken when it is installed.
+  trim_to_tokens   drops whole sentences from the end (or the start) until
+                   the text fits; only a single over-long sentence is cut
+                   at a word boundary
+  allocate         splits a token budget across named parts by priority
+  fit_prompt       persona + question + completion reserve first, then the
+                   rest of the model's window to the latest exchange,
+                   retrieval, memory and older history, in that order
+
+    system_prompt, history, tokens = fit_prompt(
+        "llama3-8b-8192", build_system_prompt, question,
+        retrieval=web_data, memory=memory, history=history)
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+# Pre-tokenizer split (cl100k / Llama 3 style): contractions, words with
+# their leading space, digit groups of up to 3, punctuation runs, whitespace
+_PIECE = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+# Sentence (or line) plus the whitespace that follows it
+_SENTENCE = re.compile(r".+?(?:[.!?…]+[\"')\]]*(?=\s)|\n|$)\s*", re.DOTALL)
+
+MESSAGE_OVERHEAD = 4  # role and separator tokens per chat message
+MODEL_CONTEXT_WINDOWS = {
+    "gemma-7b-it": 8192,
+    "gemini-1.5-flash": 1_048_576,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+@lru_cache(maxsize=65536)
+def _piece_tokens(piece: str) -> int:
+    word = piece.lstrip(" ")
+    if not word:
+        return 1
+    if not piece.isascii():
+        # Non-Latin scripts split into byte-level pieces: ~2 bytes per token
+        return max(1, -(-len(word.encode("utf-8")) // 2))
+    if word[0].isalpha():
+        # Common words up to ~8 letters are single vocabulary entries
+        return 1 if len(word) <= 8 else -(-len(word) // 5)
+    if word[0].isspace() or word[0].isdigit():
+        return 1
+    return -(-len(word.rstrip("\r\n")) // 2) or 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count of `text` (exact with tiktoken)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return sum(map(_piece_tokens, _PIECE.findall(text)))
+
+
+def _cut_words(text: str, max_tokens: int, from_end: bool) -> str:
+    words = text.split(" ")
+    if from_end:
+        words.reverse()
+    kept, used = [], 1  # 1 for the ellipsis
+    for word in words:
+        cost = estimate_tokens(" " + word)
+        if used + cost > max_tokens:
+            break
+        kept.append(word)
+        used += cost
+    if not kept:
+        return ""
+    if from_end:
+        return "…" + " ".join(reversed(kept))
+    return " ".join(kept) + "…"
+
+
+def trim_to_tokens(text: str, max_tokens: int, from_end: bool = False) -> str:
+    """
+    Longest run of whole sentences from the start of `text` (from the end
+    with from_end=True) that fits in max_tokens.
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = _SENTENCE.findall(text)
+    if from_end:
+        sentences.reverse()
+    kept, used = [], 0
+    for sentence in sentences:
+        # Trailing spaces are priced as they tokenise in the joined text: the
+        # last one merges into the next sentence's first word, not a token of its own
+        body = sentence.rstrip(" ")
+        spaces = len(sentence) - len(body)
+        cost = estimate_tokens(body) + (spaces > 1)
+        if used + cost > max_tokens:
+            if not kept:
+                return _cut_words(sentence.strip(), max_tokens, from_end)
+            break
+        kept.append(sentence)
+        used += cost
+    if from_end:
+        kept.reverse()
+    return "".join(kept).strip()
+
+
+def allocate(budget: int, parts: Sequence[Tuple[str, int, int]]) -> Dict[str, int]:
+    """
+    Split `budget` tokens across (name, wanted, floor) parts, highest priority
+    first. Every part gets up to its floor before any part gets more, so a
+    long history cannot starve retrieval completely; what is left then goes
+    to the parts in priority order.
+    """
+    grants, left = {}, max(0, budget)
+    for name, wanted, floor in parts:
+        grants[name] = min(wanted, floor, left)
+        left -= grants[name]
+    for name, wanted, _ in parts:
+        extra = min(wanted - grants[name], left)
+        grants[name] += extra
+        left -= extra
+    return grants
+
+
+def context_window(model: str) -> int:
+    """Context size of `model`: known table, else the "-8192" style suffix."""
+    if model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model]
+    match = re.search(r"-(\d{4,7})$", model or "")
+    return int(match.group(1)) if match else DEFAULT_CONTEXT_WINDOW
+
+
+def message_tokens(messages: Sequence[dict]) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD for m in messages)
+
+
+def _trim_history(history: List[dict], max_tokens: int) -> List[dict]:
+    """Newest messages that fit, oldest dropped first."""
+    kept, used = [], 0
+    for message in reversed(history):
+        cost = estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
+        if used + cost > max_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    # Don't open on a dangling assistant reply
+    while kept and kept[0].get("role") == "assistant":
+        kept.pop(0)
+    return kept
+
+
+class PromptStats:
+    """Prompt sizes after fitting (/ops/cache-metrics)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fits = 0
+        self.trimmed = 0
+        self.over_budget = 0
+        self.tokens_total = 0
+        self.tokens_max = 0
+        self.tokens_saved = 0
+
+    def record(self, tokens: int, saved: int, budget: int):
+        with self._lock:
+            self.fits += 1
+            self.tokens_total += tokens
+            self.tokens_max = max(self.tokens_max, tokens)
+            if saved:
+                self.trimmed += 1
+                self.tokens_saved += saved
+            if tokens > budget:
+                self.over_budget += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fits": self.fits,
+                "trimmed": self.trimmed,
+                "over_budget": self.over_budget,
+                "avg_prompt_tokens": round(self.tokens_total / self.fits, 1) if self.fits else 0.0,
+                "max_prompt_tokens": self.tokens_max,
+                "tokens_saved": self.tokens_saved,
+                "estimator": "tiktoken" if TIKTOKEN_AVAILABLE else "approx",
+            }
+
+
+prompt_stats = PromptStats()
+
+
+def fit_prompt(model: str, build: Callable[[str, str], str], question: str, retrieval: str = "",
+               memory: str = "", history: Optional[List[dict]] = None, completion_tokens: int = 2048,
+               margin: float = 0.05, memory_floor: int = 200, retrieval_floor: int = 400
+               ) -> Tuple[str, List[dict], int]:
+    """
+    System prompt and history that fit `model`'s context window.
+
+    build(retrieval, memory) renders the system prompt; its cost without
+    either is the fixed persona cost. Returns (system_prompt, history,
+    prompt_tokens); the count is logged when anything had to be trimmed.
+    """
+    history = list(history or [])
+    window = int(context_window(model) * (1 - margin)) - completion_tokens
+    # Placeholders so the builder's retrieval/memory framing counts as fixed cost
+    persona = build("." if retrieval else "", "." if memory else "")
+    fixed = estimate_tokens(persona) + estimate_tokens(question) + 2 * MESSAGE_OVERHEAD
+    latest, older = history[-2:], history[:-2]
+    wanted = {
+        "latest": message_tokens(latest),
+        "retrieval": estimate_tokens(retrieval),
+        "memory": estimate_tokens(memory),
+        "older": message_tokens(older),
+    }
+    grants = allocate(window - fixed, [
+        ("latest", wanted["latest"], wanted["latest"]),
+        ("retrieval", wanted["retrieval"], retrieval_floor),
+        ("memory", wanted["memory"], memory_floor),
+        ("older", wanted["older"], 0),
+    ])
+
+    # Retrieval comes packed best-first (jarvis_passages), so a tail cut drops the least relevant text
+    retrieval = trim_to_tokens(retrieval, grants["retrieval"])
+    memory = trim_to_tokens(memory, grants["memory"], from_end=True)
+    history = _trim_history(older, grants["older"]) + _trim_history(latest, grants["latest"])
+
+    system_prompt = build(retrieval, memory)
+    tokens = (estimate_tokens(system_prompt) + estimate_tokens(question)
+              + 2 * MESSAGE_OVERHEAD + message_tokens(history))
+    saved = sum(wanted[k] - grants[k] for k in wanted)
+    prompt_stats.record(tokens, saved, window)
+    if saved:
+        print(f"✂️ [PROMPT] {model}: {tokens} tokens after trimming ~{saved} "
+              f"(window {context_window(model)}, {completion_tokens} reserved for the answer)")
+    return system_prompt, history, tokens
@@ -0,0 +1,352 @@
+"""
+JARVIS Rate Limiter — token buckets with pluggable shared state
+
+Each (route, scope, id) key owns a bucket of `capacity` tokens that refills
+continuously at `capacity / per_seconds` tokens per second. A check is O(1):
+refill by elapsed time, then try to take one token.
+
+Backends:
+  memory — dict in this process (default; limits are per worker)
+  shm    — fixed-size hash table in POSIX shared memory, shared by every
+           worker on the host, guarded by an flock'd lock file
+  redis  — one hash per key, updated atomically by a Lua script; shared by
+           every worker on every host
+
+Idle buckets are swept periodically (memory), reclaimed on collision or by
+a sweep (shm), or expired with PEXPIRE (redis) — a bucket that has refilled
+to capacity carries no state worth keeping.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+    from multiprocessing import shared_memory
+    SHM_AVAILABLE = True
+except ImportError:  # Windows
+    SHM_AVAILABLE = False
+
+
+class Limit:
+    """`capacity` requests per `per_seconds`, refilled smoothly."""
+
+    __slots__ = ("capacity", "per_seconds", "rate")
+
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = float(capacity)
+        self.per_seconds = float(per_seconds)
+        self.rate = self.capacity / self.per_seconds
+
+    @property
+    def idle_after(self) -> float:
+        """Seconds after which an untouched bucket is full again."""
+        return self.per_seconds
+
+    def __repr__(self) -> str:
+        return f"Limit({self.capacity:g}/{self.per_seconds:g}s)"
+
+
+def parse_rules(spec: str) -> Dict[str, Limit]:
+    """Parse "/chat=3/10,/ask=10/60" into {route: Limit}. Bad entries are skipped."""
+    rules: Dict[str, Limit] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        route, _, value = item.partition("=")
+        count, _, seconds = value.partition("/")
+        try:
+            limit = Limit(float(count), float(seconds or 1))
+        except (ValueError, ZeroDivisionError):
+            print(f"⚠️ [RATE-LIMIT] Ignoring bad rule: {item}")
+            continue
+        rules[route.strip()] = limit
+    return rules
+
+
+def _refill_and_take(tokens: float, last: float, now: float, limit: Limit, cost: float) -> Tuple[bool, float, float]:
+    """Shared bucket arithmetic. Returns (allowed, new_tokens, retry_after)."""
+    tokens = min(limit.capacity, tokens + max(0.0, now - last) * limit.rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / limit.rate
+
+
+# ═══════════════════════════════════════════
+# Backends
+# ═══════════════════════════════════════════
+
+class InProcessBucketStore:
+    """Per-process buckets: {key: [tokens, last_ts]}."""
+
+    name = "memory"
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self._max_idle = 0.0
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [limit.capacity, now]
+            allowed, bucket[0], retry = _refill_and_take(bucket[0], bucket[1], now, limit, cost)
+            bucket[1] = now
+            self._max_idle = max(self._max_idle, limit.idle_after)
+            if now - self._last_sweep >= self._sweep_interval:
+                self._sweep_locked(now)
+        return allowed, retry
+
+    def _sweep_locked(self, now: float):
+        cutoff = now - self._max_idle
+        idle = [k for k, b in self._buckets.items() if b[1] <= cutoff]
+        for k in idle:
+            del self._buckets[k]
+        self._last_sweep = now
+
+    def sweep(self) -> int:
+        with self._lock:
+            before = len(self._buckets)
+            self._sweep_locked(time.monotonic())
+            return before - len(self._buckets)
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class SharedMemoryBucketStore:
+    """Host-wide buckets in a named shared-memory table.
+
+    Layout: `slots` records of (key_hash u64, tokens f64, last f64). A key
+    hashes to a window of PROBE consecutive slots; lookups scan the whole
+    window, so slots can be cleared in place without tombstones. When the
+    window is full the stalest slot is evicted, which can only make the
+    limiter more permissive, never stricter.
+    """
+
+    name = "shm"
+    RECORD = struct.Struct("<Qdd")
+    PROBE = 8
+
+    def __init__(self, segment: str = "jarvis_ratelimit", slots: int = 65536, sweep_interval: float = 60.0):
+        if not SHM_AVAILABLE:
+            raise RuntimeError("Shared-memory rate limiting needs POSIX shared_memory + fcntl")
+        self.slots = slots
+        size = slots * self.RECORD.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=segment, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=segment, create=False)
+        # Workers attach and detach independently; the segment must outlive any one of them.
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        if self._shm.size < size:
+            raise RuntimeError(f"Shared segment {segment} is smaller than {size} bytes")
+        self._buf = self._shm.buf
+        lock_path = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"{segment}.lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()  # flock is per-process; serialize our own threads too
+        self._sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self._max_idle = 0.0
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return h or 1  # 0 marks an empty slot
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        # Wall clock, not monotonic: timestamps are compared across processes.
+        now = time.time()
+        h = self._hash(key)
+        base = h % self.slots
+        rec = self.RECORD
+        with self._locked():
+            found = free = None
+            stalest, stalest_ts = None, float("inf")
+            for i in range(self.PROBE):
+                slot = (base + i) % self.slots
+                off = slot * rec.size
+                kh, tokens, last = rec.unpack_from(self._buf, off)
+                if kh == h:
+                    found = (off, tokens, last)
+                    break
+                if kh == 0 or now - last >= limit.idle_after:
+                    if free is None:
+                        free = off
+                elif last < stalest_ts:
+                    stalest, stalest_ts = off, last
+            if found is None:
+                off = free if free is not None else stalest
+                found = (off, limit.capacity, now)
+            off, tokens, last = found
+            allowed, tokens, retry = _refill_and_take(tokens, last, now, limit, cost)
+            rec.pack_into(self._buf, off, h, tokens, now)
+            self._max_idle = max(self._max_idle, limit.idle_after)
+            if now - self._last_sweep >= self._sweep_interval:
+                self._sweep_locked(now)
+        return allowed, retry
+
+    def _sweep_locked(self, now: float) -> int:
+        rec = self.RECORD
+        cutoff = now - self._max_idle
+        cleared = 0
+        for slot in range(self.slots):
+            off = slot * rec.size
+            kh, _, last = rec.unpack_from(self._buf, off)
+            if kh and last <= cutoff:
+                rec.pack_into(self._buf, off, 0, 0.0, 0.0)
+                cleared += 1
+        self._last_sweep = now
+        return cleared
+
+    def sweep(self) -> int:
+        with self._locked():
+            return self._sweep_locked(time.time())
+
+    def size(self) -> int:
+        rec = self.RECORD
+        return sum(1 for slot in range(self.slots) if rec.unpack_from(self._buf, slot * rec.size)[0])
+
+
+class RedisBucketStore:
+    """Cluster-wide buckets; refill + take runs atomically inside Redis."""
+
+    name = "redis"
+    LUA = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+local last = tonumber(redis.call('HGET', KEYS[1], 'ts'))
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+if tokens == nil then
+  tokens = capacity
+  last = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry)}
+"""
+
+    def __init__(self, client, prefix: str = "jarvis:rl:"):
+        self._client = client
+        self._prefix = prefix
+        self._script = client.register_script(self.LUA)
+        self._fallback = InProcessBucketStore()
+        self.errors = 0
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        try:
+            allowed, retry = self._script(
+                keys=[self._prefix + key],
+                args=[limit.capacity, limit.rate, time.time(), cost],
+            )
+            return bool(int(allowed)), float(retry)
+        except Exception as e:
+            # Redis down: keep limiting per worker rather than failing open
+            self.errors += 1
+            if self.errors == 1 or self.errors % 100 == 0:
+                print(f"⚠️ [RATE-LIMIT] Redis error ({self.errors}), using local buckets: {e}")
+            return self._fallback.take(key, limit, cost)
+
+    def sweep(self) -> int:
+        return self._fallback.sweep()  # Redis expires its own keys
+
+    def size(self) -> int:
+        return self._fallback.size()
+
+
+# ═══════════════════════════════════════════
+# Limiter facade
+# ═══════════════════════════════════════════
+
+class RateLimiter:
+    """Applies per-route limits to the caller's IP and, separately, its user_id."""
+
+    def __init__(self, store, ip_rules: Dict[str, Limit], user_rules: Optional[Dict[str, Limit]] = None):
+        self.store = store
+        self.ip_rules = ip_rules
+        self.user_rules = user_rules or {}
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def check(self, route: str, ip: str, user_id: Optional[str] = None) -> Tuple[bool, float]:
+        """Returns (allowed, retry_after_seconds). Routes without a rule are unlimited."""
+        checks = []
+        if route in self.user_rules and user_id and user_id != ip:
+            checks.append((f"{route}|u|{user_id}", self.user_rules[route]))
+        if route in self.ip_rules:
+            checks.append((f"{route}|ip|{ip}", self.ip_rules[route]))
+        for key, limit in checks:
+            allowed, retry = self.store.take(key, limit)
+            if not allowed:
+                self._count(route, "limited")
+                return False, retry
+        if checks:
+            self._count(route, "allowed")
+        return True, 0.0
+
+    def _count(self, route: str, outcome: str):
+        with self._lock:
+            self._counts[f"{route}:{outcome}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "backend": self.store.name,
+            "tracked_buckets": self.store.size(),
+            "ip_rules": {k: repr(v) for k, v in self.ip_rules.items()},
+            "user_rules": {k: repr(v) for k, v in self.user_rules.items()},
+            "decisions": counts,
+        }
+
+
+def build_store(backend: str, redis_client=None, shm_slots: int = 65536):
+    """Pick a backend by name, degrading to in-process when it can't be used."""
+    backend = (backend or "memory").lower()
+    try:
+        if backend == "redis":
+            if redis_client is None:
+                raise RuntimeError("REDIS_URL not configured")
+            return RedisBucketStore(redis_client)
+        if backend == "shm":
+            return SharedMemoryBucketStore(slots=shm_slots)
+    except Exception as e:
+        print(f"⚠️ [RATE-LIMIT] {backend} backend unavailable ({e}); using in-process buckets")
+    return InProcessBucketStore()
@@ -0,0 +1,259 @@
+"""
+JARVIS Request Tracing — lightweight in-process spans
+
+A trace is opened once per request (see app.py § 4b) and carried in a
+ContextVar, so any function on the request path can open a child span
+without threading a handle through its arguments:
+
+    with span("tavily.search", keys=3):
+        ...
+
+    @traced("llm.gemini")
+    def call_gemini_text(...): ...
+
+When no trace is active, span() returns a shared no-op object and traced()
+falls straight through to the wrapped function, so instrumented code costs a
+single ContextVar lookup when tracing is disabled.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("jarvis_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("jarvis_span", default=None)
+
+
+class Span:
+    """One timed stage inside a trace."""
+
+    __slots__ = ("trace", "name", "depth", "start", "end", "attrs", "error", "_token")
+
+    def __init__(self, trace: "Trace", name: str, depth: int, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.depth = depth
+        self.attrs = attrs
+        self.start = 0.0
+        self.end = 0.0
+        self.error = ""
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        return False
+
+
+class _NoopSpan:
+    """Returned by span() when no trace is active."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded for a single request."""
+
+    def __init__(self, name: str, attrs: Optional[dict] = None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = 0.0
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()  # spans may be opened from worker threads
+
+    def new_span(self, name: str, attrs: dict) -> Span:
+        parent = _current_span.get()
+        depth = parent.depth + 1 if parent is not None and parent.trace is self else 0
+        s = Span(self, name, depth, attrs)
+        with self._lock:
+            self.spans.append(s)
+        return s
+
+    def finish(self):
+        if not self.end:
+            self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end or time.perf_counter()
+        return (end - self.start) * 1000
+
+    def waterfall(self) -> List[dict]:
+        """Spans ordered by start time with offsets relative to the request start."""
+        now = time.perf_counter()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        rows = []
+        for s in spans:
+            end = s.end or now
+            row = {
+                "name": s.name,
+                "depth": s.depth,
+                "offset_ms": round((s.start - self.start) * 1000, 2),
+                "duration_ms": round((end - s.start) * 1000, 2),
+            }
+            if s.attrs:
+                row["attrs"] = s.attrs
+            if s.error:
+                row["error"] = s.error
+            if not s.end:
+                row["open"] = True
+            rows.append(row)
+        return rows
+
+    def breakdown(self) -> Dict[str, float]:
+        """Total milliseconds per span name (top spans first)."""
+        totals: Dict[str, float] = {}
+        now = time.perf_counter()
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            totals[s.name] = totals.get(s.name, 0.0) + ((s.end or now) - s.start) * 1000
+        return {k: round(v, 2) for k, v in sorted(totals.items(), key=lambda kv: -kv[1])}
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "span_count": len(self.spans),
+            "breakdown": self.breakdown(),
+            "waterfall": self.waterfall(),
+        }
+
+
+class SlowTraceBuffer:
+    """Keeps the N slowest finished traces (min-heap, O(log N) per offer)."""
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = max(1, capacity)
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._offered = 0
+        self._lock = threading.Lock()
+
+    def offer(self, trace: Trace):
+        duration = trace.duration_ms
+        with self._lock:
+            self._offered += 1
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, (duration, next(self._seq), trace))
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (duration, next(self._seq), trace))
+
+    def snapshot(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            entries = sorted(self._heap, key=lambda e: e[0], reverse=True)
+        if limit is not None:
+            entries = entries[:limit]
+        return [e[2].to_dict() for e in entries]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "held": len(self._heap),
+                "offered": self._offered,
+                "threshold_ms": round(self._heap[0][0], 2) if len(self._heap) >= self.capacity else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+# ─── Public API ───
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def span(name: str, **attrs):
+    """Open a child span of the active trace, or a no-op if none is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return trace.new_span(name, attrs)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(); defaults the span name to the function name."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.new_span(label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """Bind fn to a copy of the caller's context so spans opened in a worker
+    thread attach to the current trace. Wrap once per submission — a copied
+    context can only be entered by one thread at a time."""
+    ctx = contextvars.copy_context()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def trace_request(name: str, enabled: bool = True, sink: Optional[SlowTraceBuffer] = None,
+                  **attrs) -> Iterator[Optional[Trace]]:
+    """Open a root trace for one request; yields None when disabled."""
+    if not enabled:
+        yield None
+        return
+    trace = Trace(name, attrs)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if sink is not None:
+            sink.offer(trace)
@@ -0,0 +1,328 @@
+"""
+JARVIS URL Cache — extracted page text shared by the scrapers
+
+scrape_url_content, jarvis_browser_scan and DDGSSearchService.extract_content
+all download and parse the same news/Wikipedia pages over and over. This
+cache stores the *extracted* text per (namespace, normalized URL) together
+with the response's ETag / Last-Modified:
+
+  fresh     younger than ttl → served without touching the network
+  stale     conditional GET (If-None-Match / If-Modified-Since); a 304 just
+            re-stamps the entry, a 200 is re-extracted and replaces it
+  negative  403/404 answers are remembered for negative_ttl so blocked
+            sites aren't hammered on every request
+  on error  a stale entry is served rather than nothing
+
+Two tiers, both byte-budgeted LRU: a per-process memory tier in front of a
+disk tier (one JSON file per entry, written atomically) that gunicorn
+workers and the python-backend service can share via URL_CACHE_DIR. Each
+process enforces the disk budget from its own view of the directory, so the
+budget is approximate when several processes write to it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+NEGATIVE_STATUSES = (403, 404)
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+_ENTRY_OVERHEAD = 256  # rough per-entry bookkeeping cost in the memory tier
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the cache key.
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the query string and trims a trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class _Entry:
+    __slots__ = ("url", "text", "etag", "last_modified", "status", "validated_at")
+
+    def __init__(self, url: str, text: Optional[str], etag: str = "", last_modified: str = "",
+                 status: int = 200, validated_at: float = 0.0):
+        self.url = url
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.status = status
+        self.validated_at = validated_at or time.time()
+
+    @property
+    def negative(self) -> bool:
+        return self.status in NEGATIVE_STATUSES
+
+    @property
+    def size(self) -> int:
+        return len((self.text or "").encode("utf-8")) + _ENTRY_OVERHEAD
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class URLCache:
+    def __init__(self, disk_dir: Optional[str] = None, max_memory_bytes: int = 32 << 20,
+                 max_disk_bytes: int = 256 << 20, ttl: float = 1800.0, negative_ttl: float = 3600.0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # file name → bytes, LRU order
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "negative_hits": 0, "negative_stored": 0,
+            "revalidated_304": 0, "refetched": 0, "stale_served": 0,
+            "memory_evictions": 0, "disk_evictions": 0,
+        }
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+                self._load_disk_index()
+            except OSError as e:
+                print(f"⚠️ [URL-CACHE] Disk tier disabled ({disk_dir}): {e}")
+                self.disk_dir = None
+
+    @classmethod
+    def from_env(cls) -> "URLCache":
+        """Configured from URL_CACHE_* environment variables."""
+        return cls(
+            disk_dir=os.environ.get("URL_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "jarvis_url_cache"),
+            max_memory_bytes=int(float(os.environ.get("URL_CACHE_MEMORY_MB", "32")) * (1 << 20)),
+            max_disk_bytes=int(float(os.environ.get("URL_CACHE_DISK_MB", "256")) * (1 << 20)),
+            ttl=float(os.environ.get("URL_CACHE_TTL_SECONDS", "1800")),
+            negative_ttl=float(os.environ.get("URL_CACHE_NEGATIVE_TTL_SECONDS", "3600")),
+        )
+
+    # ─── keys & tiers ───
+
+    @staticmethod
+    def _key(url: str, namespace: str) -> str:
+        return f"{namespace}|{normalize_url(url)}"
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+
+    def _load_disk_index(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(files):
+            self._disk[name] = size
+            self._disk_bytes += size
+
+    def _remember(self, key: str, entry: _Entry):
+        """Insert into the memory tier (caller holds the lock)."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+        if entry.size > self.max_memory_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+            self._counts["memory_evictions"] += 1
+
+    def _write_disk(self, key: str, entry: _Entry):
+        if not self.disk_dir:
+            return
+        name = self._file_name(key)
+        payload = json.dumps({"key": key, **entry.to_dict()}, ensure_ascii=False).encode("utf-8")
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, os.path.join(self.disk_dir, name))
+        except OSError as e:
+            print(f"⚠️ [URL-CACHE] Disk write failed: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += len(payload) - self._disk.pop(name, 0)
+            self._disk[name] = len(payload)
+            doomed = []
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old_name, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                doomed.append(old_name)
+                self._counts["disk_evictions"] += 1
+        for old_name in doomed:
+            try:
+                os.remove(os.path.join(self.disk_dir, old_name))
+            except OSError:
+                pass
+
+    def _read_disk(self, key: str) -> Optional[_Entry]:
+        if not self.disk_dir:
+            return None
+        name = self._file_name(key)
+        try:
+            with open(os.path.join(self.disk_dir, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(name, 0)
+            return None
+        if data.get("key") != key:
+            return None
+        with self._lock:
+            if name in self._disk:
+                self._disk.move_to_end(name)
+        return _Entry(data["url"], data.get("text"), data.get("etag", ""), data.get("last_modified", ""),
+                      data.get("status", 200), data.get("validated_at", 0.0))
+
+    def _lookup(self, key: str) -> Tuple[Optional[_Entry], str]:
+        """(entry, tier) — tier is "memory", "disk" or "" on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry, "memory"
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._remember(key, entry)
+            return entry, "disk"
+        return None, ""
+
+    def _count_hit(self, entry: _Entry, tier: str):
+        with self._lock:
+            self._counts[f"{tier}_hits"] += 1
+            if entry.negative:
+                self._counts["negative_hits"] += 1
+
+    def _store(self, key: str, entry: _Entry):
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _fresh(self, entry: _Entry) -> bool:
+        ttl = self.negative_ttl if entry.negative else self.ttl
+        return time.time() - entry.validated_at < ttl
+
+    # ─── public API ───
+
+    def get(self, url: str, namespace: str = "") -> Optional[str]:
+        """Fresh cached text for url, or None (also None for cached 403/404)."""
+        key = self._key(url, namespace)
+        entry, tier = self._lookup(key)
+        if entry is None or not self._fresh(entry):
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+        self._count_hit(entry, tier)
+        return entry.text
+
+    def put(self, url: str, text: str, namespace: str = "", etag: str = "", last_modified: str = ""):
+        """Store text extracted by the caller (e.g. a rendered browser page)."""
+        self._store(self._key(url, namespace), _Entry(url, text, etag, last_modified))
+
+    def fetch(self, url: str, extract: Callable, namespace: str = "",
+              headers: Optional[dict] = None, timeout: float = 10, session=None,
+              before_fetch: Optional[Callable[[str], None]] = None, stream: bool = False) -> Optional[str]:
+        """Cached GET + extract. Returns None for 403/404 (cached negatively).
+
+        Other HTTP and network errors propagate to the caller unless a stale
+        entry can be served instead. `before_fetch(url)` runs only when the
+        network is actually used (e.g. for per-host politeness delays).
+        With stream=True the body is not preloaded and `extract` receives the
+        response itself (see jarvis_html_text.extract_response); otherwise it
+        receives resp.text.
+        """
+        key = self._key(url, namespace)
+        entry, tier = self._lookup(key)
+        if entry is not None and self._fresh(entry):
+            self._count_hit(entry, tier)
+            return entry.text
+
+        request_headers = dict(headers or {})
+        if entry is not None and not entry.negative:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+        if session is None:
+            import requests as session
+        if before_fetch is not None:
+            before_fetch(url)
+        resp = None
+        try:
+            resp = session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+            if resp.status_code == 304 and entry is not None and not entry.negative:
+                entry.validated_at = time.time()
+                self._store(key, entry)
+                with self._lock:
+                    self._counts["revalidated_304"] += 1
+                return entry.text
+            if resp.status_code in NEGATIVE_STATUSES:
+                self._store(key, _Entry(url, None, status=resp.status_code))
+                with self._lock:
+                    self._counts["negative_stored"] += 1
+                return None
+            resp.raise_for_status()
+            text = extract(resp if stream else resp.text)
+        except Exception:
+            if entry is not None and not entry.negative:
+                with self._lock:
+                    self._counts["stale_served"] += 1
+                return entry.text
+            raise
+        finally:
+            if stream and resp is not None:
+                resp.close()
+
+        with self._lock:
+            self._counts["refetched" if entry is not None else "misses"] += 1
+        self._store(key, _Entry(url, text, resp.headers.get("ETag", ""), resp.headers.get("Last-Modified", "")))
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = self._counts["memory_hits"] + self._counts["disk_hits"] + self._counts["revalidated_304"]
+            total = served + self._counts["misses"] + self._counts["refetched"]
+            return {
+                **self._counts,
+                "hit_ratio": round(served / total, 3) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "disk_dir": self.disk_dir,
+            }
@@ -0,0 +1,491 @@
+"""
+JARVIS Vector Store — local, memory-mapped stand-in for the Pinecone index
+
+The knowledge corpus is a few thousand news/fact vectors, so asking Pinecone
+over the network on every question costs far more than searching locally.
+LocalVectorIndex serves the subset of the Pinecone Index API the backend
+uses (upsert / query / fetch / delete / describe_index_stats) from disk:
+
+  vectors.npy   (capacity, dim) float32 or float16 matrix, memory-mapped;
+                rows are L2-normalised on write so cosine = dot product
+  records.log   append-only JSON lines: {"op": "put", row, id, metadata}
+                and {"op": "del", id}; replayed on open, rewritten by
+                compact() once tombstones pile up
+  store.lock    flock'd while a process allocates rows, grows the matrix,
+                appends to the log or compacts
+
+The ingest process and the backend's readers share one directory: before
+every read or write an index replays the log lines other processes have
+appended and re-maps the matrix if it was grown or compacted elsewhere.
+
+Search is a vectorised dot product + argpartition top-k over live rows.
+Past `ivf_threshold` live vectors an IVF index (spherical k-means over a
+sample, `nprobe` lists scanned per query) is built in memory on open and
+kept up to date on upsert; it is rebuilt when the corpus has grown by half.
+
+    index = open_index("jarvis-knowledge")           # VECTOR_STORE_DIR/jarvis-knowledge
+    index.upsert(vectors=[{"id": "n-1", "values": emb, "metadata": {...}}])
+    index.query(vector=q, top_k=5, include_metadata=True)["matches"]
+
+Select it with VECTOR_BACKEND=local (default: pinecone).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:  # Windows: single-process locking only
+    FLOCK_AVAILABLE = False
+
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "pinecone").strip().lower()
+VECTOR_STORE_DIR = os.environ.get(
+    "VECTOR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_store"))
+VECTOR_STORE_DTYPE = os.environ.get("VECTOR_STORE_DTYPE", "float32")
+IVF_THRESHOLD = int(os.environ.get("VECTOR_STORE_IVF_THRESHOLD", "50000"))
+IVF_NPROBE = int(os.environ.get("VECTOR_STORE_IVF_NPROBE", "8"))
+
+_INITIAL_CAPACITY = 1024
+_SCAN_BLOCK = 16384  # rows converted to float32 at a time when the matrix is float16
+_COMPACT_RATIO = 0.3  # rewrite once this share of rows are tombstones
+
+
+def _identity(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_size
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _matches_filter(metadata: Dict[str, Any], flt: Dict[str, Any]) -> bool:
+    """Pinecone-style metadata filter: equality, $eq/$ne/$in/$nin."""
+    for key, cond in flt.items():
+        value = metadata.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$eq" and value != arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+class _IVF:
+    """Inverted-file index over row numbers; centroids are unit vectors."""
+
+    def __init__(self, centroids: np.ndarray, lists: List[List[int]], built_rows: int):
+        self.centroids = centroids
+        self.lists = lists
+        self.built_rows = built_rows
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, rows: np.ndarray, iterations: int = 8, seed: int = 0) -> "_IVF":
+        rng = np.random.default_rng(seed)
+        nlist = max(1, int(math.sqrt(len(rows))))
+        sample = rows if len(rows) <= 20000 else rng.choice(rows, 20000, replace=False)
+        data = np.asarray(matrix[np.sort(sample)], dtype=np.float32)
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalise(centroids)
+        lists: List[List[int]] = [[] for _ in range(nlist)]
+        for start in range(0, len(rows), _SCAN_BLOCK):
+            block = rows[start:start + _SCAN_BLOCK]
+            assign = np.argmax(np.asarray(matrix[block], dtype=np.float32) @ centroids.T, axis=1)
+            for row, c in zip(block.tolist(), assign.tolist()):
+                lists[c].append(row)
+        return cls(centroids, lists, len(rows))
+
+    def add(self, row: int, vector: np.ndarray):
+        self.lists[int(np.argmax(self.centroids @ vector))].append(row)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = [r for c in probe for r in self.lists[c]]
+        return np.unique(np.asarray(rows, dtype=np.int64))
+
+
+class LocalVectorIndex:
+    """Pinecone-compatible index over a memory-mapped matrix in `path`."""
+
+    def __init__(self, path: str, dimension: int = 768, dtype: str = VECTOR_STORE_DTYPE,
+                 ivf_threshold: int = IVF_THRESHOLD, nprobe: int = IVF_NPROBE):
+        self.path = path
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = max(1, nprobe)
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._meta: List[Optional[Dict[str, Any]]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._ivf: Optional[_IVF] = None
+        os.makedirs(path, exist_ok=True)
+        self._matrix_path = os.path.join(path, "vectors.npy")
+        self._log_path = os.path.join(path, "records.log")
+        self._lock_path = os.path.join(path, "store.lock")
+        self._matrix_id: Optional[Tuple[int, int]] = None  # (inode, size) of the mapped matrix
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0  # end of the last complete log line replayed
+        with self._file_lock():
+            self._open()
+
+    # ─── storage ───
+
+    @contextmanager
+    def _file_lock(self):
+        if not FLOCK_AVAILABLE:
+            yield
+            return
+        with open(self._lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _map(self):
+        # stat around the load so _matrix_id describes the file actually mapped
+        while True:
+            before = _identity(self._matrix_path)
+            matrix = np.load(self._matrix_path, mmap_mode="r+")
+            if _identity(self._matrix_path) == before:
+                break
+        self._matrix, self._matrix_id = matrix, before
+        if len(self._alive) < matrix.shape[0]:
+            self._alive = np.concatenate([self._alive, np.zeros(matrix.shape[0] - len(self._alive), dtype=bool)])
+
+    def _open(self):
+        self._rows, self._ids, self._meta, self._ivf = {}, [], [], None
+        self._alive = np.zeros(0, dtype=bool)
+        if os.path.exists(self._matrix_path):
+            self._map()
+            self.dimension = self._matrix.shape[1]
+            self.dtype = self._matrix.dtype
+        else:
+            self._matrix = np.lib.format.open_memmap(
+                self._matrix_path, mode="w+", dtype=self.dtype, shape=(_INITIAL_CAPACITY, self.dimension))
+            self._matrix_id = _identity(self._matrix_path)
+            self._alive = np.zeros(self._matrix.shape[0], dtype=bool)
+        self._log_inode, self._log_offset = None, 0
+        self._read_log()
+        self._maybe_rebuild_ivf()
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        """Replay log lines appended since the last read; returns the new put records."""
+        if not os.path.exists(self._log_path):
+            return []
+        with open(self._log_path, "rb") as f:
+            self._log_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._log_offset)
+            tail = f.read()
+        end = tail.rfind(b"\n") + 1  # a line without its newline is still being written
+        self._log_offset += end
+        puts = []
+        for line in tail[:end].decode("utf-8", errors="replace").splitlines():
+            try:
+                record = json.loads(line)
+                if record["op"] == "put" and record["id"] not in self._rows:
+                    puts.append(record)
+                self._replay(record)
+            except (ValueError, KeyError):
+                continue  # torn line after a crash
+        return puts
+
+    def _stale(self) -> bool:
+        try:
+            return (_identity(self._log_path) != (self._log_inode, self._log_offset)
+                    or _identity(self._matrix_path) != self._matrix_id)
+        except FileNotFoundError:
+            return False
+
+    def _sync(self):
+        """Readers: refresh under the file lock, only when another process has written."""
+        if self._stale():
+            with self._file_lock():
+                self._refresh()
+
+    def _refresh(self):
+        """Catch up with writes by other processes. Caller holds the file lock."""
+        try:
+            log_inode, log_size = _identity(self._log_path)
+        except FileNotFoundError:
+            return
+        if log_inode != self._log_inode or log_size < self._log_offset:
+            self._open()  # compacted elsewhere: rows were renumbered
+            return
+        puts = self._read_log()
+        # Vectors are written before the log names them, so this mapping holds every replayed row
+        if _identity(self._matrix_path) != self._matrix_id:
+            self._map()
+        if self._ivf is not None:
+            for record in puts:
+                self._ivf.add(record["row"], self._matrix[record["row"]].astype(np.float32))
+        if puts:
+            self._maybe_rebuild_ivf()
+
+    def _replay(self, record: Dict[str, Any]):
+        if record["op"] == "put":
+            row = record["row"]
+            while len(self._ids) <= row:
+                self._ids.append(None)
+                self._meta.append(None)
+            if len(self._alive) <= row:
+                self._alive = np.concatenate([self._alive, np.zeros(row + 1 - len(self._alive), dtype=bool)])
+            self._ids[row] = record["id"]
+            self._meta[row] = record.get("metadata") or {}
+            self._rows[record["id"]] = row
+            self._alive[row] = True
+        elif record["op"] == "del":
+            row = self._rows.pop(record["id"], None)
+            if row is not None:
+                self._alive[row] = False
+                self._meta[row] = None
+
+    def _grow(self, needed: int):
+        """Caller holds the file lock and has refreshed, so the mapping is the current file."""
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        tmp = self._matrix_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=self.dtype, shape=(capacity, self.dimension))
+        grown[:self._matrix.shape[0]] = self._matrix
+        grown.flush()
+        del grown
+        self._matrix.flush()
+        os.replace(tmp, self._matrix_path)
+        self._map()
+
+    def _append_log(self, records: Iterable[Dict[str, Any]]):
+        """Caller holds the file lock and has refreshed."""
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        if not payload:
+            return
+        with open(self._log_path, "ab") as f:
+            # Drop a torn line left by a crashed writer before appending after it
+            if f.tell() > self._log_offset:
+                f.truncate(self._log_offset)
+            f.write(payload)
+            self._log_inode = os.fstat(f.fileno()).st_ino
+        self._log_offset += len(payload)
+
+    # ─── Pinecone Index API ───
+
+    def upsert(self, vectors: Iterable[Any], namespace: str = "", **_kwargs) -> Dict[str, int]:
+        """Accepts dicts {id, values, metadata} or (id, values[, metadata]) tuples.
+        An id repeated within one call is written once, with its last values."""
+        latest = {}
+        for v in vectors:
+            if isinstance(v, dict):
+                latest[str(v["id"])] = (v["values"], v.get("metadata") or {})
+            else:
+                latest[str(v[0])] = (v[1], v[2] if len(v) > 2 else {})
+        items = [(vid, values, metadata) for vid, (values, metadata) in latest.items()]
+        if not items:
+            return {"upserted_count": 0}
+        values = _normalise(np.asarray([it[1] for it in items], dtype=np.float32))
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {values.shape[1]} does not match index dimension {self.dimension}")
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            records = []
+            next_row = len(self._ids)
+            for (vid, _values, metadata) in items:
+                row = self._rows.get(vid)
+                if row is None:
+                    row, next_row = next_row, next_row + 1
+                records.append({"op": "put", "row": row, "id": vid, "metadata": metadata})
+            self._grow(next_row)
+            rows = np.asarray([r["row"] for r in records])
+            self._matrix[rows] = values.astype(self.dtype)
+            self._matrix.flush()
+            # Vectors are on disk before the log names them, so a replay never sees a missing row
+            self._append_log(records)
+            for record, vector in zip(records, values):
+                is_new = record["id"] not in self._rows
+                self._replay(record)
+                if self._ivf is not None and is_new:
+                    self._ivf.add(record["row"], vector)
+            self._maybe_rebuild_ivf()
+        return {"upserted_count": len(items)}
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "",
+               **_kwargs) -> Dict[str, Any]:
+        with self._lock, self._file_lock():
+            self._refresh()
+            targets = list(self._rows) if delete_all else [str(i) for i in (ids or []) if str(i) in self._rows]
+            self._append_log({"op": "del", "id": vid} for vid in targets)
+            for vid in targets:
+                self._replay({"op": "del", "id": vid})
+            if len(self._ids) and (len(self._ids) - len(self._rows)) / len(self._ids) > _COMPACT_RATIO:
+                self._compact()
+        return {}
+
+    def fetch(self, ids: List[str], namespace: str = "", **_kwargs) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            out = {}
+            for vid in ids:
+                row = self._rows.get(str(vid))
+                if row is not None:
+                    out[str(vid)] = {"id": str(vid), "values": self._matrix[row].astype(np.float32).tolist(),
+                                     "metadata": self._meta[row]}
+        return {"vectors": out, "namespace": namespace}
+
+    def query(self, vector: Optional[List[float]] = None, top_k: int = 10, include_metadata: bool = False,
+              include_values: bool = False, filter: Optional[Dict[str, Any]] = None, id: Optional[str] = None,
+              namespace: str = "", **_kwargs) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            if vector is None and id is not None and id in self._rows:
+                vector = self._matrix[self._rows[id]].astype(np.float32)
+            if vector is None or not self._rows:
+                return {"matches": [], "namespace": namespace}
+            q = _normalise(np.asarray(vector, dtype=np.float32))
+            candidates = self._candidates(q)
+            if filter:
+                candidates = np.asarray([r for r in candidates.tolist()
+                                         if _matches_filter(self._meta[r] or {}, filter)], dtype=np.int64)
+            if len(candidates) == 0:
+                return {"matches": [], "namespace": namespace}
+            scores = self._score(candidates, q)
+            k = min(top_k, len(candidates))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            matches = []
+            for i in best.tolist():
+                row = int(candidates[i])
+                match = {"id": self._ids[row], "score": float(scores[i])}
+                if include_metadata:
+                    match["metadata"] = dict(self._meta[row] or {})
+                if include_values:
+                    match["values"] = self._matrix[row].astype(np.float32).tolist()
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def describe_index_stats(self, **_kwargs) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            return {
+                "dimension": self.dimension,
+                "total_vector_count": len(self._rows),
+                "tombstones": len(self._ids) - len(self._rows),
+                "capacity": int(self._matrix.shape[0]),
+                "dtype": str(self.dtype),
+                "ivf_lists": len(self._ivf.lists) if self._ivf is not None else 0,
+                "namespaces": {"": {"vector_count": len(self._rows)}},
+            }
+
+    # ─── search internals ───
+
+    def _candidates(self, q: np.ndarray) -> np.ndarray:
+        if self._ivf is not None:
+            rows = self._ivf.candidates(q, self.nprobe)
+            return rows[self._alive[rows]]
+        return np.flatnonzero(self._alive[:len(self._ids)])
+
+    def _score(self, rows: np.ndarray, q: np.ndarray) -> np.ndarray:
+        contiguous = len(rows) == len(self._ids) or (len(rows) and rows[-1] - rows[0] + 1 == len(rows))
+        if self.dtype == np.float32:
+            block = self._matrix[rows[0]:rows[-1] + 1] if contiguous else self._matrix[rows]
+            return np.asarray(block @ q, dtype=np.float32)
+        # float16 matmul is slow in NumPy; widen in blocks instead of the whole matrix
+        out = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), _SCAN_BLOCK):
+            part = rows[start:start + _SCAN_BLOCK]
+            out[start:start + len(part)] = self._matrix[part].astype(np.float32) @ q
+        return out
+
+    def _maybe_rebuild_ivf(self):
+        live = len(self._rows)
+        if live < self.ivf_threshold:
+            self._ivf = None
+            return
+        if self._ivf is None or live > 1.5 * self._ivf.built_rows:
+            self._ivf = _IVF.build(self._matrix, np.flatnonzero(self._alive[:len(self._ids)]))
+
+    def compact(self):
+        """Drop tombstoned rows: rewrite the matrix and log with live rows only."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._compact()
+
+    def _compact(self):
+        """Caller holds both locks and has refreshed."""
+        live = np.flatnonzero(self._alive[:len(self._ids)])
+        capacity = max(_INITIAL_CAPACITY, 1 << max(0, int(len(live) - 1).bit_length()))
+        tmp_matrix = self._matrix_path + ".tmp"
+        packed = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=self.dtype,
+                                           shape=(capacity, self.dimension))
+        records = []
+        for new_row, old_row in enumerate(live.tolist()):
+            packed[new_row] = self._matrix[old_row]
+            records.append({"op": "put", "row": new_row, "id": self._ids[old_row],
+                            "metadata": self._meta[old_row]})
+        packed.flush()
+        del packed
+        tmp_log = self._log_path + ".tmp"
+        with open(tmp_log, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        self._matrix.flush()
+        os.replace(tmp_matrix, self._matrix_path)
+        os.replace(tmp_log, self._log_path)
+        self._open()
+
+    def close(self):
+        with self._lock:
+            self._matrix.flush()
+
+
+_open_indexes: Dict[str, LocalVectorIndex] = {}
+_open_lock = threading.Lock()
+
+
+def open_index(name: str, dimension: int = 768) -> LocalVectorIndex:
+    """Process-wide LocalVectorIndex for `name` under VECTOR_STORE_DIR."""
+    with _open_lock:
+        if name not in _open_indexes:
+            _open_indexes[name] = LocalVectorIndex(os.path.join(VECTOR_STORE_DIR, name), dimension)
+        return _open_indexes[name]
+
+
+def copy_from_pinecone(pinecone_index, local: LocalVectorIndex, namespace: str = "", batch: int = 100) -> int:
+    """Mirror every vector of a serverless Pinecone index into `local`. Returns the count copied."""
+    copied = 0
+    for ids in pinecone_index.list(namespace=namespace):
+        ids = list(ids)
+        for start in range(0, len(ids), batch):
+            fetched = pinecone_index.fetch(ids=ids[start:start + batch], namespace=namespace)
+            vectors = fetched["vectors"] if isinstance(fetched, dict) else fetched.vectors
+            local.upsert(vectors=[{"id": vid, "values": list(v["values"] if isinstance(v, dict) else v.values),
+                                   "metadata": dict((v.get("metadata") if isinstance(v, dict) else v.metadata) or {})}
+                                  for vid, v in vectors.items()])
+            copied += len(vectors)
+    return copied
@@ -4,10 +4,20 @@
  * 
  * Usage: POST /api/knowledge/search
  * Body: { "query": "latest AI news" }
+ *
+ * Searches and upserts go to one resident `pinecone_embeddings.py --serve`
+ * process (line-delimited JSON over stdin/stdout) instead of spawning Python
+ * per call. Set PINECONE_DAEMON=0 to go back to a process per call.
  */
 
 const { spawn } = require('child_process');
 const path = require('path');
+const PythonDaemon = require('./python-daemon');
+
+const PYTHON_SCRIPT = path.join(__dirname, 'pinecone_embeddings.py');
+const PYTHON_CMD = process.platform === 'win32' ? 'python' : 'python3';
+const USE_DAEMON = process.env.PINECONE_DAEMON !== '0';
+const daemon = new PythonDaemon(PYTHON_SCRIPT, { name: 'Knowledge Daemon', pythonCmd: PYTHON_CMD });
 
 /**
  * Search Pinecone knowledge base for relevant articles
@@ -18,14 +28,30 @@ const path = require('path');
  * @returns {Promise<Array>} Array of relevant articles
  */
 async function searchPineconeKnowledge(query, topK = 5) {
+    if (USE_DAEMON) {
+        return daemon.request('search', { query, top_k: topK });
+    }
+    return searchViaSpawn(query, topK);
+}
+
+/**
+ * Search several queries in one round trip (one embedding call for all of them)
+ * @param {Array<string>} queries
+ * @param {number} topK
+ * @returns {Promise<Array<Array>>} Matches per query, in order
+ */
+async function batchSearchPineconeKnowledge(queries, topK = 5) {
+    if (USE_DAEMON) {
+        return daemon.request('batch_search', { queries, top_k: topK });
+    }
+    return Promise.all(queries.map(q => searchViaSpawn(q, topK)));
+}
+
+function searchViaSpawn(query, topK = 5) {
     return new Promise((resolve, reject) => {
         try {
-            const pythonScript = path.join(__dirname, 'pinecone_embeddings.py');
-            
             // Create Python process
-            // Use 'python3' for Linux/Render, fallback to 'python'
-            const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
-            const pythonProcess = spawn(pythonCmd, [pythonScript, '--search', query, '--top-k', topK.toString()]);
+            const pythonProcess = spawn(PYTHON_CMD, [PYTHON_SCRIPT, '--search', query, '--top-k', topK.toString()]);
             
             let stdout = '';
             let stderr = '';
@@ -68,6 +94,9 @@ async function searchPineconeKnowledge(query, topK = 5) {
  * @param {Array} facts - Array of {id, text, metadata}
  */
 async function upsertKnowledge(facts) {
+    if (USE_DAEMON) {
+        return daemon.request('upsert', { facts }, 120000);
+    }
     return new Promise((resolve, reject) => {
         try {
             const pythonScript = path.join(__dirname, 'pinecone_embeddings.py');
@@ -211,11 +240,13 @@ function knowledgeUpdateEndpoint(req, res) {
 // Export for Express app integration
 module.exports = {
     searchPineconeKnowledge,
+    batchSearchPineconeKnowledge,
     queryKnowledge: searchPineconeKnowledge, // Alias for GlobalKnowledgeEngine
     upsertKnowledge,
     updateKnowledgeBase,
     knowledgeSearchEndpoint,
-    knowledgeUpdateEndpoint
+    knowledgeUpdateEndpoint,
+    stopKnowledgeDaemon: () => daemon.stop()
 };
 
 /**
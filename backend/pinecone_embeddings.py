@@ -2,10 +2,17 @@
 """
 JARVIS Knowledge Graph - Pinecone + Gemini Embeddings
 Fetches today's news, generates embeddings using Gemini, and stores in Pinecone
+
+--serve keeps one process alive and answers line-delimited JSON requests on
+stdin/stdout (see serve_stdio), so callers skip the import/connect cost of a
+fresh process per lookup.
 """
 
 import os
+import sys
+import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from datetime import datetime
 from dotenv import load_dotenv
@@ -14,13 +21,26 @@ import json
 # Third-party imports
 try:
     import google.generativeai as genai
-    from pinecone import Pinecone, ServerlessSpec
     import requests
 except ImportError as e:
     print(f"⚠️ Missing dependency: {e}")
     print("Install with: pip install google-generativeai pinecone python-dotenv requests")
     exit(1)
 
+# VECTOR_BACKEND=local serves the index from disk (jarvis_vector_store); Pinecone is then optional
+from jarvis_vector_store import VECTOR_BACKEND, copy_from_pinecone, open_index
+from jarvis_embed_cache import shared_cache
+from jarvis_ingest import IngestPipeline, embed_chunks, upsert_batches
+try:
+    from pinecone import Pinecone, ServerlessSpec
+    PINECONE_AVAILABLE = True
+except ImportError as e:
+    PINECONE_AVAILABLE = False
+    if VECTOR_BACKEND != "local":
+        print(f"⚠️ Missing dependency: {e}")
+        print("Install with: pip install pinecone (or set VECTOR_BACKEND=local)")
+        exit(1)
+
 # ===== SETUP LOGGING =====
 logging.basicConfig(
     level=logging.INFO,
@@ -38,7 +58,8 @@ NEWS_API_KEY = os.getenv('NEWS_API_KEY')
 PINECONE_INDEX_NAME = os.getenv('PINECONE_INDEX_NAME', 'jarvis-knowledge')
 
 # ===== VALIDATION =====
-if not all([GEMINI_API_KEY, PINECONE_API_KEY, NEWS_API_KEY]):
+USE_PINECONE = VECTOR_BACKEND != "local"
+if not all([GEMINI_API_KEY, PINECONE_API_KEY or not USE_PINECONE, NEWS_API_KEY]):
     logger.error("❌ Missing API keys in .env file")
     logger.error(f"  GEMINI_API_KEY: {'✓' if GEMINI_API_KEY else '✗'}")
     logger.error(f"  PINECONE_API_KEY: {'✓' if PINECONE_API_KEY else '✗'}")
@@ -47,7 +68,7 @@ if not all([GEMINI_API_KEY, PINECONE_API_KEY, NEWS_API_KEY]):
 
 # ===== INITIALIZE APIS =====
 genai.configure(api_key=GEMINI_API_KEY)
-pc = Pinecone(api_key=PINECONE_API_KEY)
+pc = Pinecone(api_key=PINECONE_API_KEY) if PINECONE_AVAILABLE and PINECONE_API_KEY else None
 
 
 class NewsEmbeddingsPipeline:
@@ -60,8 +81,33 @@ class NewsEmbeddingsPipeline:
         self.index = None
         self.embedding_model = "models/text-embedding-004"
         self.news_api_url = "https://newsapi.org/v2/top-headlines"
+        try:
+            self.embed_cache = shared_cache()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache unavailable, embedding everything: {e}")
+            self.embed_cache = None
         logger.info("✅ NewsEmbeddingsPipeline initialized")
     
+    def _embed_batch(self, batch: List[str], task_type: str) -> List[List[float]]:
+        """Embed through the content-hash cache; only misses reach the Gemini API."""
+        def call_api(texts: List[str]) -> List[List[float]]:
+            return genai.embed_content(model=self.embedding_model, content=texts, task_type=task_type)['embedding']
+        
+        if self.embed_cache is None:
+            return call_api(batch)
+        return self.embed_cache.embed(batch, self.embedding_model, task_type, call_api)
+    
+    def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        # Provider-sized chunks, embedded in parallel with per-chunk retry
+        return embed_chunks(texts, lambda batch: self._embed_batch(batch, task_type))
+    
+    def _log_cache_report(self, snapshot: dict):
+        if self.embed_cache is None:
+            return
+        run = self.embed_cache.since(snapshot)
+        logger.info(f"📊 Embedding cache: {run['hits']}/{run['lookups']} hits ({run['hit_ratio']:.0%}), "
+                    f"{run['api_calls']} API calls made, {run['api_calls_saved']} saved")
+    
     def connect_pinecone(self) -> bool:
         """
         Connect to Pinecone index, create if not exists
@@ -69,6 +115,13 @@ class NewsEmbeddingsPipeline:
         Returns:
             bool: True if successful
         """
+        if self.index is not None:
+            return True
+        if not USE_PINECONE:
+            self.index = open_index(PINECONE_INDEX_NAME, dimension=768)
+            logger.info(f"✅ Using local vector index: {self.index.path} "
+                        f"({self.index.describe_index_stats()['total_vector_count']} vectors)")
+            return True
         try:
             logger.info(f"🔌 Connecting to Pinecone index: {PINECONE_INDEX_NAME}")
             
@@ -150,14 +203,8 @@ class NewsEmbeddingsPipeline:
 
             logger.info(f"🧠 Batch generating {len(texts)} embeddings...")
             
-            # Gemini Batch API call
-            response = genai.embed_content(
-                model=self.embedding_model,
-                content=texts,
-                task_type="RETRIEVAL_DOCUMENT"
-            )
-            
-            return response['embedding']
+            # Gemini Batch API call (cached texts are skipped)
+            return self._embed(texts, "RETRIEVAL_DOCUMENT")
             
         except Exception as e:
             logger.error(f"❌ Batch embedding failed: {e}")
@@ -190,8 +237,8 @@ class NewsEmbeddingsPipeline:
                     "metadata": metadata
                 })
             
-            # Upsert call
-            self.index.upsert(vectors=vectors)
+            # Size-capped upsert batches
+            upsert_batches(self.index, vectors)
             logger.info(f"✅ Successfully stored {len(vectors)} vectors in Pinecone")
             return True
             
@@ -217,11 +264,7 @@ class NewsEmbeddingsPipeline:
             logger.info(f"🔍 Searching knowledge base for: '{query}'")
             
             # Generate query embedding
-            query_embedding = genai.embed_content(
-                model=self.embedding_model,
-                content=query,
-                task_type="RETRIEVAL_QUERY"
-            )['embedding']
+            query_embedding = self._embed([query], "RETRIEVAL_QUERY")[0]
             
             # Search Pinecone
             results = self.index.query(
@@ -247,6 +290,7 @@ class NewsEmbeddingsPipeline:
         """
         logger.info("🚀 Starting News Embeddings Pipeline...")
         logger.info("=" * 60)
+        cache_snapshot = self.embed_cache.stats() if self.embed_cache else {}
         
         # Step 1: Connect to Pinecone
         if not self.connect_pinecone():
@@ -278,6 +322,7 @@ class NewsEmbeddingsPipeline:
         
         logger.info("=" * 60)
         logger.info("✅ Pipeline completed successfully!")
+        self._log_cache_report(cache_snapshot)
         
         # Demo: Search the knowledge base
         logger.info("\n📋 Demo: Searching knowledge base...")
@@ -308,35 +353,126 @@ class NewsEmbeddingsPipeline:
             if not self.connect_pinecone():
                 return False
             
-            texts = [f["text"] for f in facts]
-            embeddings = self.generate_embeddings(texts)
-            
-            if not embeddings:
+            report = self.ingest(facts)
+            if report.failed_ids:
+                logger.error(f"❌ {len(report.failed_ids)} facts failed: {report.errors[:3]}")
                 return False
+            logger.info(f"✅ Successfully upserted {report.upserted} facts to Pinecone")
+            return True
             
-            vectors = []
-            for i, fact in enumerate(facts):
+        except Exception as e:
+            logger.error(f"❌ Fact upsert failed: {e}")
+            return False
+
+    def ingest(self, facts, checkpoint_path: str = None):
+        """
+        Stream facts ({"id", "text", "metadata"}) through chunked, parallel
+        embedding and size-capped upserts. Resumable via checkpoint_path.
+        """
+        def items():
+            for fact in facts:
                 # Ensure metadata has 'type': 'fact' and 'text'
-                metadata = fact.get("metadata", {})
+                metadata = dict(fact.get("metadata") or {})
                 metadata.update({
                     "text": fact["text"],
                     "type": "trained_knowledge",
                     "timestamp": datetime.now().isoformat()
                 })
-                
-                vectors.append({
-                    "id": fact["id"],
-                    "values": embeddings[i],
-                    "metadata": metadata
-                })
-            
-            self.index.upsert(vectors=vectors)
-            logger.info(f"✅ Successfully upserted {len(vectors)} facts to Pinecone")
-            return True
-            
+                yield {"id": fact["id"], "text": fact["text"], "metadata": metadata}
+        
+        def progress(report):
+            logger.info(f"   ⏳ {report.upserted} upserted ({report.upserted / max(report.elapsed, 1e-9):.1f} docs/s)")
+        
+        cache_snapshot = self.embed_cache.stats() if self.embed_cache else {}
+        pipeline = IngestPipeline(lambda batch: self._embed_batch(batch, "RETRIEVAL_DOCUMENT"), self.index, checkpoint_path=checkpoint_path, progress=progress)
+        report = pipeline.run(items())
+        logger.info(f"📊 Ingest: {report.summary()}")
+        self._log_cache_report(cache_snapshot)
+        return report
+
+
+# ===== SERVER MODE =====
+SERVE_WORKERS = int(os.getenv('EMBED_SERVE_WORKERS', '8'))
+
+
+def _match_to_dict(match) -> Dict[str, Any]:
+    if isinstance(match, dict):
+        return match
+    if hasattr(match, 'to_dict'):
+        return match.to_dict()
+    return {'id': match.id, 'score': match.score, 'metadata': dict(match.metadata or {})}
+
+
+def handle_request(pipeline: NewsEmbeddingsPipeline, request: Dict[str, Any]) -> Any:
+    """
+    One server-mode operation:
+        {"op": "search", "query": str, "top_k": int}
+        {"op": "batch_search", "queries": [str], "top_k": int}
+        {"op": "upsert", "facts": [{"id", "text", "metadata"}]}
+        {"op": "ping"} / {"op": "stats"}
+    """
+    op = request.get('op')
+    top_k = int(request.get('top_k', 5))
+    if op == 'ping':
+        return 'pong'
+    if op == 'stats':
+        return {'embed_cache': pipeline.embed_cache.stats() if pipeline.embed_cache else None,
+                'backend': VECTOR_BACKEND}
+    if op == 'search':
+        return [_match_to_dict(m) for m in pipeline.search_knowledge(request['query'], top_k=top_k)]
+    if op == 'batch_search':
+        queries = list(request['queries'])
+        # One embed call for every uncached query, then the index lookups in parallel
+        vectors = pipeline._embed(queries, "RETRIEVAL_QUERY")
+        def lookup(vector):
+            result = pipeline.index.query(vector=vector, top_k=top_k, include_metadata=True)
+            return [_match_to_dict(m) for m in result['matches']]
+        with ThreadPoolExecutor(max_workers=min(SERVE_WORKERS, max(1, len(vectors)))) as pool:
+            return list(pool.map(lookup, vectors))
+    if op == 'upsert':
+        return {'success': pipeline.upsert_facts(request['facts'])}
+    raise ValueError(f"Unknown op: {op}")
+
+
+def serve_stdio(pipeline: NewsEmbeddingsPipeline, stdin=None, stdout=None):
+    """
+    Line-delimited JSON server. Each input line is {"id": ..., "op": ..., ...};
+    each reply is {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false,
+    "error": ...}. Requests run concurrently, so replies may arrive out of order.
+    Logs go to stderr; stdout carries replies only.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+
+    def reply(payload: Dict[str, Any]):
+        line = json.dumps(payload, default=str)
+        with write_lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    def run(request: Dict[str, Any]):
+        try:
+            reply({'id': request.get('id'), 'ok': True, 'result': handle_request(pipeline, request)})
         except Exception as e:
-            logger.error(f"❌ Fact upsert failed: {e}")
-            return False
+            logger.error(f"❌ Request {request.get('op')} failed: {e}")
+            reply({'id': request.get('id'), 'ok': False, 'error': str(e)})
+
+    if not pipeline.connect_pinecone():
+        reply({'id': None, 'ok': False, 'error': 'Connection failed'})
+        return
+    reply({'id': None, 'ok': True, 'result': 'ready'})
+    logger.info("✅ Serving embedding/search requests on stdin/stdout")
+    with ThreadPoolExecutor(max_workers=SERVE_WORKERS, thread_name_prefix='embed-serve') as pool:
+        for line in stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                reply({'id': None, 'ok': False, 'error': f'Bad request: {e}'})
+                continue
+            pool.submit(run, request)
 
 
 def main():
@@ -348,12 +484,25 @@ def main():
     parser.add_argument('--search', type=str, help='Search query for vector database')
     parser.add_argument('--top-k', type=int, default=5, help='Number of results for search')
     parser.add_argument('--upsert-facts', type=str, help='JSON string of facts to upsert')
+    parser.add_argument('--sync-local', action='store_true',
+                        help='Copy the Pinecone index into the local vector store (VECTOR_STORE_DIR)')
+    parser.add_argument('--backfill', type=str,
+                        help='JSON-lines file of {"id", "text", "metadata"} items to embed and upsert')
+    parser.add_argument('--checkpoint', type=str,
+                        help='Checkpoint file for --backfill (default: <file>.ckpt); rerun to resume')
+    
+    parser.add_argument('--serve', action='store_true',
+                        help='Stay resident and answer line-delimited JSON requests on stdin/stdout')
     
     args = parser.parse_args()
     
     try:
         pipeline = NewsEmbeddingsPipeline()
         
+        if args.serve:
+            serve_stdio(pipeline)
+            return
+        
         if args.search:
             # Connect and search
             if pipeline.connect_pinecone():
@@ -364,6 +513,25 @@ def main():
                 print(json.dumps({"error": "Connection failed"}))
             return
 
+        if args.sync_local:
+            if pc is None:
+                print(json.dumps({"error": "PINECONE_API_KEY required to sync"}))
+                return
+            copied = copy_from_pinecone(pc.Index(PINECONE_INDEX_NAME), open_index(PINECONE_INDEX_NAME))
+            logger.info(f"✅ Copied {copied} vectors into the local index")
+            print(json.dumps({"success": True, "copied": copied}))
+            return
+
+        if args.backfill:
+            if not pipeline.connect_pinecone():
+                print(json.dumps({"error": "Connection failed"}))
+                return
+            with open(args.backfill, 'r', encoding='utf-8') as f:
+                facts = (json.loads(line) for line in f if line.strip())
+                report = pipeline.ingest(facts, checkpoint_path=args.checkpoint or args.backfill + '.ckpt')
+            print(json.dumps({"success": not report.failed_ids, **report.as_dict()}))
+            return
+
         if args.upsert_facts:
             try:
                 facts = json.loads(args.upsert_facts)
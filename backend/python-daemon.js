@@ -0,0 +1,118 @@
+/**
+ * JARVIS Backend - Resident Python worker
+ *
+ * Runs a Python script in `--serve` mode once and talks to it with
+ * line-delimited JSON over stdin/stdout instead of spawning a process per
+ * call. Protocol:
+ *
+ *   request  {"id": 7, "op": "search", ...payload}
+ *   reply    {"id": 7, "ok": true, "result": ...} | {"id": 7, "ok": false, "error": "..."}
+ *   ready    {"id": null, "ok": true, "result": "ready"}  (once, after startup)
+ *
+ * Replies may come back out of order. If the process dies, pending calls
+ * fail and the next call starts a fresh one.
+ */
+
+const { spawn } = require('child_process');
+const readline = require('readline');
+
+const DEFAULT_PYTHON = process.platform === 'win32' ? 'python' : 'python3';
+
+class PythonDaemon {
+    /**
+     * @param {string} scriptPath - Python script that implements --serve
+     * @param {Object} options - { args, name, pythonCmd, startTimeoutMs }
+     */
+    constructor(scriptPath, options = {}) {
+        this.scriptPath = scriptPath;
+        this.args = options.args || ['--serve'];
+        this.name = options.name || 'Python Daemon';
+        this.pythonCmd = options.pythonCmd || DEFAULT_PYTHON;
+        this.startTimeoutMs = options.startTimeoutMs || 60000;
+        this.proc = null;
+        this.ready = null;
+        this.pending = new Map();
+        this.nextId = 1;
+    }
+
+    start() {
+        if (this.ready) return this.ready;
+        this.ready = new Promise((resolve, reject) => {
+            const proc = spawn(this.pythonCmd, [this.scriptPath, ...this.args]);
+            this.proc = proc;
+            const startTimer = setTimeout(() => {
+                reject(new Error(`${this.name} start timeout`));
+                proc.kill();
+            }, this.startTimeoutMs);
+
+            readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+                let msg;
+                try {
+                    msg = JSON.parse(line);
+                } catch (e) {
+                    return; // stray non-protocol output
+                }
+                if (msg.id === null || msg.id === undefined) {
+                    clearTimeout(startTimer);
+                    if (msg.ok && msg.result === 'ready') resolve();
+                    else reject(new Error(msg.error || `${this.name} failed to start`));
+                    return;
+                }
+                const entry = this.pending.get(msg.id);
+                if (!entry) return;
+                this.pending.delete(msg.id);
+                clearTimeout(entry.timer);
+                if (msg.ok) entry.resolve(msg.result);
+                else entry.reject(new Error(msg.error));
+            });
+            proc.stderr.on('data', (data) => {
+                const output = data.toString().trim();
+                if (output) console.error(`[${this.name}] ${output}`);
+            });
+            proc.on('exit', (code) => {
+                clearTimeout(startTimer);
+                reject(new Error(`${this.name} exited with code ${code}`));
+                for (const entry of this.pending.values()) {
+                    clearTimeout(entry.timer);
+                    entry.reject(new Error(`${this.name} exited with code ${code}`));
+                }
+                this.pending.clear();
+                if (this.proc === proc) {
+                    this.proc = null;
+                    this.ready = null;
+                }
+            });
+            proc.on('error', (err) => {
+                clearTimeout(startTimer);
+                reject(err);
+            });
+        });
+        // A failed start is retried on the next call
+        this.ready.catch(() => { this.ready = null; });
+        return this.ready;
+    }
+
+    async request(op, payload = {}, timeoutMs = 30000) {
+        await this.start();
+        // The process can exit between the ready message and this request
+        const proc = this.proc;
+        if (!proc || !proc.stdin.writable) {
+            throw new Error(`${this.name} exited before ${op} could be sent`);
+        }
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`${this.name} ${op} timeout`));
+            }, timeoutMs);
+            this.pending.set(id, { resolve, reject, timer });
+            proc.stdin.write(JSON.stringify({ id, op, ...payload }) + '\n');
+        });
+    }
+
+    stop() {
+        if (this.proc) this.proc.kill();
+    }
+}
+
+module.exports = PythonDaemon;
@@ -1,9 +1,29 @@
 const { spawn } = require('child_process');
 const path = require('path');
+const PythonDaemon = require('./python-daemon');
+
+// One resident verifier (model loaded once) shared by every SemanticVerifier;
+// SEMANTIC_VERIFIER_DAEMON=0 goes back to a Python process per verification.
+const USE_DAEMON = process.env.SEMANTIC_VERIFIER_DAEMON !== '0';
+let sharedDaemon = null;
+
+function errorResult(message) {
+  return {
+    status: 'error',
+    message,
+    similarity_score: 0.0,
+    is_verified: false,
+    verdict: 'ERROR'
+  };
+}
 
 class SemanticVerifier {
   constructor() {
     this.pythonScript = path.join(__dirname, 'semantic-verifier.py');
+    if (USE_DAEMON && !sharedDaemon) {
+      sharedDaemon = new PythonDaemon(this.pythonScript, { name: 'Semantic Verifier', pythonCmd: 'python' });
+    }
+    this.daemon = USE_DAEMON ? sharedDaemon : null;
   }
 
   /**
@@ -14,9 +34,65 @@ class SemanticVerifier {
    * @returns {Promise<Object>} Verification result with similarity score
    */
   async verifyAnswer(groqAnswer, searchResultsText, threshold = 0.5) {
+    if (this.daemon) {
+      try {
+        return await this.daemon.request('verify', { answer: groqAnswer, evidence: searchResultsText, threshold });
+      } catch (error) {
+        console.error('❌ Semantic verification failed:', error.message);
+        return errorResult(`Verifier daemon failed: ${error.message}`);
+      }
+    }
+    return this.verifyViaSpawn(groqAnswer, searchResultsText, threshold);
+  }
+
+  /**
+   * Verify many (answer, evidence) pairs in one batched call
+   * @param {Array<{answer: string, evidence: string}>} pairs
+   * @param {number} threshold
+   * @returns {Promise<Array<Object>>} One verification result per pair, in order
+   */
+  async verifyBatch(pairs, threshold = 0.5) {
+    if (!pairs.length) return [];
+    if (this.daemon) {
+      try {
+        return await this.daemon.request('verify_batch', { pairs, threshold }, 60000);
+      } catch (error) {
+        console.error('❌ Batch verification failed:', error.message);
+        return pairs.map(() => errorResult(`Verifier daemon failed: ${error.message}`));
+      }
+    }
+    return Promise.all(pairs.map(p => this.verifyViaSpawn(p.answer, p.evidence, threshold)));
+  }
+
+  /**
+   * Throughput / cache metrics of the resident verifier
+   */
+  async stats() {
+    return this.daemon ? this.daemon.request('stats') : null;
+  }
+
+  /**
+   * Claim-level verification: each answer sentence is matched to its
+   * best-supporting evidence passage
+   * @returns {Promise<Object>} Result with per-claim scores, support_ratio and an aggregate verdict
+   */
+  async verifyClaims(groqAnswer, searchResultsText, threshold = 0.5) {
+    if (this.daemon) {
+      try {
+        return await this.daemon.request('verify_claims', { answer: groqAnswer, evidence: searchResultsText, threshold });
+      } catch (error) {
+        console.error('❌ Claim verification failed:', error.message);
+        return errorResult(`Verifier daemon failed: ${error.message}`);
+      }
+    }
+    return this.verifyViaSpawn(groqAnswer, searchResultsText, threshold, ['--claims']);
+  }
+
+  verifyViaSpawn(groqAnswer, searchResultsText, threshold = 0.5, modeArgs = []) {
     return new Promise((resolve, reject) => {
       const pythonProcess = spawn('python', [
         this.pythonScript,
+        ...modeArgs,
         groqAnswer,
         searchResultsText,
         threshold.toString()
@@ -92,9 +168,12 @@ class SemanticVerifier {
     }
 
     const { similarity_score, is_verified, verdict } = verificationResult;
+    const claimsText = verificationResult.mode === 'claims'
+      ? `, ${verificationResult.supported_claims}/${verificationResult.total_claims} claims supported`
+      : '';
     
     if (is_verified) {
-      return `\n\n---\n\n✅ **Verified with Live Data** (Similarity: ${(similarity_score * 100).toFixed(1)}%)`;
+      return `\n\n---\n\n✅ **Verified with Live Data** (Similarity: ${(similarity_score * 100).toFixed(1)}%${claimsText})`;
     } else {
       // Build sources list
       let sourcesText = '';
@@ -105,7 +184,7 @@ class SemanticVerifier {
         });
       }
 
-      return `\n\n---\n\n⚠️ **Potentially Outdated** (Similarity: ${(similarity_score * 100).toFixed(1)}%)\n\n*This answer may be based on older training data. Please refer to the live 2026 sources below for the most current information.*${sourcesText}`;
+      return `\n\n---\n\n⚠️ **${verdict === 'PARTIALLY_VERIFIED' ? 'Partially Verified' : 'Potentially Outdated'}** (Similarity: ${(similarity_score * 100).toFixed(1)}%${claimsText})\n\n*This answer may be based on older training data. Please refer to the live 2026 sources below for the most current information.*${sourcesText}`;
     }
   }
 }
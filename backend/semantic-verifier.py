@@ -1,30 +1,135 @@
 """
 Semantic Verification Layer for JARVIS
 Uses sentence-transformers to check if Groq's answer aligns with live 2026 search results
+
+Modes:
+  python semantic-verifier.py ANSWER EVIDENCE [THRESHOLD]   one-shot, prints one JSON result
+  python semantic-verifier.py --serve                       resident worker (see serve_stdio)
+  python semantic-verifier.py                               interactive self-test
+
+The resident worker loads the model once and speaks line-delimited JSON on
+stdin/stdout. Requests that arrive together are micro-batched: every text of
+every pending (answer, evidence) pair goes through one model.encode() call,
+and embeddings of repeated texts (the same search evidence checked against
+several answers) come from an LRU instead of the model.
 """
 
 import sys
 import json
-from sentence_transformers import SentenceTransformer, util
+import os
+import time
+import hashlib
+import queue
+import re
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = os.environ.get('SEMANTIC_MODEL', 'all-MiniLM-L6-v2')
+ENCODE_BATCH_SIZE = int(os.environ.get('SEMANTIC_ENCODE_BATCH', '64'))
+EMBED_CACHE_SIZE = int(os.environ.get('SEMANTIC_EMBED_CACHE', '4096'))
+BATCH_WINDOW_MS = float(os.environ.get('SEMANTIC_BATCH_WINDOW_MS', '5'))
+MAX_BATCH_PAIRS = int(os.environ.get('SEMANTIC_MAX_BATCH_PAIRS', '256'))
 
 # Load the model (using a lightweight but accurate model)
-print('[DEBUG] Loading Model...')
-model = SentenceTransformer('all-MiniLM-L6-v2')
+print('[DEBUG] Loading Model...', file=sys.stderr)
+model = SentenceTransformer(MODEL_NAME)
+
+
+class CachedEncoder:
+    """model.encode with an LRU of normalised embeddings keyed by text hash."""
+
+    def __init__(self, model, capacity=EMBED_CACHE_SIZE):
+        self.model = model
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'lookups': 0, 'hits': 0, 'encode_calls': 0, 'texts_encoded': 0, 'encode_seconds': 0.0}
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def encode(self, texts):
+        """Return a (len(texts), dim) float32 matrix of unit vectors, one model call for all misses."""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        with self._lock:
+            self.counts['lookups'] += len(keys)
+            for k in keys:
+                vec = self._cache.get(k)
+                if vec is not None:
+                    self._cache.move_to_end(k)
+                    found[k] = vec
+            self.counts['hits'] += sum(1 for k in keys if k in found)
+        missing = OrderedDict()
+        for k, t in zip(keys, texts):
+            if k not in found:
+                missing.setdefault(k, t)
+        if missing:
+            t0 = time.perf_counter()
+            vectors = self.model.encode(list(missing.values()), batch_size=ENCODE_BATCH_SIZE,
+                                        convert_to_numpy=True, normalize_embeddings=True,
+                                        show_progress_bar=False).astype(np.float32)
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.counts['encode_calls'] += 1
+                self.counts['texts_encoded'] += len(missing)
+                self.counts['encode_seconds'] += elapsed
+                for k, vec in zip(missing, vectors):
+                    found[k] = vec
+                    self._cache[k] = vec
+                    if len(self._cache) > self.capacity:
+                        self._cache.popitem(last=False)
+        return np.stack([found[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counts)
+            out['cached'] = len(self._cache)
+            out['hit_ratio'] = round(out['hits'] / out['lookups'], 4) if out['lookups'] else 0.0
+            out['encode_seconds'] = round(out['encode_seconds'], 3)
+            return out
+
+
+encoder = CachedEncoder(model)
+
 
 def calculate_similarity(text1, text2):
     """
     Calculate semantic similarity between two texts
     Returns a score between 0 and 1
     """
-    print('[DEBUG] Comparison Started...')
-    # Generate embeddings
-    embedding1 = model.encode(text1, convert_to_tensor=True)
-    embedding2 = model.encode(text2, convert_to_tensor=True)
-    
-    # Calculate cosine similarity
-    similarity = util.cos_sim(embedding1, embedding2)
-    
-    return float(similarity[0][0])
+    print('[DEBUG] Comparison Started...', file=sys.stderr)
+    # Both texts in one encode call; unit vectors, so cosine similarity is the dot product
+    embeddings = encoder.encode([text1, text2])
+    return float(embeddings[0] @ embeddings[1])
+
+
+def _result(similarity_score, threshold):
+    # Determine verification status
+    is_verified = similarity_score >= threshold
+    return {
+        "status": "success",
+        "similarity_score": round(similarity_score, 4),
+        "is_verified": is_verified,
+        "threshold": threshold,
+        "verdict": "VERIFIED" if is_verified else "POTENTIALLY_OUTDATED",
+        "recommendation": "Answer aligns with live data" if is_verified else "Answer may contain outdated information. Refer to live search results."
+    }
+
+
+def _error(e):
+    return {
+        "status": "error",
+        "message": str(e),
+        "similarity_score": 0.0,
+        "is_verified": False,
+        "verdict": "ERROR"
+    }
+
 
 def verify_answer(groq_answer, search_results_text, threshold=0.5):
     """
@@ -33,46 +138,351 @@ def verify_answer(groq_answer, search_results_text, threshold=0.5):
     try:
         # Calculate similarity
         similarity_score = calculate_similarity(groq_answer, search_results_text)
-        
-        # Determine verification status
-        is_verified = similarity_score >= threshold
-        
-        result = {
-            "status": "success",
-            "similarity_score": round(similarity_score, 4),
-            "is_verified": is_verified,
-            "threshold": threshold,
-            "verdict": "VERIFIED" if is_verified else "POTENTIALLY_OUTDATED",
-            "recommendation": "Answer aligns with live data" if is_verified else "Answer may contain outdated information. Refer to live search results."
-        }
-        
+        return _result(similarity_score, threshold)
+    except Exception as e:
+        return _error(e)
+
+
+def _pair_scores(pairs, vectors):
+    """vectors = encodings of [answers..., evidence...] for `pairs`."""
+    answers, evidence = vectors[:len(pairs)], vectors[len(pairs):]
+    return np.einsum('ij,ij->i', answers, evidence)
+
+
+def verify_pairs(pairs, thresholds):
+    """
+    Verify many (answer, evidence) pairs with a single encode call.
+    `thresholds` is one threshold per pair.
+    """
+    if not pairs:
+        return []
+    scores = _pair_scores(pairs, encoder.encode([a for a, _ in pairs] + [e for _, e in pairs]))
+    return [_result(float(s), t) for s, t in zip(scores, thresholds)]
+
+
+# ===== CLAIM-LEVEL VERIFICATION =====
+
+MAX_CLAIMS = int(os.environ.get('SEMANTIC_MAX_CLAIMS', '24'))
+MAX_PASSAGES = int(os.environ.get('SEMANTIC_MAX_PASSAGES', '64'))
+PASSAGE_SENTENCES = 2       # sliding window of sentences per evidence passage
+MIN_CLAIM_WORDS = 4         # shorter fragments ("Sure!", "Hope this helps.") are not claims
+SUPPORTED_RATIO = 0.7       # share of supported claims for VERIFIED
+PARTIAL_RATIO = 0.4         # ... and for PARTIALLY_VERIFIED
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+
+
+def split_sentences(text):
+    sentences = []
+    for line in text.splitlines():
+        line = _BULLET.sub('', line).strip()
+        if line:
+            sentences.extend(s.strip() for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+
+def split_claims(answer, max_claims=MAX_CLAIMS):
+    """Answer sentences / bullet points that assert something."""
+    claims = [s.strip('*_# ') for s in split_sentences(answer)]
+    return [c for c in claims if len(c.split()) >= MIN_CLAIM_WORDS][:max_claims]
+
+
+def split_passages(evidence, max_passages=MAX_PASSAGES, window=PASSAGE_SENTENCES):
+    """Overlapping windows of `window` sentences, so a fact spanning two sentences stays together."""
+    sentences = split_sentences(evidence)
+    if len(sentences) <= window:
+        return [' '.join(sentences)] if sentences else []
+    return [' '.join(sentences[i:i + window]) for i in range(len(sentences) - window + 1)][:max_passages]
+
+
+def _claims_result(claims, passages, vectors, threshold):
+    """vectors = encodings of [claims..., passages...]."""
+    if not claims or not passages:
+        result = _result(0.0, threshold)
+        result.update({'mode': 'claims', 'claims': [], 'supported_claims': 0, 'total_claims': len(claims),
+                       'support_ratio': 0.0, 'verdict': 'UNVERIFIABLE',
+                       'recommendation': 'No checkable claims or no evidence text.'})
         return result
-        
+    # Full claim x passage similarity matrix in one product
+    sim = vectors[:len(claims)] @ vectors[len(claims):].T
+    best = sim.argmax(axis=1)
+    best_scores = sim[np.arange(len(claims)), best]
+    per_claim = [{
+        'claim': claim,
+        'score': round(float(score), 4),
+        'supported': bool(score >= threshold),
+        'passage': passages[idx],
+        'passage_index': int(idx),
+    } for claim, idx, score in zip(claims, best, best_scores)]
+    supported = sum(c['supported'] for c in per_claim)
+    ratio = supported / len(per_claim)
+    mean_score = float(best_scores.mean())
+
+    result = _result(mean_score, threshold)
+    if ratio >= SUPPORTED_RATIO:
+        verdict, note = 'VERIFIED', 'Most claims are supported by live data'
+    elif ratio >= PARTIAL_RATIO:
+        verdict, note = 'PARTIALLY_VERIFIED', 'Some claims are not supported by live data; check the flagged ones.'
+    else:
+        verdict, note = 'POTENTIALLY_OUTDATED', result['recommendation']
+    result.update({
+        'mode': 'claims',
+        'is_verified': verdict == 'VERIFIED',
+        'verdict': verdict,
+        'recommendation': note,
+        'support_ratio': round(ratio, 4),
+        'supported_claims': supported,
+        'total_claims': len(per_claim),
+        'min_claim_score': round(float(best_scores.min()), 4),
+        'unsupported': [c['claim'] for c in per_claim if not c['supported']],
+        'claims': per_claim,
+    })
+    return result
+
+
+def verify_claims(groq_answer, search_results_text, threshold=0.5):
+    """
+    Claim-level verification: each answer sentence is matched against every
+    evidence passage; the answer is VERIFIED when most claims find support.
+    """
+    try:
+        claims = split_claims(groq_answer)
+        passages = split_passages(search_results_text)
+        vectors = encoder.encode(claims + passages) if claims and passages else None
+        return _claims_result(claims, passages, vectors, threshold)
     except Exception as e:
+        return _error(e)
+
+
+# ===== SERVER MODE =====
+
+class MicroBatcher:
+    """
+    Collects jobs for up to BATCH_WINDOW_MS (or MAX_BATCH_PAIRS comparisons),
+    encodes every job's texts in one call on a single worker thread, then
+    lets each job score its own slice of the embeddings.
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_pairs=MAX_BATCH_PAIRS):
+        self.window = window_ms / 1000.0
+        self.max_pairs = max_pairs
+        self.queue = queue.Queue()
+        self.started = time.time()
+        self.busy_seconds = 0.0
+        self.batch_sizes = deque(maxlen=1000)
+        self.batch_ms = deque(maxlen=1000)
+        self.counts = {'requests': 0, 'pairs': 0, 'texts': 0, 'batches': 0, 'errors': 0}
+        self._thread = threading.Thread(target=self._run, name='verifier-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts, units, score, done):
+        """
+        texts: strings to embed; units: comparisons this job makes (for metrics);
+        score(vectors) -> result; done(result or None, error or None) runs on the worker thread.
+        """
+        self.queue.put((texts, units, score, done))
+
+    def close(self):
+        """Finish queued work, then stop the worker (stdin closed)."""
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            jobs, size, stopping = [job], job[1], False
+            deadline = time.perf_counter() + self.window
+            while size < self.max_pairs:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                jobs.append(job)
+                size += job[1]
+            self._process(jobs)
+            if stopping:
+                return
+
+    def _process(self, jobs):
+        t0 = time.perf_counter()
+        texts = [t for job in jobs for t in job[0]]
+        try:
+            vectors = encoder.encode(texts) if texts else None
+        except Exception as e:
+            if len(jobs) > 1:
+                # Retry one by one so only the job with the bad input fails
+                for job in jobs:
+                    self._process([job])
+                return
+            self.counts['errors'] += 1
+            jobs[0][3](None, e)
+            return
+        offset = 0
+        finished = []
+        for job_texts, _units, score, done in jobs:
+            n = len(job_texts)
+            try:
+                finished.append((done, score(vectors[offset:offset + n] if n else None), None))
+            except Exception as e:
+                self.counts['errors'] += 1
+                finished.append((done, None, e))
+            offset += n
+        elapsed = time.perf_counter() - t0
+        self.busy_seconds += elapsed
+        self.batch_ms.append(elapsed * 1000)
+        self.batch_sizes.append(len(texts))
+        self.counts['batches'] += 1
+        self.counts['requests'] += len(jobs)
+        self.counts['pairs'] += sum(job[1] for job in jobs)
+        self.counts['texts'] += len(texts)
+        for done, result, error in finished:
+            done(result, error)
+
+    def stats(self):
+        uptime = max(1e-9, time.time() - self.started)
+        sizes = list(self.batch_sizes)
+        times = sorted(self.batch_ms)
         return {
-            "status": "error",
-            "message": str(e),
-            "similarity_score": 0.0,
-            "is_verified": False,
-            "verdict": "ERROR"
+            **self.counts,
+            'pairs_per_sec_busy': round(self.counts['pairs'] / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            'pairs_per_sec_uptime': round(self.counts['pairs'] / uptime, 2),
+            'avg_batch_texts': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            'batch_ms_p50': round(times[len(times) // 2], 2) if times else 0.0,
+            'batch_ms_p95': round(times[max(0, int(len(times) * 0.95) - 1)], 2) if times else 0.0,
+            'busy_pct': round(100 * self.busy_seconds / uptime, 2),
+            'encoder': encoder.stats(),
         }
 
+
+def _text(value, field):
+    """Validated before submit: a bad field fails its own request, not the shared batch."""
+    if not isinstance(value, str):
+        raise ValueError(f"'{field}' must be a string, got {type(value).__name__}")
+    return value
+
+
+def _pairs_from(request):
+    if request.get('op') == 'verify':
+        return [(_text(request.get('answer'), 'answer'), _text(request.get('evidence'), 'evidence'))]
+    items = request.get('pairs')
+    if not isinstance(items, list):
+        raise ValueError("'pairs' must be a list")
+    pairs = []
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            answer, evidence = item.get('answer'), item.get('evidence')
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            answer, evidence = item
+        else:
+            raise ValueError(f"pairs[{i}] must be [answer, evidence] or an object")
+        pairs.append((_text(answer, f'pairs[{i}].answer'), _text(evidence, f'pairs[{i}].evidence')))
+    return pairs
+
+
+def _job_for(request):
+    """(texts, units, score) for a verify / verify_batch / verify_claims request."""
+    threshold = float(request.get('threshold', 0.5))
+    if request.get('op') == 'verify_claims':
+        claims = split_claims(_text(request.get('answer'), 'answer'))
+        passages = split_passages(_text(request.get('evidence'), 'evidence'))
+        texts = claims + passages if claims and passages else []
+        return texts, len(claims) * len(passages), lambda v: _claims_result(claims, passages, v, threshold)
+    pairs = _pairs_from(request)
+    single = request.get('op') == 'verify'
+
+    def score(vectors):
+        results = [_result(float(s), threshold) for s in _pair_scores(pairs, vectors)]
+        return results[0] if single else results
+    return [a for a, _ in pairs] + [e for _, e in pairs], len(pairs), score
+
+
+def serve_stdio(stdin=None, stdout=None):
+    """
+    Line-delimited JSON server:
+        {"id": 1, "op": "verify", "answer": str, "evidence": str, "threshold": 0.5}
+        {"id": 2, "op": "verify_batch", "pairs": [[answer, evidence], ...], "threshold": 0.5}
+        {"id": 3, "op": "verify_claims", "answer": str, "evidence": str, "threshold": 0.5}
+        {"id": 3, "op": "stats"} / {"id": 4, "op": "ping"}
+    Replies: {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false, "error": ...}.
+    "verify" / "verify_claims" return one result object, "verify_batch" a list in pair order.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+    batcher = MicroBatcher()
+
+    def reply(payload):
+        line = json.dumps(payload)
+        with write_lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    reply({'id': None, 'ok': True, 'result': 'ready'})
+    print(f'[DEBUG] Serving verification requests ({MODEL_NAME})', file=sys.stderr)
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            reply({'id': None, 'ok': False, 'error': f'Bad request: {e}'})
+            continue
+        rid, op = request.get('id'), request.get('op')
+        try:
+            if op == 'ping':
+                reply({'id': rid, 'ok': True, 'result': 'pong'})
+            elif op == 'stats':
+                reply({'id': rid, 'ok': True, 'result': batcher.stats()})
+            elif op in ('verify', 'verify_batch', 'verify_claims'):
+                def done(result, error, rid=rid):
+                    if error is not None:
+                        reply({'id': rid, 'ok': False, 'error': str(error)})
+                    else:
+                        reply({'id': rid, 'ok': True, 'result': result})
+                texts, units, score = _job_for(request)
+                if op == 'verify_batch' and not texts:
+                    reply({'id': rid, 'ok': True, 'result': []})  # no pairs: nothing to encode
+                else:
+                    batcher.submit(texts, units, score, done)
+            else:
+                reply({'id': rid, 'ok': False, 'error': f'Unknown op: {op}'})
+        except Exception as e:
+            reply({'id': rid, 'ok': False, 'error': f'Bad request: {e}'})
+    batcher.close()
+
+
 if __name__ == "__main__":
-    if len(sys.argv) > 2:
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve_stdio()
+    elif len(sys.argv) > 3 and sys.argv[1] == '--claims':
+        # Claim-level mode: --claims ANSWER EVIDENCE [THRESHOLD]
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+        print(json.dumps(verify_claims(sys.argv[2], sys.argv[3], threshold)))
+        sys.stdout.flush()
+    elif len(sys.argv) > 2:
         # Command-line mode for Node.js integration
         groq_answer = sys.argv[1]
         search_results_text = sys.argv[2]
         threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
-        
+
         result = verify_answer(groq_answer, search_results_text, threshold)
-        
+
         # Output JSON for Node.js and flush
         print(json.dumps(result))
         sys.stdout.flush()
     else:
         # Interactive test mode
         print("🧪 Testing Semantic Verification...\n")
-        
+
         # Test case 1: Similar content
         print("=== TEST 1: Similar Content ===")
         text1 = "AI technology has advanced significantly in 2026 with new regulations"
@@ -80,7 +490,7 @@ if __name__ == "__main__":
         result1 = verify_answer(text1, text2)
         print(f"Similarity: {result1['similarity_score']:.4f}")
         print(f"Verdict: {result1['verdict']}\n")
-        
+
         # Test case 2: Different content
         print("=== TEST 2: Different Content ===")
         text3 = "The weather in Paris is sunny today"
@@ -88,7 +498,7 @@ if __name__ == "__main__":
         result2 = verify_answer(text3, text4)
         print(f"Similarity: {result2['similarity_score']:.4f}")
         print(f"Verdict: {result2['verdict']}\n")
-        
+
         # Test case 3: Outdated vs Current
         print("=== TEST 3: Outdated vs Current ===")
         text5 = "OpenAI released GPT-4 in 2023 as their latest model"
@@ -96,5 +506,5 @@ if __name__ == "__main__":
         result3 = verify_answer(text5, text6)
         print(f"Similarity: {result3['similarity_score']:.4f}")
         print(f"Verdict: {result3['verdict']}\n")
-        
+
         print("✅ Semantic verification tests complete!")
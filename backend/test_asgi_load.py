@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+JARVIS ASGI load test — concurrency scaling per worker
+
+In-process (default): upstream APIs are replaced by an httpx MockTransport
+that sleeps --latency seconds per call, and /ask is driven through one ASGI
+worker at increasing concurrency. A sync gunicorn worker tops out at
+1 / (request latency) req/s; the async worker should scale roughly with
+concurrency until the admission thresholds kick in.
+
+Live: point --url at a running server (gunicorn app:app or
+uvicorn jarvis_asgi:app) to measure the real thing.
+
+    python test_asgi_load.py
+    python test_asgi_load.py --levels 1,16,64 --latency 0.3
+    python test_asgi_load.py --url http://localhost:3000 --levels 1,8,32
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# No per-IP buckets during the run; the load comes from one address.
+os.environ.setdefault("RATE_LIMIT_IP_RULES", "")
+os.environ.setdefault("RATE_LIMIT_USER_RULES", "")
+os.environ.setdefault("TRACING_ENABLED", "0")
+
+import httpx
+
+_counter = itertools.count()
+
+
+def _fake_upstream(latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        host = request.url.host
+        if host == "api.groq.com":
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Simulated answer, Sir. " * 4}}]})
+        if host == "api.tavily.com":
+            return httpx.Response(200, json={"results": [
+                {"title": "Result", "content": "Simulated web content " * 10, "url": "https://example.com/a"},
+            ]})
+        return httpx.Response(200, json={})
+    return httpx.MockTransport(handler)
+
+
+async def _one(client: httpx.AsyncClient, url: str, latencies: list, errors: list):
+    payload = {"question": f"explain load test question {next(_counter)}", "user_id": "loadtest"}
+    t0 = time.perf_counter()
+    try:
+        resp = await client.post(url, json=payload)
+        if resp.status_code != 200:
+            errors.append(resp.status_code)
+    except Exception as e:
+        errors.append(type(e).__name__)
+    latencies.append(time.perf_counter() - t0)
+
+
+async def _run_level(client: httpx.AsyncClient, url: str, concurrency: int, requests_per_worker: int) -> dict:
+    latencies, errors = [], []
+
+    async def worker():
+        for _ in range(requests_per_worker):
+            await _one(client, url, latencies, errors)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def _print_table(rows: list, baseline_rps: float = 0.0):
+    print(f"\n{'conc':>6} {'reqs':>6} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'x sync':>8}")
+    for r in rows:
+        gain = f"{r['rps'] / baseline_rps:8.1f}" if baseline_rps else f"{'-':>8}"
+        print(f"{r['concurrency']:>6} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {gain}")
+
+
+async def run_in_process(levels, latency: float, per_worker: int):
+    import app as core
+    import jarvis_asgi
+
+    # Keep test traffic out of the real history DB and make every upstream "configured"
+    core.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="jarvis_load_"), "load.db")
+    core.init_database()
+    core.GROQ_API_KEY = "test"
+    core.TAVILY_API_KEYS = ["test"]
+    core.GEMINI_AVAILABLE = False
+    core.firebase_db = None
+    core.redis_memory = None
+
+    await jarvis_asgi.upstream.start(transport=_fake_upstream(latency))
+    transport = httpx.ASGITransport(app=jarvis_asgi.app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://jarvis", timeout=120) as client:
+        for c in levels:
+            rows.append(await _run_level(client, "/ask", c, per_worker))
+    await jarvis_asgi.upstream.close()
+
+    # /ask is fusion (web + books in parallel) then Groq: two sequential upstream hops
+    sync_rps = 1.0 / (2 * latency)
+    print(f"\nUpstream latency {latency * 1000:.0f} ms per call; one sync worker ≈ {sync_rps:.1f} req/s")
+    _print_table(rows, sync_rps)
+    print(f"\nadmission: {jarvis_asgi.admission.stats()['decisions']}")
+
+
+async def run_live(url: str, levels, per_worker: int):
+    rows = []
+    async with httpx.AsyncClient(base_url=url, timeout=120,
+                                 limits=httpx.Limits(max_connections=max(levels))) as client:
+        for c in levels:
+            rows.append(await _run_level(client, "/ask", c, per_worker))
+    print(f"\nLive target: {url}")
+    _print_table(rows, rows[0]["rps"] if rows and rows[0]["concurrency"] == 1 else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS ASGI concurrency load test")
+    parser.add_argument("--url", help="Run against a live server instead of in-process")
+    parser.add_argument("--levels", default="1,4,16,64,128", help="Comma-separated concurrency levels")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated upstream latency (s)")
+    parser.add_argument("--per-worker", type=int, default=5, help="Requests per concurrent client")
+    args = parser.parse_args()
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+
+    print("=" * 70)
+    print("JARVIS ASGI LOAD TEST")
+    print("=" * 70)
+    if args.url:
+        asyncio.run(run_live(args.url.rstrip("/"), levels, args.per_worker))
+    else:
+        asyncio.run(run_in_process(levels, args.latency, args.per_worker))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Knowledge search latency: process-per-call vs resident --serve daemon
+
+Spawn model (what pinecone-integration.js did): every lookup starts
+`pinecone_embeddings.py --search`, re-importing the SDKs and reconnecting.
+Daemon model: one `pinecone_embeddings.py --serve` process answers
+line-delimited JSON requests with clients, index handle and caches warm.
+
+Uses the same .env as the backend (real Gemini + Pinecone, or
+VECTOR_BACKEND=local).
+
+    python test_embed_daemon_bench.py
+    python test_embed_daemon_bench.py --calls 20 --concurrency 8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pinecone_embeddings.py")
+# Unique per run and per mode so neither side is served from the embedding cache
+RUN = str(int(time.time()))
+QUERIES = ["latest AI developments", "tech news today", "breaking news", "exam results india",
+           "cricket match score", "climate policy", "stock market update", "space mission launch"]
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[max(0, int(len(values) * p) - 1)] if values else 0.0
+
+
+def bench_spawn(calls: int):
+    latencies = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, SCRIPT, "--search", f"{QUERIES[i % len(QUERIES)]} s{RUN}-{i}",
+                               "--top-k", "5"],
+                              capture_output=True, text=True, timeout=120)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            print(f"❌ spawn call failed: {proc.stderr.strip()[-300:]}")
+            return latencies
+    return latencies
+
+
+class DaemonClient:
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, SCRIPT, "--serve"], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        self.lock = threading.Lock()
+        self.waiters = {}
+        self.next_id = 1
+        ready = json.loads(self.proc.stdout.readline())
+        if not ready.get("ok"):
+            raise RuntimeError(ready.get("error"))
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    def _reader(self):
+        for line in self.proc.stdout:
+            msg = json.loads(line)
+            event, box = self.waiters.pop(msg["id"])
+            box.append(msg)
+            event.set()
+
+    def request(self, op, **payload):
+        event, box = threading.Event(), []
+        with self.lock:
+            rid = self.next_id
+            self.next_id += 1
+            self.waiters[rid] = (event, box)
+            self.proc.stdin.write(json.dumps({"id": rid, "op": op, **payload}) + "\n")
+            self.proc.stdin.flush()
+        event.wait(120)
+        if not box or not box[0]["ok"]:
+            raise RuntimeError(box[0]["error"] if box else "timeout")
+        return box[0]["result"]
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait(timeout=30)
+
+
+def bench_daemon(calls: int, concurrency: int):
+    t0 = time.perf_counter()
+    client = DaemonClient()
+    startup_ms = (time.perf_counter() - t0) * 1000
+
+    sequential = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        client.request("search", query=f"{QUERIES[i % len(QUERIES)]} d{RUN}-{i}", top_k=5)
+        sequential.append((time.perf_counter() - t0) * 1000)
+
+    concurrent_lat = []
+    def worker(w, n):
+        for i in range(n):
+            t = time.perf_counter()
+            client.request("search", query=f"{QUERIES[i % len(QUERIES)]} c{RUN}-{w}-{i}", top_k=5)
+            concurrent_lat.append((time.perf_counter() - t) * 1000)
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w, max(1, calls // concurrency))) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    concurrent_wall = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    client.request("batch_search", queries=[f"{q} b{RUN}" for q in QUERIES], top_k=5)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    client.close()
+    return startup_ms, sequential, concurrent_lat, concurrent_wall, batch_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding daemon vs spawn benchmark")
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("KNOWLEDGE SEARCH: SPAWN PER CALL vs RESIDENT DAEMON")
+    print("=" * 70)
+    spawn = bench_spawn(args.calls)
+    startup, seq, conc, wall, batch_ms = bench_daemon(args.calls, args.concurrency)
+
+    print(f"\n{'mode':<34} {'p50 ms':>9} {'p95 ms':>9} {'calls':>6}")
+    print(f"{'spawn per call':<34} {statistics.median(spawn):>9.1f} {_pct(spawn, 0.95):>9.1f} {len(spawn):>6}")
+    print(f"{'daemon, sequential':<34} {statistics.median(seq):>9.1f} {_pct(seq, 0.95):>9.1f} {len(seq):>6}")
+    print(f"{f'daemon, {args.concurrency} concurrent':<34} {statistics.median(conc):>9.1f} "
+          f"{_pct(conc, 0.95):>9.1f} {len(conc):>6}")
+    print(f"\nDaemon startup (one-off): {startup:.0f} ms")
+    print(f"Concurrent throughput: {len(conc) / wall:.1f} searches/s")
+    print(f"batch_search of {len(QUERIES)} queries: {batch_ms:.0f} ms")
+    print(f"Per-call speedup (p50): {statistics.median(spawn) / statistics.median(seq):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+HTML → text extraction benchmark: BeautifulSoup pipeline vs jarvis_html_text
+
+Runs both extractors over a corpus of saved pages and reports pages/s, MB/s
+and how often the outputs agree exactly.
+
+    python test_html_extract_bench.py                          # synthetic corpus
+    python test_html_extract_bench.py --save-corpus pages/ URL1 URL2 ...
+    python test_html_extract_bench.py --corpus pages/ --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import jarvis_html_text
+from jarvis_html_text import extract_text
+
+
+# ─── The implementations being replaced (app.py / ddgs_search.py before) ───
+
+def bs4_scrape(html: str, max_chars: int = 3000) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside", "iframe"]):
+        tag.decompose()
+    article = soup.find("article")
+    if article:
+        text = article.get_text(separator="\n", strip=True)
+    else:
+        main = soup.find("main") or soup.find("body")
+        text = main.get_text(separator="\n", strip=True) if main else soup.get_text(separator="\n", strip=True)
+    lines = [line.strip() for line in text.splitlines() if len(line.strip()) > 20]
+    return "\n".join(lines)[:max_chars]
+
+
+def bs4_ddgs(html: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    article = soup.find("article")
+    if article:
+        text = article.get_text()
+    else:
+        body = soup.find("body")
+        text = body.get_text() if body else ""
+    return re.sub(r"\s+", " ", text).strip()[:1000]
+
+
+def new_scrape(html: str) -> str:
+    return extract_text(html, max_chars=3000)
+
+
+def new_ddgs(html: str) -> str:
+    return extract_text(html, max_chars=1000, mode="flat", skip_tags=("script", "style"),
+                        prefer=("article", "body"))
+
+
+# ─── Corpus ───
+
+_WORDS = ("jarvis student exam physics result india government policy cricket match market "
+          "science research university climate energy budget minister court election data").split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 25))).capitalize() + "."
+
+
+def synthetic_page(rng: random.Random, script_kb: int, paragraphs: int, with_article: bool) -> str:
+    script = "var d=" + repr("x" * (script_kb * 1024)) + ";"
+    nav = "".join(f"<li><a href='/s{i}'>Section link number {i} with text</a></li>" for i in range(40))
+    body = "".join(f"<p>{_sentence(rng)} <b>{_sentence(rng)}</b> {_sentence(rng)} &amp; more.</p>"
+                   for _ in range(paragraphs))
+    related = "".join(f"<div class='card'><img src='/i{i}.jpg'><span>{_sentence(rng)}</span></div>"
+                      for i in range(30))
+    content = f"<article><h1>{_sentence(rng)}</h1>{body}</article>" if with_article else f"<main>{body}</main>"
+    return (f"<!doctype html><html><head><title>Page</title><style>.a{{color:red}}</style>"
+            f"<script>{script}</script></head><body><header><nav><ul>{nav}</ul></nav></header>"
+            f"{content}<aside>{related}</aside><footer>{_sentence(rng)}</footer>"
+            f"<script>{script}</script></body></html>")
+
+
+def build_synthetic_corpus(directory: str, count: int = 40):
+    rng = random.Random(7)
+    for i in range(count):
+        html = synthetic_page(rng, script_kb=rng.choice([5, 50, 200, 800]),
+                              paragraphs=rng.randint(10, 120), with_article=i % 4 != 0)
+        with open(os.path.join(directory, f"page_{i:03d}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def save_corpus(directory: str, urls):
+    import requests
+    os.makedirs(directory, exist_ok=True)
+    for i, url in enumerate(urls):
+        try:
+            resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0 JARVIS-Bot/2026"}, timeout=15)
+            resp.raise_for_status()
+            with open(os.path.join(directory, f"page_{i:03d}.html"), "w", encoding="utf-8") as f:
+                f.write(resp.text)
+            print(f"✅ saved {url} ({len(resp.text) // 1024} KB)")
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+
+
+def load_corpus(directory: str):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "r", encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    return pages
+
+
+# ─── Benchmark ───
+
+def bench(fn, pages, repeat: int):
+    outputs = [fn(p) for p in pages]  # warm-up + outputs for agreement check
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in pages:
+            fn(p)
+    elapsed = time.perf_counter() - t0
+    return elapsed, outputs
+
+
+class _FakeResponse:
+    """Streams bytes like requests.Response; .encoding as requests sets it"""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "ISO-8859-1" if "charset" not in content_type else content_type.split("charset=")[1]
+        self._body = body
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+
+
+def check_charsets():
+    """UTF-8 pages served as bare text/html must not be decoded as Latin-1"""
+    tamil = "தமிழ்நாடு அரசு பள்ளிகளில் புதிய பாடத்திட்டம் அறிமுகம் செய்யப்பட்டது"
+    para = f"<p>{tamil} — மாணவர்கள் வரவேற்பு.</p>"
+    cases = (
+        ("no header charset, no meta", f"<html><body>{para * 300}</body></html>".encode("utf-8"), "text/html"),
+        ("no header charset, meta", f'<html><head><meta charset="utf-8"></head><body>{para}</body></html>'.encode("utf-8"), "text/html"),
+        ("header charset", f"<html><body>{para}</body></html>".encode("utf-8"), "text/html; charset=UTF-8"),
+    )
+    for label, body, content_type in cases:
+        text = jarvis_html_text.extract_response(_FakeResponse(body, content_type))
+        assert tamil in text, f"{label}: {text[:80]!r}"
+    latin = "<html><body><p>Café crème brûlée — a long enough paragraph to keep.</p></body></html>"
+    text = jarvis_html_text.extract_response(_FakeResponse(latin.encode("cp1252"), "text/html"))
+    assert "Café crème brûlée" in text, f"cp1252 fallback: {text!r}"
+    print("✅ Charset detection: header, <meta>, UTF-8 default and cp1252 fallback")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML extraction benchmark")
+    parser.add_argument("--corpus", help="Directory of saved .html pages")
+    parser.add_argument("--save-corpus", nargs="+", metavar=("DIR", "URL"),
+                        help="Download URLs into DIR and exit")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        save_corpus(args.save_corpus[0], args.save_corpus[1:])
+        return 0
+
+    check_charsets()
+
+    directory = args.corpus
+    if not directory:
+        directory = tempfile.mkdtemp(prefix="jarvis_html_corpus_")
+        build_synthetic_corpus(directory)
+    pages = load_corpus(directory)
+    if not pages:
+        print(f"❌ No .html pages in {directory}")
+        return 1
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / (1 << 20)
+
+    print("=" * 70)
+    print("HTML EXTRACTION BENCHMARK")
+    print("=" * 70)
+    print(f"Corpus: {directory} — {len(pages)} pages, {total_mb:.1f} MB; engine={jarvis_html_text.ENGINE}")
+    print(f"\n{'pipeline':<28} {'pages/s':>9} {'MB/s':>8} {'speedup':>8} {'identical':>10}")
+    for label, old_fn, new_fn in (("scrape_url_content", bs4_scrape, new_scrape),
+                                  ("ddgs extract_content", bs4_ddgs, new_ddgs)):
+        old_t, old_out = bench(old_fn, pages, args.repeat)
+        new_t, new_out = bench(new_fn, pages, args.repeat)
+        same = sum(a == b for a, b in zip(old_out, new_out))
+        n = len(pages) * args.repeat
+        print(f"{label + ' (bs4)':<28} {n / old_t:>9.1f} {total_mb * args.repeat / old_t:>8.1f} {'':>8} {'':>10}")
+        print(f"{label + ' (new)':<28} {n / new_t:>9.1f} {total_mb * args.repeat / new_t:>8.1f} "
+              f"{old_t / new_t:>7.1f}x {same:>4}/{len(pages)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+jarvis_vector_store regression checks
+
+Upserts, deletes and reopens a LocalVectorIndex in a temporary directory
+and checks that what query/fetch/describe_index_stats report matches what
+was written, including after a reopen replays the log.
+
+    python test_vector_store.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jarvis_vector_store import LocalVectorIndex
+
+DIM = 8
+
+
+def vec(seed):
+    return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+
+def live_ids(index):
+    matches = index.query(vector=vec(0), top_k=100)["matches"]
+    return sorted(m["id"] for m in matches)
+
+
+def check_duplicate_ids(directory):
+    """An id repeated in one upsert is one row: last values win, and delete removes it"""
+    index = LocalVectorIndex(directory, dimension=DIM)
+    index.upsert([("a", vec(1), {"v": 1}), ("b", vec(2)), ("a", vec(3), {"v": 3})])
+    assert index.describe_index_stats()["total_vector_count"] == 2
+    fetched = index.fetch(["a"])["vectors"]["a"]
+    assert fetched["metadata"] == {"v": 3}
+    assert np.allclose(fetched["values"], np.asarray(vec(3)) / np.linalg.norm(vec(3)), atol=1e-2)
+    assert live_ids(index) == ["a", "b"]
+
+    index.delete(ids=["a"])
+    assert live_ids(index) == ["b"], live_ids(index)
+    index.close()
+
+    reopened = LocalVectorIndex(directory, dimension=DIM)
+    assert live_ids(reopened) == ["b"], live_ids(reopened)
+    assert reopened.describe_index_stats()["total_vector_count"] == 1
+    assert reopened.fetch(["a"])["vectors"] == {}
+    reopened.close()
+    print("✅ Duplicate id in one upsert: single row, gone after delete and reopen")
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="jarvis_vector_store_") as directory:
+        check_duplicate_ids(directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,9 @@ Using Groq Llama-3.3-70B + Tavily Advanced Search
 Architecture:
 - classify_intent() -> Determines if research is needed + generates 3 optimized queries
 - conduct_research() -> Tavily search with advanced depth and aggregation
+- intent_router -> local keyword/hashed-n-gram router; clear cases skip the LLM classifier
+- retrieval_cache -> TTL caches in front of both stages (intent by normalized
+  query, Tavily per sub-query, shorter TTL for news-like queries)
 - generate_final_response() -> Llama synthesis with research context
 - ask_jarvis() -> Main endpoint orchestrating the agentic workflow
 """
@@ -15,6 +18,7 @@ import json
 import logging
 import os
 import sys
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -24,6 +28,9 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 from groq import Groq
 
+from intent_router import INTENT_ROUTER_ENABLED, IntentRouter
+from retrieval_cache import TTLCache, is_news_like, normalize_query
+
 # Try to import Tavily (may not be installed)
 try:
     from tavily import TavilyClient
@@ -77,6 +84,16 @@ tavily_client = TavilyClient(api_key=TAVILY_API_KEY) if (TAVILY_AVAILABLE and TA
 
 PORT = int(os.environ.get("FLASK_PORT", 3000))
 
+# Retrieval caches (seconds); shared by every endpoint in this process
+INTENT_CACHE_TTL = float(os.environ.get("INTENT_CACHE_TTL", 6 * 3600))
+TAVILY_CACHE_TTL = float(os.environ.get("TAVILY_CACHE_TTL", 6 * 3600))
+TAVILY_NEWS_CACHE_TTL = float(os.environ.get("TAVILY_NEWS_CACHE_TTL", 600))
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", 2048))
+
+intent_cache = TTLCache("intent", RETRIEVAL_CACHE_SIZE)
+tavily_cache = TTLCache("tavily", RETRIEVAL_CACHE_SIZE)
+intent_router = IntentRouter()
+
 
 JARVIS_PERSONA_PROMPT = (
     "You are JARVIS, an Iron Man–style AI: witty, sophisticated, "
@@ -93,7 +110,8 @@ JARVIS_PERSONA_PROMPT = (
 
 def classify_intent(user_query: str) -> Dict:
     """
-    Zero-shot classifier and router.
+    Zero-shot classifier and router. Clear cases are decided by the local
+    intent_router; the rest go to the LLM, cached by normalized query.
 
     Returns JSON structure:
     {
@@ -111,6 +129,25 @@ def classify_intent(user_query: str) -> Dict:
             "confidence": 0.0,
         }
 
+    if INTENT_ROUTER_ENABLED:
+        local = intent_router.route(user_query)
+        if local is not None:
+            logger.info(
+                f"OK Intent (local): needs_search={local['needs_search']} | confidence={local['confidence']}"
+            )
+            return local
+
+    result = intent_cache.get_or_compute(
+        normalize_query(user_query),
+        lambda: _classify_intent_uncached(user_query),
+        INTENT_CACHE_TTL,
+        cacheable=lambda r: r.get("reason") != "Heuristic fallback",
+    )
+    return dict(result)
+
+
+def _classify_intent_uncached(user_query: str) -> Dict:
+    """One Groq classification call (heuristic result if it fails)."""
     classification_prompt = f"""
 Analyze the user's query and decide if it requires real-time grounding (current or 2026 data).
 
@@ -139,6 +176,7 @@ User query: "{user_query}"
 
     try:
         logger.info(f"[CLASSIFY] Analyzing: '{user_query}'")
+        started = time.perf_counter()
         response = groq_client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": classification_prompt}],
@@ -147,6 +185,7 @@ User query: "{user_query}"
         )
         raw = response.choices[0].message.content.strip()
         result = json.loads(raw)
+        intent_router.record_llm(user_query, result, time.perf_counter() - started)
     except Exception as exc:
         logger.error(f"Classification error: {exc}")
         result = {
@@ -182,44 +221,64 @@ User query: "{user_query}"
     return result
 
 
-def _run_tavily_search(query: str) -> List[Dict]:
-    """Run a single Tavily query and normalize results."""
-    if not tavily_client:
-        return []
-    try:
-        result = tavily_client.search(
-            query=query,
-            search_depth="advanced",
-            max_results=2,
-            include_answer=True,
-        )
-        normalized = []
-        if result.get("results"):
-            for item in result["results"]:
-                normalized.append(
-                    {
-                        "title": item.get("title", ""),
-                        "snippet": item.get("snippet", ""),
-                        "url": item.get("url", ""),
-                    }
-                )
-        if result.get("answer"):
+def _tavily_search_uncached(query: str) -> List[Dict]:
+    """Run a single Tavily query and normalize results (raises on API errors)."""
+    result = tavily_client.search(
+        query=query,
+        search_depth="advanced",
+        max_results=2,
+        include_answer=True,
+    )
+    normalized = []
+    if result.get("results"):
+        for item in result["results"]:
             normalized.append(
                 {
-                    "title": "Direct Answer",
-                    "snippet": result.get("answer", ""),
-                    "url": "",
+                    "title": item.get("title", ""),
+                    "snippet": item.get("snippet", ""),
+                    "url": item.get("url", ""),
                 }
             )
-        return normalized
+    if result.get("answer"):
+        normalized.append(
+            {
+                "title": "Direct Answer",
+                "snippet": result.get("answer", ""),
+                "url": "",
+            }
+        )
+    return normalized
+
+
+def _research_ttl(queries: List[str], user_query: str = "", intent: Optional[Dict] = None) -> float:
+    """
+    One cache TTL for every sub-query of a request. Decided from the user's
+    query and intent, not each sub-query's wording: a time-sensitive
+    question may be expanded into sub-queries that don't look like news.
+    """
+    time_sensitive = bool((intent or {}).get("needs_search")) or is_news_like(user_query) \
+        or any(is_news_like(q) for q in queries)
+    return TAVILY_NEWS_CACHE_TTL if time_sensitive else TAVILY_CACHE_TTL
+
+
+def _run_tavily_search(query: str, ttl: float) -> List[Dict]:
+    """Run a single Tavily query through the per-sub-query cache."""
+    if not tavily_client:
+        return []
+    try:
+        results = tavily_cache.get_or_compute(
+            normalize_query(query), lambda: _tavily_search_uncached(query), ttl)
+        return list(results)
     except Exception as exc:
         logger.warning(f"Tavily search error for '{query[:50]}': {exc}")
         return []
 
 
-def conduct_research(queries: List[str], max_workers: int = 3) -> Dict:
+def conduct_research(queries: List[str], max_workers: int = 3, user_query: str = "",
+                     intent: Optional[Dict] = None) -> Dict:
     """
     Research agent: executes triad of queries (async via threads) and aggregates.
+    user_query/intent pick the cache TTL shared by all the queries.
 
     Returns dict:
     {
@@ -238,9 +297,10 @@ def conduct_research(queries: List[str], max_workers: int = 3) -> Dict:
 
     logger.info(f"[RESEARCH] Running {len(queries)} queries asynchronously")
     sources: List[Dict] = []
+    ttl = _research_ttl(queries, user_query, intent)
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_map = {executor.submit(_run_tavily_search, q): q for q in queries}
+        future_map = {executor.submit(_run_tavily_search, q, ttl): q for q in queries}
         for future in as_completed(future_map):
             q = future_map[future]
             try:
@@ -335,6 +395,8 @@ def health():
         "status": "healthy",
         "groq": "ok" if groq_client else "missing",
         "tavily": "ok" if tavily_client else "missing",
+        "cache": {"intent": intent_cache.stats(), "tavily": tavily_cache.stats()},
+        "intent_router": intent_router.stats(),
         "timestamp": datetime.utcnow().isoformat(),
     })
 
@@ -374,7 +436,7 @@ def ask_jarvis():
         if needs_search and tavily_client:
             queries = intent.get("queries", [])
             if queries:
-                research = conduct_research(queries)
+                research = conduct_research(queries, user_query=user_query, intent=intent)
 
         # STEP 3: Generate response with grounding
         response = generate_final_response(user_query, research)
@@ -414,7 +476,7 @@ def jarvis_workflow():
         intent = classify_intent(query)
         research = {"context": "", "sources": []}
         if intent.get("needs_search") and tavily_client:
-            research = conduct_research(intent.get("queries", []))
+            research = conduct_research(intent.get("queries", []), user_query=query, intent=intent)
         response = generate_final_response(query, research)
         
         return jsonify({
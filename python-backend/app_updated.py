@@ -90,6 +90,11 @@ except ImportError as e:
         """Fallback: Training unavailable"""
         return {'success': False, 'error': 'ML service not loaded'}
 
+# Batch variants are dependency-free, so they stay available in heuristic mode
+from ml_batch import predict_batch, run_batch, sentiment_batch, start_pool, summarize_batch
+
+start_pool()
+
 # Try to import DDGS routes
 DDGS_AVAILABLE = False
 try:
@@ -304,6 +309,125 @@ def summarize_endpoint():
         return jsonify({'error': str(e)}), 500
 
 
+# ===================== BATCH ML ENDPOINTS =====================
+# Many texts per request: a JSON array, or NDJSON (Content-Type:
+# application/x-ndjson, one text or object per line, options in the query
+# string). Large batches are chunked across a process pool (ml_batch).
+
+def _batch_request(array_key):
+    """(items, options) from a JSON body's array_key or an NDJSON stream"""
+    if request.mimetype == 'application/x-ndjson':
+        items = [json.loads(line) for line in request.stream if line.strip()]
+        return items, request.args
+    data = request.get_json() or {}
+    items = data.get(array_key)
+    if not isinstance(items, list):
+        raise ValueError(f"'{array_key}' must be an array")
+    return items, data
+
+
+def _batch_texts(items):
+    """Plain strings from items that are strings or {"text": ...} objects"""
+    return [item.get('text') if isinstance(item, dict) else item for item in items]
+
+
+def _run_valid(fn, values, valid, error='Invalid text provided', **kwargs):
+    """fn over the entries of values that pass valid; the rest get an error result, in input order"""
+    keep = [i for i, v in enumerate(values) if valid(v)]
+    results = [{'success': False, 'error': error}] * len(values)
+    for i, result in zip(keep, run_batch(fn, [values[i] for i in keep], **kwargs)):
+        results[i] = result
+    return results
+
+
+def _batch_response(results):
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+
+def _valid_pair(pair):
+    context, query = pair
+    return isinstance(context, str) and isinstance(query, str) and bool(context) and bool(query)
+
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch_endpoint():
+    """
+    Relevance of many contexts against a query
+
+    Request: {"query": "...", "contexts": ["...", ...]}
+          or {"items": [{"context": "...", "query": "..."}, ...]}
+    NDJSON lines are context strings or {"context", "query"} objects; a
+    missing per-item query falls back to ?query=.
+    """
+    try:
+        is_ndjson = request.mimetype == 'application/x-ndjson'
+        data = {} if is_ndjson else (request.get_json() or {})
+        key = 'items' if 'items' in data else 'contexts'
+        items, options = _batch_request(key)
+        default_query = options.get('query', '')
+        pairs = [
+            (item.get('context', ''), item.get('query') or default_query) if isinstance(item, dict)
+            else (item, default_query)
+            for item in items
+        ]
+        results = _run_valid(predict_batch, pairs, _valid_pair, error='Context and query must be non-empty strings')
+        logger.info(f"📦 Batch prediction: {len(results)} items")
+        return _batch_response(results)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/sentiment/batch', methods=['POST'])
+def sentiment_batch_endpoint():
+    """
+    Sentiment of many texts
+
+    Request: {"texts": ["...", ...]}, or NDJSON of strings / {"text": ...}
+    """
+    try:
+        items, _ = _batch_request('texts')
+        texts = _batch_texts(items)
+        results = _run_valid(sentiment_batch, texts, lambda t: isinstance(t, str) and bool(t))
+        logger.info(f"📦 Batch sentiment: {len(results)} texts")
+        return _batch_response(results)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Batch sentiment error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/summarize/batch', methods=['POST'])
+def summarize_batch_endpoint():
+    """
+    Extractive summaries of many texts
+
+    Request: {"texts": ["...", ...], "max_sentences": 3}, or NDJSON of
+    strings / {"text": ...} with ?max_sentences=
+    """
+    try:
+        items, options = _batch_request('texts')
+        texts = _batch_texts(items)
+        max_sentences = int(options.get('max_sentences', 3))
+        results = _run_valid(summarize_batch, texts, lambda t: isinstance(t, str) and bool(t),
+                             max_sentences=max_sentences)
+        logger.info(f"📦 Batch summarization: {len(results)} texts")
+        return _batch_response(results)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Batch summarization error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
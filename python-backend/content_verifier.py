@@ -4,23 +4,136 @@ Filters search results for relevance and intent matching
 """
 
 import logging
-from typing import List, Dict, Tuple
+import os
+import sys
+from functools import lru_cache
+from typing import List, Dict, Sequence, Tuple
 import re
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Shared keyword matcher lives next to the main backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from jarvis_keywords import register, tag_query
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Below this many texts the array setup costs more than it saves
+SMALL_BATCH = 32
+
+
+class RelevanceBatch:
+    """
+    calculate_relevance_score for many texts against one query.
+
+    The query is tokenized once into the keyword columns the score looks at
+    (query words, the intent's keywords, NOISE_KEYWORDS). Each text is
+    lowercased once, each keyword is tested against the whole batch, and
+    the hits form a (texts x keywords) NumPy array that the score is
+    computed from column-wise. Matching stays substring-based, so scores
+    equal the per-result version.
+    """
+
+    def __init__(self, query: str, intent_keywords: Tuple[str, ...], noise_keywords: Tuple[str, ...]):
+        query_words = [w for w in query.lower().split() if len(w) > 3]
+        self.terms = list(dict.fromkeys(query_words + list(intent_keywords) + list(noise_keywords)))
+        column = {term: i for i, term in enumerate(self.terms)}
+        self.query_columns = [column[w] for w in query_words]  # repeated words count twice, as before
+        self.intent_columns = sorted({column[k] for k in intent_keywords})
+        self.noise_columns = sorted({column[k] for k in noise_keywords})
+        self.scored_columns = set(self.query_columns) | set(self.noise_columns)
+        # A keyword can only occur where every keyword inside it occurs
+        # ("tamil" -> "tamil nadu", "ad" -> "advertisement"): test the short
+        # ones first and the longer ones only on those rows
+        self.order = sorted(range(len(self.terms)), key=lambda j: len(self.terms[j]))
+        self.requires = {
+            j: [i for i in self.order if i != j and self.terms[i] in self.terms[j]]
+            for j in range(len(self.terms))
+        }
+        needed = self.scored_columns | {i for j in self.scored_columns for i in self.requires[j]}
+        self.any_only = set(self.intent_columns) - needed
+
+    def hits(self, texts: Sequence[str]):
+        """(len(texts), len(self.terms)) bool array: keyword occurs in text."""
+        lowered = [t.lower() for t in texts]
+        hits = np.zeros((len(lowered), len(self.terms)), dtype=bool)
+        intent_hit = np.zeros(len(lowered), dtype=bool)
+        for j in self.order:
+            # Substring search runs in C; a compiled alternation over all
+            # keywords measured slower than one `in` per keyword
+            candidates = np.ones(len(lowered), dtype=bool)
+            for i in self.requires[j]:
+                candidates &= hits[:, i]
+            if j in self.any_only:
+                candidates &= ~intent_hit  # intent keywords only need any()
+            term = self.terms[j]
+            rows = np.flatnonzero(candidates)
+            if len(rows) == len(lowered):
+                hits[:, j] = [term in t for t in lowered]
+            elif len(rows):
+                hits[rows, j] = [term in lowered[r] for r in rows.tolist()]
+            if j in self.intent_columns:
+                intent_hit |= hits[:, j]
+        return hits
+
+    def scores(self, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+        if not NUMPY_AVAILABLE or len(texts) < SMALL_BATCH:
+            return [self._score_one(text) for text in texts]
+        hits = self.hits(texts)
+        matching = hits[:, self.query_columns].sum(axis=1)
+        score = np.where(matching > 0, np.minimum(0.3, matching * 0.1), 0.0)
+        if self.intent_columns:
+            score = score + np.where(hits[:, self.intent_columns].any(axis=1), 0.3, 0.0)
+        noise = hits[:, self.noise_columns].sum(axis=1)
+        score = score + np.where(noise == 0, 0.2, -np.minimum(0.2, noise * 0.05))
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        score = score + np.where(lengths > 200, 0.2, 0.0)
+        return np.clip(score, 0.0, 1.0).tolist()
+
+    def _score_one(self, text: str) -> float:
+        lowered = text.lower()
+        terms = self.terms
+        score = 0.0
+        matching = sum(1 for c in self.query_columns if terms[c] in lowered)
+        if matching > 0:
+            score += min(0.3, matching * 0.1)
+        if any(terms[c] in lowered for c in self.intent_columns):
+            score += 0.3
+        noise = sum(1 for c in self.noise_columns if terms[c] in lowered)
+        score += 0.2 if noise == 0 else -min(0.2, noise * 0.05)
+        if len(text) > 200:
+            score += 0.2
+        return max(0.0, min(1.0, score))
+
+
+@lru_cache(maxsize=256)
+def _relevance_batch(query: str, intent_keywords: Tuple[str, ...], noise_keywords: Tuple[str, ...]) -> RelevanceBatch:
+    return RelevanceBatch(query, intent_keywords, noise_keywords)
+
+
 class ContentVerifier:
     """Verifies and filters content for relevance"""
     
     # Keywords for different regions/intents
+    # Matched on whole words (jarvis_keywords), so inflected forms are listed too
     REGION_KEYWORDS = {
-        'tamil_nadu': ['tamil nadu', 'tamilnadu', 'tn', 'tamil', 'madras', 'tni', 'tamil cinema'],
-        'tamil': ['tamil', 'tamizh', 'tamil cinema', 'tamil language', 'tamil movies'],
-        'news': ['news', 'today', 'breaking', 'latest', 'update', 'report'],
-        'technology': ['tech', 'technology', 'software', 'ai', 'machine learning', 'python'],
-        'education': ['education', 'school', 'college', 'university', 'course', 'learning']
+        'tamil_nadu': ['tamil nadu', 'tamilnadu', 'tn', 'tamil', 'tamils', 'madras', 'tni', 'tamil cinema'],
+        'tamil': ['tamil', 'tamils', 'tamizh', 'tamil cinema', 'tamil language', 'tamil movies'],
+        'news': ['news', 'today', 'breaking', 'latest', 'update', 'updates', 'updated',
+                 'report', 'reports', 'reported', 'reporting'],
+        'technology': ['tech', 'technology', 'technologies', 'technological', 'software', 'ai',
+                       'machine learning', 'python'],
+        'education': ['education', 'educational', 'school', 'schools', 'schooling', 'college', 'colleges',
+                      'university', 'universities', 'course', 'courses', 'coursework', 'learning']
     }
     
     NOISE_KEYWORDS = [
@@ -42,37 +155,22 @@ class ContentVerifier:
             
         Returns:
             Relevance score
-        """
-        text_lower = text.lower()
-        query_lower = query.lower()
         
-        score = 0.0
-        max_score = 1.0
-        
-        # Check query keywords (0.3)
-        query_words = query_lower.split()
-        matching_keywords = sum(1 for word in query_words if len(word) > 3 and word in text_lower)
-        if matching_keywords > 0:
-            score += min(0.3, matching_keywords * 0.1)
-        
-        # Check intent keywords (0.3)
-        if intent and intent in self.REGION_KEYWORDS:
-            intent_keywords = self.REGION_KEYWORDS[intent]
-            if any(keyword in text_lower for keyword in intent_keywords):
-                score += 0.3
-        
-        # Penalize noise (0.2)
-        noise_count = sum(1 for noise in self.NOISE_KEYWORDS if noise in text_lower)
-        if noise_count == 0:
-            score += 0.2
-        else:
-            score -= min(0.2, noise_count * 0.05)
-        
-        # Content length check (0.2)
-        if len(text) > 200:  # Reasonable content length
-            score += 0.2
+        Query keywords (0.3), intent keywords (0.3), no noise (0.2, minus
+        0.05 per noise keyword) and content length > 200 (0.2).
+        """
+        return self.score_batch([text], query, intent)[0]
+    
+    def score_batch(self, texts: Sequence[str], query: str, intent: str = None) -> List[float]:
+        """
+        calculate_relevance_score for every text in one vectorized pass
         
-        return max(0.0, min(max_score, score))
+        Returns:
+            Relevance scores, in the order of texts
+        """
+        intent_keywords = tuple(self.REGION_KEYWORDS.get(intent, ())) if intent else ()
+        batch = _relevance_batch(query, intent_keywords, tuple(self.NOISE_KEYWORDS))
+        return batch.scores(texts)
     
     def detect_intent(self, query: str) -> str:
         """
@@ -80,10 +178,10 @@ class ContentVerifier:
         
         Returns: intent category
         """
-        query_lower = query.lower()
+        tags = tag_query(query)
         
-        for intent, keywords in self.REGION_KEYWORDS.items():
-            if any(keyword in query_lower for keyword in keywords):
+        for intent, category in _INTENT_CATEGORIES:
+            if category in tags:
                 return intent
         
         return 'general'
@@ -91,7 +189,8 @@ class ContentVerifier:
     def verify_and_filter(self, 
                          search_results: List[Dict], 
                          query: str,
-                         min_relevance: float = 0.3) -> Tuple[List[Dict], str]:
+                         min_relevance: float = 0.3,
+                         max_context_chars: int = None) -> Tuple[List[Dict], str]:
         """
         Filter search results by relevance
         
@@ -99,6 +198,8 @@ class ContentVerifier:
             search_results: List of {title, url, snippet, content}
             query: Original query
             min_relevance: Minimum relevance score threshold
+            max_context_chars: Stop adding to the combined context past this
+                length (large batches; None = everything verified)
             
         Returns:
             (filtered_results, combined_context)
@@ -108,21 +209,25 @@ class ContentVerifier:
         
         verified = []
         context_parts = []
+        context_chars = 0
         
-        for result in search_results:
-            content = result.get('content', '')
-            if not content:
-                continue
-            
-            relevance = self.calculate_relevance_score(content, query, intent)
-            logger.info(f"📊 {result['title'][:50]}: {relevance:.2f}")
+        with_content = [r for r in search_results if r.get('content')]
+        scores = self.score_batch([r['content'] for r in with_content], query, intent)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
+        for result, relevance in zip(with_content, scores):
+            if debug:
+                logger.debug(f"📊 {result.get('title', '')[:50]}: {relevance:.2f}")
             
             if relevance >= min_relevance:
                 result['relevance_score'] = relevance
                 verified.append(result)
                 
                 # Add to context
-                context_parts.append(f"[Source: {result['title']}]\n{content}")
+                if max_context_chars is None or context_chars < max_context_chars:
+                    part = f"[Source: {result.get('title', '')}]\n{result['content']}"
+                    context_parts.append(part)
+                    context_chars += len(part) + 2
         
         # Combine context
         combined_context = "\n\n".join(context_parts)
@@ -155,17 +260,28 @@ class ContentVerifier:
         return context.strip()
 
 
+_INTENT_CATEGORIES = [(intent, register(f'content_verifier.{intent}', keywords))
+                      for intent, keywords in ContentVerifier.REGION_KEYWORDS.items()]
+
 # Global instance
 _verifier = ContentVerifier()
 
 
 def verify_search_results(search_results: List[Dict], 
                          query: str,
-                         min_relevance: float = 0.3) -> Tuple[List[Dict], str]:
+                         min_relevance: float = 0.3,
+                         max_context_chars: int = None) -> Tuple[List[Dict], str]:
     """
     Public function to verify and filter search results
     """
-    return _verifier.verify_and_filter(search_results, query, min_relevance)
+    return _verifier.verify_and_filter(search_results, query, min_relevance, max_context_chars)
+
+
+def score_results(texts: Sequence[str], query: str) -> List[float]:
+    """
+    Public function to score many texts against one query (intent detected from the query)
+    """
+    return _verifier.score_batch(texts, query, _verifier.detect_intent(query))
 
 
 def clean_for_groq(context: str, max_tokens: int = 2000) -> str:
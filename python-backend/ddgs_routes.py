@@ -4,13 +4,19 @@ Replaces Serper + Jina with DuckDuckGo search + BeautifulSoup
 """
 
 from flask import request, jsonify, Blueprint
+import json
 import logging
 from ddgs_search import get_search_results
-from content_verifier import verify_search_results, clean_for_groq
+from content_verifier import verify_search_results, clean_for_groq, score_results
 import os
 
 logger = logging.getLogger(__name__)
 
+# /api/verify-content scores large batches this many results at a time
+VERIFY_CHUNK_SIZE = int(os.environ.get('VERIFY_CHUNK_SIZE', '5000'))
+# clean_for_groq keeps ~2000 tokens; no point joining more context than that
+VERIFY_CONTEXT_CHARS = 8000
+
 # Blueprint
 search_bp = Blueprint('search', __name__, url_prefix='/api')
 
@@ -79,32 +85,78 @@ def verify_content():
         {
             "results": [...],
             "query": "user query",
-            "min_relevance": 0.3
+            "min_relevance": 0.3,
+            "scores_only": false
         }
+    
+    Large batches can be streamed as NDJSON instead (Content-Type:
+    application/x-ndjson, one result per line, query / min_relevance /
+    scores_only in the query string); they are scored VERIFY_CHUNK_SIZE
+    results at a time.
+    
+    scores_only returns every result's score, in input order, instead of
+    the verified results.
     """
     try:
-        from content_verifier import verify_search_results
-        
-        data = request.get_json()
-        results = data.get('results', [])
-        query = data.get('query', '')
-        min_relevance = float(data.get('min_relevance', 0.3))
+        if request.mimetype == 'application/x-ndjson':
+            options = request.args
+            chunks = _ndjson_chunks(request.stream, VERIFY_CHUNK_SIZE)
+        else:
+            options = request.get_json() or {}
+            results = options.get('results', [])
+            chunks = (results[i:i + VERIFY_CHUNK_SIZE] for i in range(0, len(results), VERIFY_CHUNK_SIZE))
+        query = options.get('query', '')
+        min_relevance = float(options.get('min_relevance', 0.3))
+        scores_only = str(options.get('scores_only', '')).lower() in ('1', 'true')
         
-        verified, context = verify_search_results(results, query, min_relevance)
-        clean_context = clean_for_groq(context)
+        verified, scores, context_parts, total = [], [], [], 0
+        verified_count = 0
+        for chunk in chunks:
+            total += len(chunk)
+            if scores_only:
+                chunk_scores = score_results([r.get('content') or '' for r in chunk], query)
+                scores.extend(chunk_scores)
+                verified_count += sum(1 for s in chunk_scores if s >= min_relevance)
+                continue
+            remaining = VERIFY_CONTEXT_CHARS - sum(len(p) for p in context_parts)
+            chunk_verified, context = verify_search_results(chunk, query, min_relevance, max(remaining, 0))
+            verified.extend(chunk_verified)
+            verified_count += len(chunk_verified)
+            if context:
+                context_parts.append(context)
         
-        return jsonify({
+        response = {
             'success': True,
-            'verified': verified,
-            'context': clean_context,
-            'verified_count': len(verified)
-        }), 200
+            'total': total,
+            'verified_count': verified_count
+        }
+        if scores_only:
+            response['scores'] = scores
+        else:
+            response['verified'] = verified
+            response['context'] = clean_for_groq("\n\n".join(context_parts))
+        return jsonify(response), 200
         
     except Exception as e:
         logger.error(f"Verification error: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+def _ndjson_chunks(stream, size):
+    """Parsed NDJSON lines from stream, in lists of up to size"""
+    chunk = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(json.loads(line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 @search_bp.route('/groq-synthesis', methods=['POST'])
 def groq_synthesis():
     """
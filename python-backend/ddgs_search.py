@@ -3,8 +3,13 @@ DDGS Search Service - Direct scraping RAG pipeline
 Replaces Serper + Jina with DuckDuckGo search + BeautifulSoup
 """
 
+import os
+import sys
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
 from duckduckgo_search import DDGS
 from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
@@ -15,6 +20,75 @@ import re
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared URL cache lives next to the main backend; same disk tier (URL_CACHE_DIR)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+try:
+    from jarvis_url_cache import URLCache
+    url_cache = URLCache.from_env()
+except Exception as e:
+    logger.warning(f"⚠️ URL cache unavailable, extracting without it: {e}")
+    url_cache = None
+
+try:
+    from jarvis_html_text import extract_response, extract_text
+except Exception as e:
+    logger.warning(f"⚠️ Streaming HTML extractor unavailable, using BeautifulSoup: {e}")
+    extract_response = extract_text = None
+
+# Same output as the BeautifulSoup path: <article> else <body>, whitespace collapsed, 1000 chars
+_EXTRACT_OPTS = dict(max_chars=1000, mode='flat', skip_tags=('script', 'style'), prefer=('article', 'body'))
+
+# Concurrent extraction: distinct hosts in parallel, one request per host per DDGS_HOST_DELAY seconds
+FETCH_WORKERS = int(os.getenv('DDGS_FETCH_WORKERS', '5'))
+FETCH_DEADLINE = float(os.getenv('DDGS_FETCH_DEADLINE', '12'))  # seconds for the whole batch
+HOST_DELAY = float(os.getenv('DDGS_HOST_DELAY', '2'))
+HOST_BURST = float(os.getenv('DDGS_HOST_BURST', '1'))
+
+
+class DeadlineExceeded(Exception):
+    """The politeness wait for a host would run past the batch deadline."""
+
+
+class HostThrottle:
+    """Per-host token buckets: `burst` requests, then one every `delay` seconds.
+
+    Callers reserve a slot under the lock and sleep outside it, so requests
+    to different hosts never wait on each other.
+    """
+
+    def __init__(self, delay: float = HOST_DELAY, burst: float = HOST_BURST):
+        self.delay = max(0.0, delay)
+        self.burst = max(1.0, burst)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}  # host -> (tokens, last_refill)
+
+    def wait(self, url: str, deadline: Optional[float] = None) -> float:
+        """Block until `url`'s host may be fetched; returns seconds waited."""
+        if self.delay <= 0:
+            return 0.0
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) / self.delay)
+            pause = 0.0 if tokens >= 1 else (1 - tokens) * self.delay
+            if deadline is not None and now + pause > deadline:
+                raise DeadlineExceeded(host)
+            # Tokens may go negative: later callers queue up behind this reservation
+            self._buckets[host] = (tokens - 1, now)
+            if len(self._buckets) > 1024:
+                self._sweep(now)
+        if pause:
+            time.sleep(pause)
+        return pause
+
+    def _sweep(self, now: float):
+        full_after = self.burst * self.delay
+        for host, (_tokens, last) in list(self._buckets.items()):
+            if now - last > full_after:
+                del self._buckets[host]
+
+
 class DDGSSearchService:
     """DDGS-based search with fallback and content extraction"""
     
@@ -23,7 +97,11 @@ class DDGSSearchService:
         self.session = requests.Session()
         self.max_retries = 3
         self.timeout = 10
-        self.request_delay = 2  # seconds between requests
+        self.request_delay = HOST_DELAY  # seconds between requests to the same host
+        self.throttle = HostThrottle(self.request_delay)
+        self.fetch_deadline = FETCH_DEADLINE
+        # Long-lived so fetches still running at the deadline finish (and fill the cache) in the background
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='ddgs-fetch')
         
     def search(self, query: str, region: str = 'in-en', max_results: int = 5) -> List[Dict]:
         """
@@ -114,56 +192,83 @@ class DDGSSearchService:
             logger.error(f"❌ Fallback search failed: {e}")
             return []
     
-    def extract_content(self, url: str) -> Optional[str]:
+    @staticmethod
+    def _response_to_text(response) -> str:
+        # Streamed responses are parsed as they download and abandoned once the article is read
+        if extract_response is not None:
+            return extract_response(response, **_EXTRACT_OPTS)
+        return DDGSSearchService._html_to_text(response.text)
+
+    @staticmethod
+    def _html_to_text(html: str) -> str:
+        if extract_text is not None:
+            return extract_text(html, **_EXTRACT_OPTS)
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(['script', 'style']):
+            script.decompose()
+        
+        # Try to extract article content
+        article = soup.find('article')
+        if article:
+            text = article.get_text()
+        else:
+            # Fallback to body
+            body = soup.find('body')
+            text = body.get_text() if body else ''
+        
+        # Clean up whitespace
+        text = re.sub(r'\s+', ' ', text).strip()
+        
+        # Limit to 1000 chars to avoid token overflow
+        return text[:1000]
+    
+    def extract_content(self, url: str, deadline: Optional[float] = None) -> Optional[str]:
         """
-        Extract main content from URL using BeautifulSoup
+        Extract main content from URL (streaming lxml extractor, BeautifulSoup fallback)
         
         Args:
             url: URL to scrape
+            deadline: time.monotonic() after which no new request is started
             
         Returns:
             Extracted text or None if failed
         """
         try:
             logger.info(f"📄 Extracting content from: {url}")
-            
-            # Rate limiting
-            time.sleep(self.request_delay)
-            
             headers = {'User-Agent': self.ua.random}
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-            
-            # Handle blocked responses
-            if response.status_code in [403, 404]:
-                logger.warning(f"⚠️ URL blocked ({response.status_code}): {url}")
-                return None
-            
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(['script', 'style']):
-                script.decompose()
-            
-            # Try to extract article content
-            article = soup.find('article')
-            if article:
-                text = article.get_text()
+
+            if url_cache is not None:
+                # Rate limiting only applies when the cache actually goes to the network
+                text = url_cache.fetch(
+                    url, self._response_to_text, namespace='ddgs', headers=headers,
+                    timeout=self.timeout, session=self.session, stream=True,
+                    before_fetch=lambda _url: self.throttle.wait(_url, deadline),
+                )
+                if text is None:
+                    logger.warning(f"⚠️ URL blocked (403/404, cached): {url}")
+                    return None
             else:
-                # Fallback to body
-                body = soup.find('body')
-                text = body.get_text() if body else ''
-            
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            # Limit to 1000 chars to avoid token overflow
-            text = text[:1000]
-            
+                # Rate limiting
+                self.throttle.wait(url, deadline)
+
+                response = requests.get(url, headers=headers, timeout=self.timeout)
+
+                # Handle blocked responses
+                if response.status_code in [403, 404]:
+                    logger.warning(f"⚠️ URL blocked ({response.status_code}): {url}")
+                    return None
+
+                response.raise_for_status()
+                text = self._html_to_text(response.text)
+
             logger.info(f"✅ Extracted {len(text)} chars from {url}")
             return text
             
+        except DeadlineExceeded:
+            logger.warning(f"⏱️ Skipped (host delay past deadline): {url}")
+            return None
         except requests.exceptions.Timeout:
             logger.warning(f"⏱️ Timeout: {url}")
             return None
@@ -174,19 +279,32 @@ class DDGSSearchService:
             logger.warning(f"❌ Extraction failed for {url}: {e}")
             return None
     
-    def search_and_extract(self, query: str, region: str = 'in-en', max_results: int = 5) -> List[Dict]:
+    def search_and_extract(self, query: str, region: str = 'in-en', max_results: int = 5,
+                           deadline: Optional[float] = None) -> List[Dict]:
         """
         Search + extract content pipeline
         
+        URLs are fetched concurrently; whatever has been extracted when
+        `deadline` seconds (default DDGS_FETCH_DEADLINE) have passed is returned.
+        
         Returns:
-            List of {title, url, snippet, content}
+            List of {title, url, snippet, content}, in search-result order
         """
         try:
             search_results = self.search(query, region, max_results)
+            if not search_results:
+                return []
+            
+            budget = self.fetch_deadline if deadline is None else deadline
+            until = time.monotonic() + budget
+            futures = [self._executor.submit(self.extract_content, r['url'], until) for r in search_results]
+            done, pending = wait(futures, timeout=budget)
+            if pending:
+                logger.warning(f"⏱️ Deadline {budget:.0f}s: returning {len(done)}/{len(futures)} extractions")
             
             enriched = []
-            for result in search_results:
-                content = self.extract_content(result['url'])
+            for result, future in zip(search_results, futures):
+                content = future.result() if future in done else None
                 if content:
                     enriched.append({
                         'title': result['title'],
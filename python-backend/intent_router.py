@@ -0,0 +1,258 @@
+"""
+Intent Router - local first stage in front of the classify_intent LLM call
+
+Decides needs_search for the clear cases without a Groq round-trip:
+
+- keyword automata: compiled word-boundary patterns for time-sensitive cues
+  (today, latest, breaking, price, 2026, ...) and evergreen cues (define,
+  explain, how to, code, derive, history, ...)
+- a small logistic model over hashed word 1-2 grams, trained from the LLM
+  classifications that app.py logs to INTENT_LOG_PATH
+
+When the combined confidence is below INTENT_LOCAL_CONFIDENCE the caller
+defers to the LLM classifier; until a model is trained that takes at least
+KEYWORD_MIN_CUES agreeing keyword cues. Locally routed queries get the query triad
+from templates.
+
+    python intent_router.py --train              # fit on the logged classifications
+    python intent_router.py "latest ipl score"   # show the routing decision
+"""
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+INTENT_LOG_PATH = os.environ.get("INTENT_LOG_PATH", os.path.join(ROOT_DIR, "intent_log.jsonl"))
+INTENT_MODEL_PATH = os.environ.get("INTENT_MODEL_PATH", os.path.join(ROOT_DIR, "intent_model.json"))
+INTENT_LOCAL_CONFIDENCE = float(os.environ.get("INTENT_LOCAL_CONFIDENCE", "0.85"))
+INTENT_ROUTER_ENABLED = os.environ.get("INTENT_ROUTER", "1") != "0"
+# The log holds raw user queries; past this size it is rotated to <log>.1 (one backup kept)
+INTENT_LOG_MAX_BYTES = int(os.environ.get("INTENT_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+# Keyword-only routing (no trained model) needs this many distinct agreeing cues
+KEYWORD_MIN_CUES = 2
+
+HASH_BUCKETS = 1 << 18
+
+SEARCH_CUES = re.compile(
+    r"\b(today|tonight|tomorrow|yesterday|now|right now|latest|current|currently|recent|recently|"
+    r"live|breaking|news|headlines?|update[sd]?|trend(ing|s)?|this (week|month|year)|"
+    r"20(2[4-9]|3\d)|price|stock|shares?|earnings|score|match|election|weather|launch(ed|es)?|"
+    r"released?|announce[sd]?|who won|results?)\b",
+    re.IGNORECASE,
+)
+EVERGREEN_CUES = re.compile(
+    r"\b(define|definition|meaning of|what is an?|what are|explain|how (do|does|to)|why (do|does|is)|"
+    r"difference between|example of|history of|derive|derivation|prove|proof|formula|solve|"
+    r"calculate|code|program|function|algorithm|debug|error in|syntax|python|java|javascript|"
+    r"c\+\+|sql|essay|summari[sz]e|translate|grammar|concept)\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an the is are was were be of in on at to for and or what who whom which when where why how "
+    "do does did can could should would will tell me about please give show i you my your whats going".split()
+)
+
+
+def _features(query: str) -> List[int]:
+    words = _WORD.findall(query.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(g.encode("utf-8")) % HASH_BUCKETS for g in grams]
+
+
+class HashedLogisticModel:
+    """Logistic regression over hashed word 1-2 grams (sparse weights, pure Python)."""
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, bias: float = 0.0):
+        self.weights = weights or {}
+        self.bias = bias
+
+    def probability(self, query: str) -> float:
+        z = self.bias + sum(self.weights.get(f, 0.0) for f in _features(query))
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    def fit(self, samples: List[Tuple[str, int]], epochs: int = 8, lr: float = 0.3, l2: float = 1e-4):
+        data = [(_features(q), y) for q, y in samples]
+        for epoch in range(epochs):
+            random.shuffle(data)
+            step = lr / (1 + epoch)
+            for feats, y in data:
+                z = self.bias + sum(self.weights.get(f, 0.0) for f in feats)
+                error = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z)))) - y
+                self.bias -= step * error
+                for f in feats:
+                    w = self.weights.get(f, 0.0)
+                    self.weights[f] = w - step * (error + l2 * w)
+        self.weights = {f: w for f, w in self.weights.items() if abs(w) > 1e-4}
+        return self
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bias": self.bias, "buckets": HASH_BUCKETS,
+                       "weights": {str(k): round(v, 5) for k, v in self.weights.items()}}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["HashedLogisticModel"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("buckets") != HASH_BUCKETS:
+                return None
+            return cls({int(k): v for k, v in data["weights"].items()}, data["bias"])
+        except Exception as exc:
+            print(f"⚠️  Intent model not loaded: {exc}")
+            return None
+
+
+def query_triad(query: str, now: Optional[datetime] = None) -> List[str]:
+    """Semantic variant plus two keyword variants, from templates."""
+    now = now or datetime.now()
+    # Time cues are dropped here; the templates add their own
+    topic = SEARCH_CUES.sub(" ", query.lower())
+    keywords = " ".join(w for w in _WORD.findall(topic) if w not in _STOPWORDS)
+    month = now.strftime('%B %Y')
+    if keywords:
+        variants = [query.strip(), f"{keywords} latest news", f"{keywords} {month}"]
+    else:
+        # Nothing but cues and stopwords: vary the query itself, minus its cues
+        variants = [query.strip(), f"{' '.join(topic.split())} latest news".strip(), f"{query.strip()} {month}"]
+    seen = set()
+    return [v for v in variants if not (v.lower() in seen or seen.add(v.lower()))]
+
+
+class IntentRouter:
+    def __init__(self, model_path: str = INTENT_MODEL_PATH, log_path: str = INTENT_LOG_PATH,
+                 threshold: float = INTENT_LOCAL_CONFIDENCE):
+        self.model = HashedLogisticModel.load(model_path)
+        self.log_path = log_path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.local = 0
+        self.deferred = 0
+        self.local_seconds = 0.0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+
+    def score(self, query: str) -> Tuple[float, str]:
+        """P(needs_search) and which signals produced it."""
+        search_cues = {m.group(0).lower() for m in SEARCH_CUES.finditer(query)}
+        evergreen_cues = {m.group(0).lower() for m in EVERGREEN_CUES.finditer(query)}
+        keyword = None
+        if bool(search_cues) != bool(evergreen_cues):
+            keyword = 0.95 if search_cues else 0.05
+
+        if self.model is not None:
+            p = self.model.probability(query)
+            if keyword is None:
+                return p, "model"
+            return 0.5 * p + 0.5 * keyword, "keywords+model"
+        if keyword is None:
+            return 0.5, "none"
+        # Without a model one cue ("match", "current") is too weak to skip the
+        # LLM; it stays below INTENT_LOCAL_CONFIDENCE and is deferred
+        cues = len(search_cues or evergreen_cues)
+        confidence = 0.92 if cues >= KEYWORD_MIN_CUES else 0.75
+        return (confidence if search_cues else round(1.0 - confidence, 2)), "keywords"
+
+    def route(self, query: str) -> Optional[Dict]:
+        """classify_intent-shaped result, or None to defer to the LLM classifier."""
+        start = time.perf_counter()
+        p, signals = self.score(query)
+        needs_search = p >= 0.5
+        confidence = max(p, 1.0 - p)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.local_seconds += elapsed
+            if confidence < self.threshold:
+                self.deferred += 1
+                return None
+            self.local += 1
+        return {
+            "needs_search": needs_search,
+            "confidence": round(confidence, 3),
+            "reason": f"Local router ({signals})",
+            "queries": query_triad(query) if needs_search else [],
+            "router": "local",
+        }
+
+    def record_llm(self, query: str, result: Dict, seconds: float):
+        """Account an LLM classification and log it as a training example."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+        if not self.log_path:
+            return
+        line = json.dumps({"query": query, "needs_search": bool(result.get("needs_search")),
+                           "confidence": result.get("confidence"), "ts": time.time()})
+        try:
+            with self._lock:
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= INTENT_LOG_MAX_BYTES:
+                    os.replace(self.log_path, self.log_path + ".1")
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as exc:
+            print(f"⚠️  Intent log write failed: {exc}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            routed = self.local + self.deferred
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "enabled": INTENT_ROUTER_ENABLED,
+                "model_loaded": self.model is not None,
+                "local": self.local,
+                "deferred_to_llm": self.deferred,
+                "local_fraction": round(self.local / routed, 3) if routed else 0.0,
+                "avg_local_us": round(self.local_seconds / routed * 1e6, 1) if routed else 0.0,
+                "avg_llm_ms": round(avg_llm * 1000, 1),
+                "estimated_seconds_saved": round(self.local * avg_llm, 2),
+            }
+
+
+def train(log_path: str = INTENT_LOG_PATH, model_path: str = INTENT_MODEL_PATH,
+          min_confidence: float = 0.6) -> Dict:
+    """Fit the model on logged LLM classifications (latest label per query wins)."""
+    labels: Dict[str, int] = {}
+    # Rotated backup first, so the current log's labels win
+    for path in (log_path + ".1", log_path):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if (row.get("confidence") or 0) >= min_confidence:
+                    labels[row["query"].strip().lower()] = int(bool(row["needs_search"]))
+    samples = list(labels.items())
+    random.Random(7).shuffle(samples)
+    holdout = samples[: len(samples) // 5]
+    model = HashedLogisticModel().fit(samples[len(holdout):])
+    accuracy = (sum((model.probability(q) >= 0.5) == bool(y) for q, y in holdout) / len(holdout)
+                if holdout else None)
+    model = HashedLogisticModel().fit(samples)
+    model.save(model_path)
+    return {"samples": len(samples), "holdout_accuracy": accuracy, "features": len(model.weights)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--train":
+        print(train(*sys.argv[2:3]))
+    else:
+        router = IntentRouter(log_path="")
+        for q in sys.argv[1:] or ["latest ipl score", "explain photosynthesis", "tell me about tamil nadu"]:
+            print(f"{q!r}: {router.score(q)} -> {router.route(q)}")
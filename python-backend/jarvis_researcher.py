@@ -1,16 +1,25 @@
 """
-JARVIS Researcher - Web Search Service using NewsAPI
+JARVIS Researcher - Web Search Service using NewsAPI, GNews and DDGS
 =============================================================
 Reliable web search without subprocess dependencies
 
-Uses: NewsAPI for real-time news search
-Fallback: DDGS if NewsAPI unavailable
+Sources are raced, not chained: NewsAPI, GNews and DDGS are queried
+concurrently, results are merged as each source answers (deduped by
+canonical URL and near-duplicate title), and the researcher returns as soon
+as enough results are in hand or RESEARCH_DEADLINE passes. Sources that are
+still running finish in the background so their hit rate and latency are
+still recorded (see researcher_stats()).
 """
 
+import re
+import threading
 import time
 import random
 import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import requests
 from dotenv import load_dotenv
 
@@ -20,6 +29,14 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
 NEWS_API_KEY = os.getenv('NEWS_API_KEY')
 GNEWS_API_KEY = os.getenv('GNEWS_API_KEY')
 
+RESEARCH_DEADLINE = float(os.getenv('RESEARCH_DEADLINE', '6'))  # seconds for the whole race
+RESEARCH_SOURCE_TIMEOUT = float(os.getenv('RESEARCH_SOURCE_TIMEOUT', '8'))  # per HTTP request
+RESEARCH_WORKERS = int(os.getenv('RESEARCH_WORKERS', '12'))
+# Extra articles requested from NewsAPI/GNews beyond max_results to cover
+# the few the validity filter drops (was max_results * 3)
+RESEARCH_PAGE_MARGIN = int(os.getenv('RESEARCH_PAGE_MARGIN', '3'))
+TITLE_DUPLICATE_THRESHOLD = 0.8  # token Jaccard above which two titles are the same story
+
 # Fallback to DDGS only if NewsAPI unavailable
 try:
     from duckduckgo_search import DDGS
@@ -35,6 +52,34 @@ except ImportError:
         print(f"⚠️  DDGS library not available: {e}")
 
 
+def _valid_articles(articles: List[Dict], source: str, max_results: int) -> List[Dict[str, str]]:
+    """Drop empty/placeholder articles (NewsAPI and GNews share the article shape)."""
+    valid_articles = []
+    for article in articles:
+        title = article.get('title') or 'Untitled'
+        description = article.get('description') or ''
+        url_val = article.get('url') or ''
+        
+        # Skip if missing critical fields
+        if not url_val or not description or len(description) < 20:
+            continue
+        
+        # Skip placeholder articles
+        if title in ['[Removed]', 'Removed', ''] or len(title) < 3:
+            continue
+        
+        valid_articles.append({
+            'title': title,
+            'url': url_val,
+            'content': description[:500],
+            'source': source
+        })
+        
+        if len(valid_articles) >= max_results:
+            break
+    return valid_articles
+
+
 def search_with_newsapi(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """
     Search using NewsAPI for reliable real-time news results.
@@ -63,11 +108,12 @@ def search_with_newsapi(query: str, max_results: int = 5) -> List[Dict[str, str]
             'q': query,
             'sortBy': 'relevancy',
             'language': 'en',
-            'pageSize': min(max_results * 3, 100),
+            'searchIn': 'title,description',
+            'pageSize': min(max_results + RESEARCH_PAGE_MARGIN, 100),
             'apiKey': NEWS_API_KEY
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(url, params=params, timeout=RESEARCH_SOURCE_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
@@ -80,31 +126,7 @@ def search_with_newsapi(query: str, max_results: int = 5) -> List[Dict[str, str]
         articles = data.get('articles', [])
         print(f"✅ NewsAPI returned {len(articles)} articles")
         
-        # Filter out empty/placeholder articles
-        valid_articles = []
-        for article in articles:
-            title = article.get('title', 'Untitled')
-            description = article.get('description', '')
-            url_val = article.get('url', '')
-            
-            # Skip if missing critical fields
-            if not url_val or not description or len(description) < 20:
-                continue
-            
-            # Skip placeholder articles
-            if title in ['[Removed]', 'Removed', ''] or len(title) < 3:
-                continue
-            
-            valid_articles.append({
-                'title': title,
-                'url': url_val,
-                'content': description[:500],
-                'source': 'NewsAPI'
-            })
-            
-            if len(valid_articles) >= max_results:
-                break
-        
+        valid_articles = _valid_articles(articles, 'NewsAPI', max_results)
         print(f"✅ Got {len(valid_articles)} valid articles from NewsAPI")
         return valid_articles
         
@@ -119,6 +141,48 @@ def search_with_newsapi(query: str, max_results: int = 5) -> List[Dict[str, str]
         return []
 
 
+def search_with_gnews(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """
+    Search using the GNews API (https://gnews.io/docs/v4).
+    
+    Args:
+        query: Search query
+        max_results: Maximum results to return
+        
+    Returns:
+        List of results with title, url, content, source
+    """
+    if not GNEWS_API_KEY:
+        print("⚠️  GNEWS_API_KEY not configured")
+        return []
+    
+    try:
+        print(f"📰 Searching GNews for: '{query}'")
+        params = {
+            'q': query,
+            'lang': 'en',
+            'sortby': 'relevance',
+            'in': 'title,description',
+            'max': min(max_results + RESEARCH_PAGE_MARGIN, 100),
+            'apikey': GNEWS_API_KEY
+        }
+        response = requests.get('https://gnews.io/api/v4/search', params=params,
+                                timeout=RESEARCH_SOURCE_TIMEOUT)
+        response.raise_for_status()
+        
+        articles = response.json().get('articles', [])
+        valid_articles = _valid_articles(articles, 'GNews', max_results)
+        print(f"✅ Got {len(valid_articles)} valid articles from GNews")
+        return valid_articles
+        
+    except requests.exceptions.Timeout:
+        print("❌ GNews request timed out")
+        return []
+    except Exception as e:
+        print(f"❌ GNews error: {e}")
+        return []
+
+
 def search_with_ddgs(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """
     Fallback search using DDGS
@@ -127,7 +191,7 @@ def search_with_ddgs(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         return []
     
     try:
-        print("🔍 Searching with DDGS (fallback)...")
+        print("🔍 Searching with DDGS...")
         ddgs = DDGS()
         search_results = list(ddgs.text(
             query,
@@ -152,37 +216,184 @@ def search_with_ddgs(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         return []
 
 
-def jarvis_researcher(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+# ===== MULTI-SOURCE RACE =====
+
+# name -> (search function, availability, ranking weight)
+SOURCES = {
+    'NewsAPI': (search_with_newsapi, lambda: bool(NEWS_API_KEY), 1.0),
+    'GNews': (search_with_gnews, lambda: bool(GNEWS_API_KEY), 1.0),
+    'DDGS': (search_with_ddgs, lambda: DDGS_AVAILABLE, 0.8),
+}
+
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|cmpid|ocid)$', re.I)
+_WORD = re.compile(r'[a-z0-9]+')
+
+_pool = ThreadPoolExecutor(max_workers=RESEARCH_WORKERS, thread_name_prefix='research')
+
+
+class SourceStats:
+    """Per-source calls, hits (calls returning at least one result), misses of the deadline and latency."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict] = {}
+        self._window = window
+
+    def record(self, source: str, seconds: float, count: int, late: bool):
+        with self._lock:
+            entry = self._sources.setdefault(source, {
+                'calls': 0, 'hits': 0, 'results': 0, 'late': 0, 'latency': deque(maxlen=self._window)})
+            entry['calls'] += 1
+            entry['hits'] += 1 if count else 0
+            entry['results'] += count
+            entry['late'] += 1 if late else 0
+            entry['latency'].append(seconds)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for source, entry in self._sources.items():
+                latency = sorted(entry['latency'])
+                out[source] = {
+                    'calls': entry['calls'],
+                    'hit_rate': round(entry['hits'] / entry['calls'], 3),
+                    'avg_results': round(entry['results'] / entry['calls'], 2),
+                    'missed_deadline': entry['late'],
+                    'p50_ms': round(latency[len(latency) // 2] * 1000, 1),
+                    'p95_ms': round(latency[min(len(latency) - 1, int(len(latency) * 0.95))] * 1000, 1),
+                }
+            return out
+
+
+source_stats = SourceStats()
+
+
+def researcher_stats() -> Dict[str, Dict]:
+    """Per-source hit rate and latency over recent researcher calls."""
+    return source_stats.snapshot()
+
+
+def canonical_url(url: str) -> str:
+    """Scheme/www/case, tracking parameters, fragment and trailing slash removed."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if host.startswith('m.'):
+        host = host[2:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    path = re.sub(r'/(amp/?)?$', '', parts.path) or ''
+    return urlunsplit(('', host, path, query, ''))
+
+
+def _title_tokens(title: str) -> frozenset:
+    # "Headline - The Hindu" / "Headline | Reuters": drop the publisher suffix
+    title = re.split(r'\s+[-|–—]\s+(?=[^-|–—]*$)', title.lower())[0]
+    return frozenset(_WORD.findall(title))
+
+
+def _same_story(a: frozenset, b: frozenset) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= TITLE_DUPLICATE_THRESHOLD
+
+
+class _Merger:
+    """Accumulates results from all sources, deduplicated, and ranks them."""
+
+    def __init__(self, query: str):
+        self.query_terms = set(_WORD.findall(query.lower()))
+        self.items: List[Dict] = []
+        self._by_url: Dict[str, Dict] = {}
+
+    def add(self, source: str, results: List[Dict[str, str]]):
+        weight = SOURCES[source][2]
+        for position, result in enumerate(results):
+            key = canonical_url(result['url'])
+            tokens = _title_tokens(result['title'])
+            item = self._by_url.get(key) or next(
+                (i for i in self.items if _same_story(i['tokens'], tokens)), None)
+            score = weight / (1 + 0.2 * position)
+            if item is None:
+                item = {'result': dict(result, sources=[source]), 'tokens': tokens, 'score': score}
+                self.items.append(item)
+            else:
+                # Same story from another source: corroboration, keep the fuller text
+                if source not in item['result']['sources']:
+                    item['result']['sources'].append(source)
+                item['score'] = max(item['score'], score)
+                if len(result.get('content', '')) > len(item['result'].get('content', '')):
+                    item['result']['content'] = result['content']
+            self._by_url[key] = item
+
+    def ranked(self) -> List[Dict[str, str]]:
+        def rank(item):
+            result = item['result']
+            words = set(_WORD.findall(f"{result['title']} {result.get('content', '')}".lower()))
+            title_words = item['tokens']
+            relevance = 0.0
+            if self.query_terms:
+                relevance = (len(self.query_terms & title_words) * 2 + len(self.query_terms & words)) \
+                    / (3 * len(self.query_terms))
+            return item['score'] + relevance + 0.5 * (len(result['sources']) - 1)
+        return [item['result'] for item in sorted(self.items, key=rank, reverse=True)]
+
+
+def _timed(name: str, query: str, max_results: int, deadline: float):
+    start = time.perf_counter()
+    try:
+        results = SOURCES[name][0](query, max_results)
+    except Exception as e:
+        print(f"⚠️  {name} error: {e}")
+        results = []
+    elapsed = time.perf_counter() - start
+    source_stats.record(name, elapsed, len(results), late=time.perf_counter() > deadline)
+    return results, elapsed
+
+
+def jarvis_researcher(query: str, max_results: int = 5, deadline: Optional[float] = None) -> List[Dict[str, str]]:
     """
     JARVIS Researcher - Multi-source web search
     
-    Priority:
-    1. NewsAPI (reliable, real-time news)
-    2. DDGS fallback (free, but less reliable)
-    3. Empty list (graceful failure)
+    NewsAPI, GNews and DDGS (whichever are configured) run concurrently.
+    Returns once `max_results` distinct results are in hand, every source
+    has answered, or `deadline` seconds (default RESEARCH_DEADLINE) pass;
+    an empty list if nothing came back (ml_service handles it gracefully).
     
     Args:
         query: Search query
         max_results: Maximum results to return
+        deadline: Seconds to wait for sources
         
     Returns:
-        List of verified results
+        List of ranked, deduplicated results
     """
     print(f"🔍 JARVIS Researcher: '{query}'")
+    started = time.perf_counter()
+    cutoff = started + (RESEARCH_DEADLINE if deadline is None else deadline)
     
-    # Try NewsAPI first
-    results = search_with_newsapi(query, max_results)
-    
-    # Fallback to DDGS if NewsAPI returns nothing
-    if not results:
-        print("📌 NewsAPI empty, trying DDGS fallback...")
-        results = search_with_ddgs(query, max_results)
+    futures = {_pool.submit(_timed, name, query, max_results, cutoff): name
+               for name, (_, available, _) in SOURCES.items() if available()}
+    merger = _Merger(query)
+    report = []
+    pending = set(futures)
+    while pending and len(merger.items) < max_results:
+        remaining = cutoff - time.perf_counter()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            results, elapsed = future.result()
+            merger.add(futures[future], results)
+            report.append(f"{futures[future]} {len(results)} in {elapsed:.1f}s")
+    report.extend(f"{futures[f]} still running" for f in pending)
     
-    # Final fallback: return empty (ml_service will handle gracefully)
+    results = merger.ranked()[:max_results]
     if not results:
         print("⚠️  No search results from any source")
     
-    print(f"🎯 Returning {len(results)} results")
+    print(f"📊 Sources: {', '.join(report) or 'none configured'}")
+    print(f"🎯 Returning {len(results)} results in {time.perf_counter() - started:.1f}s")
     return results
 
 
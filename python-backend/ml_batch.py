@@ -0,0 +1,194 @@
+"""
+ML Batch - many-text variants of the MLService analytics
+Backs /api/sentiment/batch, /api/summarize/batch and /api/predict/batch so a
+whole class's submissions are scored in one call instead of one HTTP
+request per text. Also used by the single-text MLService methods, so a text
+gets the same result either way.
+
+- sentiment and predict match whole words with precompiled patterns and
+  count with NumPy (pure Python fallback when it is not installed)
+- batches of ML_BATCH_PARALLEL_MIN texts or more are split into
+  ML_BATCH_CHUNK-sized chunks and run across a process pool of
+  ML_BATCH_WORKERS spawned (not forked) processes, started with the server
+"""
+
+import multiprocessing as mp
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Per server process; a few workers, not cpu_count, so several server workers don't oversubscribe the CPU
+ML_BATCH_WORKERS = int(os.environ.get("ML_BATCH_WORKERS", str(min(2, os.cpu_count() or 1))))
+ML_BATCH_CHUNK = int(os.environ.get("ML_BATCH_CHUNK", "500"))
+ML_BATCH_PARALLEL_MIN = int(os.environ.get("ML_BATCH_PARALLEL_MIN", "2000"))
+
+POSITIVE_WORDS = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'best', 'awesome', 'perfect']
+NEGATIVE_WORDS = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'poor', 'disappointing', 'useless']
+
+_SENTIMENT_COLUMNS = {word: i for i, word in enumerate(POSITIVE_WORDS + NEGATIVE_WORDS)}
+_SENTIMENT_PATTERN = re.compile(r"\b(?:" + "|".join(sorted(_SENTIMENT_COLUMNS, key=len, reverse=True)) + r")\b")
+_SENTENCE_SPLIT = re.compile(r"[.!?]+")
+_WORD = re.compile(r"\w+")
+
+
+# ===== SENTIMENT =====
+
+def _sentiment_hits(texts: Sequence[str]):
+    """Which sentiment words occur in each text (presence, like the original lists)"""
+    if not NUMPY_AVAILABLE:
+        return [set(_SENTIMENT_PATTERN.findall(text.lower())) for text in texts]
+    k = len(_SENTIMENT_COLUMNS)
+    # (text, word) cells, repeats included; bincount > 0 turns counts into presence
+    flat = [i * k + _SENTIMENT_COLUMNS[w] for i, text in enumerate(texts)
+            for w in _SENTIMENT_PATTERN.findall(text.lower())]
+    counts = np.bincount(np.asarray(flat, dtype=np.int64), minlength=len(texts) * k)
+    return counts.reshape(len(texts), k) > 0
+
+
+def sentiment_batch(texts: Sequence[str]) -> List[Dict]:
+    """analyze_sentiment for every text (without the per-item timestamp)"""
+    if not texts:
+        return []
+    hits = _sentiment_hits(texts)
+    n_pos = len(POSITIVE_WORDS)
+    if NUMPY_AVAILABLE:
+        positive = hits[:, :n_pos].sum(axis=1)
+        negative = hits[:, n_pos:].sum(axis=1)
+        total = positive + negative
+        score = np.where(total == 0, 0.5, positive / np.maximum(total, 1))
+        label = np.where(total == 0, 'neutral',
+                         np.where(score > 0.6, 'positive', np.where(score < 0.4, 'negative', 'neutral')))
+        positive, negative, score, label = positive.tolist(), negative.tolist(), score.tolist(), label.tolist()
+    else:
+        positive = [sum(1 for w in words if _SENTIMENT_COLUMNS[w] < n_pos) for words in hits]
+        negative = [len(words) - p for words, p in zip(hits, positive)]
+        score = [p / (p + q) if p + q else 0.5 for p, q in zip(positive, negative)]
+        label = ['neutral' if p + q == 0 else 'positive' if s > 0.6 else 'negative' if s < 0.4 else 'neutral'
+                 for p, q, s in zip(positive, negative, score)]
+    return [
+        {
+            'success': True,
+            'sentiment': label[i],
+            'score': round(score[i], 2),
+            'positive_count': positive[i],
+            'negative_count': negative[i],
+            'text_length': len(texts[i]),
+            'method': 'keyword_matching',
+        }
+        for i in range(len(texts))
+    ]
+
+
+# ===== SUMMARIZATION =====
+
+def summarize_one(text: str, max_sentences: int = 3) -> Dict:
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    if len(sentences) <= max_sentences:
+        summary = text
+    else:
+        summary = '. '.join(sentences[:max_sentences]) + '.'
+    return {
+        'success': True,
+        'summary': summary,
+        'original_length': len(text),
+        'summary_length': len(summary),
+        'total_sentences': len(sentences),
+        'summary_sentences': min(max_sentences, len(sentences)),
+        'method': 'extractive',
+    }
+
+
+def summarize_batch(texts: Sequence[str], max_sentences: int = 3) -> List[Dict]:
+    return [summarize_one(text, max_sentences) for text in texts]
+
+
+# ===== PREDICTION =====
+
+def query_keywords(query: str) -> Tuple[str, ...]:
+    return tuple(sorted({w for w in _WORD.findall(str(query).lower()) if len(w) > 3}))
+
+
+def predict_batch(pairs: Sequence[Tuple[str, str]]) -> List[Dict]:
+    """predict_model for (context, query) pairs; whole-word keyword overlap"""
+    keyword_cache: Dict[str, Tuple[str, ...]] = {}
+    matches, totals = [], []
+    for context, query in pairs:
+        keywords = keyword_cache.get(query)
+        if keywords is None:
+            keywords = keyword_cache[query] = query_keywords(query)
+        if not keywords:
+            matches.append(0)
+            totals.append(0)
+            continue
+        matches.append(len(set(keywords).intersection(_WORD.findall(str(context).lower()))))
+        totals.append(len(keywords))
+    if NUMPY_AVAILABLE and pairs:
+        m, t = np.asarray(matches, dtype=np.float64), np.asarray(totals, dtype=np.float64)
+        confidence = np.minimum(m / np.maximum(t, 1), 1.0).tolist()
+    else:
+        confidence = [min(m / t, 1.0) if t else 0.0 for m, t in zip(matches, totals)]
+
+    results = []
+    for m, t, c in zip(matches, totals, confidence):
+        if not t:
+            results.append({'success': True, 'confidence': 0.5, 'method': 'default',
+                            'message': 'No significant keywords found'})
+        else:
+            results.append({'success': True, 'confidence': round(c, 3), 'matches': m,
+                            'total_keywords': t, 'method': 'keyword_matching'})
+    return results
+
+
+# ===== PROCESS POOL =====
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_pool():
+    """
+    Create the worker pool; called once at server startup. Workers are
+    spawned, not forked: forking the threaded Flask server can copy a lock
+    held by another thread and deadlock the child.
+    """
+    global _pool
+    if ML_BATCH_WORKERS <= 1 or mp.parent_process() is not None:
+        return None  # no pool wanted, or we are a pool worker importing the app
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=ML_BATCH_WORKERS, mp_context=mp.get_context("spawn"))
+        return _pool
+
+
+def run_batch(fn: Callable[[Sequence], List[Dict]], items: Sequence, **kwargs) -> List[Dict]:
+    """
+    fn(items, **kwargs), split into chunks across the process pool when the
+    batch is large enough to pay for the inter-process copies
+    """
+    items = list(items)
+    work = partial(fn, **kwargs) if kwargs else fn
+    if len(items) < ML_BATCH_PARALLEL_MIN or ML_BATCH_WORKERS <= 1:
+        return work(items)
+    pool = _pool or start_pool()
+    if pool is None:
+        return work(items)
+    chunks = [items[i:i + ML_BATCH_CHUNK] for i in range(0, len(items), ML_BATCH_CHUNK)]
+    try:
+        results = []
+        for chunk_results in pool.map(work, chunks):
+            results.extend(chunk_results)
+        return results
+    except Exception as e:
+        # A broken pool (worker killed, spawn failed) shouldn't fail the request
+        print(f"⚠️ ML batch pool failed ({e}); running in-process")
+        return work(items)
@@ -8,6 +8,7 @@ import re
 from datetime import datetime
 import json
 import os
+import sys
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
@@ -17,6 +18,21 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
 from groq import Groq
 from jarvis_researcher import jarvis_researcher, jarvis_researcher_quick
 
+# Shared keyword matcher lives next to the main backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from jarvis_keywords import register, tag_query
+
+from ml_batch import predict_batch, sentiment_batch, summarize_one
+
+WEB_SEARCH_KEYWORDS = register('ml_service.web_search', [
+    'today', 'latest', 'current', 'currently', 'recent', 'recently', 'now',
+    'news', 'breaking', 'update', 'updates', 'live',
+    '2024', '2025', '2026',
+    'this week', 'this month', 'this year',
+    'happening', 'trending', 'viral',
+    'just announced', 'breaking news'
+])
+
 class MLService:
     """Lightweight ML/AI Service for JARVIS with Groq Integration"""
     
@@ -100,38 +116,10 @@ class MLService:
             if not text or not isinstance(text, str):
                 return {'error': 'Invalid text provided'}
             
-            text_lower = text.lower()
-            
-            # Simple keyword-based sentiment
-            positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'best', 'awesome', 'perfect']
-            negative_words = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'poor', 'disappointing', 'useless']
-            
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            
-            total = positive_count + negative_count
-            if total == 0:
-                sentiment = 'neutral'
-                score = 0.5
-            else:
-                score = positive_count / total
-                if score > 0.6:
-                    sentiment = 'positive'
-                elif score < 0.4:
-                    sentiment = 'negative'
-                else:
-                    sentiment = 'neutral'
-            
-            return {
-                'success': True,
-                'sentiment': sentiment,
-                'score': round(score, 2),
-                'positive_count': positive_count,
-                'negative_count': negative_count,
-                'text_length': len(text),
-                'method': 'keyword_matching',
-                'timestamp': datetime.now().isoformat()
-            }
+            # Whole-word matching, shared with /api/sentiment/batch
+            result = sentiment_batch([text])[0]
+            result['timestamp'] = datetime.now().isoformat()
+            return result
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
@@ -148,27 +136,9 @@ class MLService:
             if not text or not isinstance(text, str):
                 return {'error': 'Invalid text provided'}
             
-            # Split into sentences
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if s.strip()]
-            
-            if len(sentences) <= max_sentences:
-                summary = text
-            else:
-                # Take first and last sentences, plus middle ones
-                summary_sentences = sentences[:max_sentences]
-                summary = '. '.join(summary_sentences) + '.'
-            
-            return {
-                'success': True,
-                'summary': summary,
-                'original_length': len(text),
-                'summary_length': len(summary),
-                'total_sentences': len(sentences),
-                'summary_sentences': min(max_sentences, len(sentences)),
-                'method': 'extractive',
-                'timestamp': datetime.now().isoformat()
-            }
+            result = summarize_one(text, max_sentences)
+            result['timestamp'] = datetime.now().isoformat()
+            return result
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
@@ -253,25 +223,9 @@ class MLService:
         Returns:
             bool: True if web search needed, False otherwise
         """
-        query_lower = query.lower()
-        
         # Keywords that indicate need for current/live information
-        web_search_keywords = [
-            'today', 'latest', 'current', 'recent', 'now',
-            'news', 'breaking', 'update', 'live',
-            '2024', '2025', '2026',
-            'this week', 'this month', 'this year',
-            'happening', 'trending', 'viral',
-            'just announced', 'breaking news'
-        ]
-        
-        # Check if any keyword matches
-        for keyword in web_search_keywords:
-            if keyword in query_lower:
-                return True
-        
-        # Otherwise, use built-in knowledge
-        return False
+        # (WEB_SEARCH_KEYWORDS, whole-word match); otherwise use built-in knowledge
+        return WEB_SEARCH_KEYWORDS in tag_query(query)
     
     def generate_jarvis_response(self, user_query: str) -> Dict:
         """
@@ -429,34 +383,11 @@ def predict_model(context, query):
                 'confidence': 0.0
             }
         
-        # Simple relevance heuristic based on keyword matching
-        context_lower = str(context).lower()
-        query_lower = str(query).lower()
-        
-        # Extract keywords from query
-        query_words = set(re.findall(r'\w+', query_lower))
-        query_words = {w for w in query_words if len(w) > 3}  # Filter short words
-        
-        if not query_words:
-            return {
-                'success': True,
-                'confidence': 0.5,
-                'method': 'default',
-                'message': 'No significant keywords found'
-            }
-        
-        # Count matches
-        matches = sum(1 for word in query_words if word in context_lower)
-        confidence = min(matches / len(query_words), 1.0)
-        
-        return {
-            'success': True,
-            'confidence': round(confidence, 3),
-            'matches': matches,
-            'total_keywords': len(query_words),
-            'method': 'keyword_matching',
-            'timestamp': datetime.now().isoformat()
-        }
+        # Simple relevance heuristic based on whole-word keyword matching
+        result = predict_batch([(context, query)])[0]
+        if result['method'] == 'keyword_matching':
+            result['timestamp'] = datetime.now().isoformat()
+        return result
     except Exception as e:
         return {
             'success': False,
@@ -0,0 +1,104 @@
+"""
+Retrieval Cache - TTL cache for the agentic workflow stages
+Shared by /api/jarvis/ask and /api/jarvis/workflow so repeat and
+overlapping questions skip the Groq classification call and Tavily searches
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Queries about things that change during the day get the short TTL
+NEWS_PATTERN = re.compile(
+    r"\b(today|tonight|now|latest|current|currently|recent|live|breaking|news|update|updates|"
+    r"trending|score|price|weather|yesterday|this week)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace, drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!.").strip()
+
+
+def is_news_like(query: str) -> bool:
+    return bool(NEWS_PATTERN.search(query))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL.
+
+    get_or_compute() is single-flight: concurrent callers for the same key
+    wait for one computation instead of each calling the API.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float,
+                       cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Cached value for `key`, else compute() once and store it if cacheable(value)."""
+        while True:
+            with self._lock:
+                value = self._get_locked(key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    self.misses += 1
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # Another request is computing this key; take its result (or retry if it failed)
+            waiter.wait()
+
+        try:
+            value = compute()
+            if value is not None and cacheable(value):
+                self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+/api/sentiment one text per request vs /api/sentiment/batch
+
+Old model: a client POSTs every text to /api/sentiment, paying request
+parsing, routing and JSON encoding per text. New model: one POST of the
+whole array to /api/sentiment/batch (ml_batch: one compiled whole-word pass
+per text, NumPy counting, process pool from ML_BATCH_PARALLEL_MIN texts).
+
+Runs through Flask's test client, so network time is not included. Checks
+that both give the same results, then prints texts/second at each batch
+size.
+
+    python test_ml_batch_bench.py
+    python test_ml_batch_bench.py --sizes 10 1000 20000
+"""
+
+import argparse
+import random
+import time
+
+import ml_batch
+from app_updated import app
+from ml_batch import NEGATIVE_WORDS, POSITIVE_WORDS
+
+FILLER = (
+    "the a of and to in for on with is was by that this from at as are be it has have had will "
+    "lecture teacher students class notes assignment exam lab project topic example question answer "
+    "explained slides homework week module course video quiz marks doubt session"
+).split()
+
+
+def make_texts(n, seed=7):
+    rng = random.Random(seed)
+    words = POSITIVE_WORDS + NEGATIVE_WORDS
+    return [" ".join(rng.choice(words) if rng.random() < 0.03 else rng.choice(FILLER)
+                     for _ in range(rng.randint(10, 120))).capitalize() + "."
+            for _ in range(n)]
+
+
+def rate(n, seconds):
+    return f"{n / seconds:>12,.0f}/s" if seconds > 0 else "         inf/s"
+
+
+def without_timestamp(result):
+    return {k: v for k, v in result.items() if k != 'timestamp'}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000])
+    args = parser.parse_args()
+
+    client = app.test_client()
+    print(f"numpy: {ml_batch.NUMPY_AVAILABLE}, workers: {ml_batch.ML_BATCH_WORKERS}, "
+          f"pool from {ml_batch.ML_BATCH_PARALLEL_MIN} texts\n")
+    print(f"{'texts':>8} | {'per request':>14} | {'batch request':>14} | speedup")
+    print("-" * 56)
+
+    for n in args.sizes:
+        texts = make_texts(n)
+        repeat = max(1, 2000 // n)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            single = [client.post('/api/sentiment', json={'text': t}).get_json()['result'] for t in texts]
+        single_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            batch = client.post('/api/sentiment/batch', json={'texts': texts}).get_json()['results']
+        batch_s = (time.perf_counter() - start) / repeat
+
+        assert [without_timestamp(r) for r in single] == batch, f"results differ at n={n}"
+        print(f"{n:>8,} | {rate(n, single_s)} | {rate(n, batch_s)} | {single_s / batch_s:6.1f}x")
+
+    print("\n✅ Batch results identical to one request per text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ContentVerifier relevance scoring: per-result loop vs vectorized batch
+
+Old model: calculate_relevance_score per result, which re-lowercases and
+re-splits the query and runs `kw in text` for every query word, intent
+keyword and NOISE_KEYWORDS entry. New model: ContentVerifier.score_batch,
+one compiled pass per text into a NumPy term-frequency array.
+
+Checks that both give the same scores, then prints results/second at each
+batch size.
+
+    python test_verifier_batch_bench.py
+    python test_verifier_batch_bench.py --sizes 10 1000 100000
+"""
+
+import argparse
+import random
+import time
+
+import content_verifier
+from content_verifier import ContentVerifier
+
+QUERY = "latest Tamil Nadu news about the assembly election results today"
+
+# Filler prose with the query/intent/noise words sprinkled in, like extracted page text
+FILLER = (
+    "the a of and to in for on with is was by that this from at as are be it has have had will "
+    "government minister said people year state city police court party report water project students "
+    "market company price growth public health hospital district officials village road train power "
+    "development farmers scheme crore lakh rupees week month during after before while also more than"
+).split()
+TOPIC = (
+    "tamil nadu chennai election assembly results cricket match technology software python "
+    "advertisement subscribe cookie today latest news madras cinema"
+).split()
+
+
+def old_relevance_score(text, query, intent, verifier=ContentVerifier):
+    """calculate_relevance_score as it was before the batch engine"""
+    text_lower = text.lower()
+    query_lower = query.lower()
+    score = 0.0
+    query_words = query_lower.split()
+    matching_keywords = sum(1 for word in query_words if len(word) > 3 and word in text_lower)
+    if matching_keywords > 0:
+        score += min(0.3, matching_keywords * 0.1)
+    if intent and intent in verifier.REGION_KEYWORDS:
+        if any(keyword in text_lower for keyword in verifier.REGION_KEYWORDS[intent]):
+            score += 0.3
+    noise_count = sum(1 for noise in verifier.NOISE_KEYWORDS if noise in text_lower)
+    if noise_count == 0:
+        score += 0.2
+    else:
+        score -= min(0.2, noise_count * 0.05)
+    if len(text) > 200:
+        score += 0.2
+    return max(0.0, min(1.0, score))
+
+
+def make_texts(n, seed=7):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(TOPIC) if rng.random() < 0.04 else rng.choice(FILLER)
+                 for _ in range(rng.randint(20, 250))]
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def rate(n, seconds):
+    return f"{n / seconds:>12,.0f}/s" if seconds > 0 else "         inf/s"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    verifier = ContentVerifier()
+    intent = verifier.detect_intent(QUERY)
+    print(f"Query: {QUERY!r} (intent: {intent}, numpy: {content_verifier.NUMPY_AVAILABLE})\n")
+    print(f"{'results':>8} | {'per-result loop':>16} | {'batch':>16} | speedup")
+    print("-" * 60)
+
+    for n in args.sizes:
+        texts = make_texts(n)
+        repeat = max(1, 20000 // n)  # small batches are timed over several calls
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            old = [old_relevance_score(t, QUERY, intent) for t in texts]
+        old_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            new = verifier.score_batch(texts, QUERY, intent)
+        new_s = (time.perf_counter() - start) / repeat
+
+        mismatches = sum(1 for a, b in zip(old, new) if abs(a - b) > 1e-9)
+        assert mismatches == 0, f"{mismatches} scores differ at n={n}"
+        print(f"{n:>8,} | {rate(n, old_s)} | {rate(n, new_s)} | {old_s / new_s:5.1f}x")
+
+    print("\n✅ Batch scores identical to the per-result loop")
+
+
+if __name__ == "__main__":
+    main()